@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+# keep the render cache of the test run out of the user's cache directory;
+# this runs before any test module imports wireviz_gui.render, which opens
+# the cache on import
+# the database may still be open when the run ends, which Windows refuses
+_cache_dir = tempfile.TemporaryDirectory(
+    prefix="wireviz-gui-tests-", ignore_cleanup_errors=True
+)
+os.environ["WIREVIZ_GUI_CACHE_DIR"] = _cache_dir.name
+
+
+def pytest_unconfigure(config):
+    _cache_dir.cleanup()
@@ -0,0 +1,28 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+def fake_graphviz(test: unittest.TestCase, render) -> MagicMock:
+    """
+    Clear the render caches, and stand in for the disk cache and for graphviz,
+    which may not be installed, until ``test`` ends.
+
+    :param render: the ``wireviz_gui.render`` module the test uses, as some
+        tests import it again after others purge it from ``sys.modules``
+    :return: the layout backend standing in for graphviz
+    """
+    render.source_cache.clear()
+    render.output_cache.clear()
+
+    backend = {
+        "render.return_value": b"png",
+        "render_formats.return_value": {"png": b"png", "svg": b"<svg></svg>"},
+    }
+    for patcher in (
+        patch.object(render, "disk_cache", None),
+        patch.object(render, "layout_backend", **backend),
+    ):
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+    return render.layout_backend
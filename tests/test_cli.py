@@ -0,0 +1,187 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from wireviz_gui.__main__ import main
+from wireviz_gui.batch import expand_inputs
+
+# uses the Connector.Pin syntax that upstream wireviz does not understand
+_YAML = """
+connectors:
+  X1:
+    pincount: 2
+  X2:
+    pincount: 2
+cables:
+  W1:
+    wirecount: 2
+    label: migrated to notes
+connections:
+  - [X1.1, W1: 1, X2.1]
+"""
+
+
+class TestExpandInputs(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._root = Path(tmp.name)
+
+        for name in ("a.yaml", "sub/b.yml", "sub/deeper/c.yaml", "notes.txt"):
+            path = self._root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(_YAML)
+
+    def test_directories_are_searched_recursively(self):
+        self.assertEqual(
+            [p.name for p in expand_inputs([str(self._root)])],
+            ["a.yaml", "b.yml", "c.yaml"],
+        )
+
+    def test_globs_and_duplicates(self):
+        paths = expand_inputs(
+            [str(self._root / "**" / "*.yaml"), str(self._root / "a.yaml")]
+        )
+        self.assertEqual([p.name for p in paths], ["a.yaml", "c.yaml"])
+
+    def test_nothing_matched(self):
+        with self.assertRaises(FileNotFoundError):
+            expand_inputs([str(self._root / "*.json")])
+
+
+class TestRenderCommand(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._root = Path(tmp.name)
+
+    def _invoke(self, *args):
+        # the bill of materials does not need graphviz
+        return CliRunner().invoke(main, ["render", "-f", "tsv", "-j", "1", *args])
+
+    def test_renders_with_normalization(self):
+        (self._root / "harness.yaml").write_text(_YAML)
+        out = self._root / "out"
+
+        result = self._invoke("-o", str(out), str(self._root))
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("ok", result.output)
+        self.assertIn("1 files, 0 failed", result.output)
+        self.assertIn("W1", (out / "harness.bom.tsv").read_text())
+
+    def test_output_dir_mirrors_the_inputs(self):
+        for name in ("a/harness.yaml", "b/harness.yaml"):
+            path = self._root / "in" / name
+            path.parent.mkdir(parents=True)
+            path.write_text(_YAML)
+        out = self._root / "out"
+
+        result = self._invoke("-o", str(out), str(self._root / "in"))
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue((out / "a" / "harness.bom.tsv").exists())
+        self.assertTrue((out / "b" / "harness.bom.tsv").exists())
+
+    def test_colliding_outputs_fail(self):
+        (self._root / "harness.yaml").write_text(_YAML)
+        (self._root / "harness.yml").write_text(_YAML)
+
+        result = self._invoke(str(self._root))
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("2 files, 1 failed", result.output)
+        self.assertIn("would overwrite", result.output)
+
+    def test_current_outputs_are_skipped(self):
+        (self._root / "harness.yaml").write_text(_YAML)
+        self._invoke(str(self._root))
+
+        result = self._invoke(str(self._root))
+        self.assertIn("0 failed, 1 current", result.output)
+
+        result = self._invoke("--force", str(self._root))
+        self.assertIn("0 failed, 0 current", result.output)
+
+    def test_failures_exit_non_zero(self):
+        (self._root / "good.yaml").write_text(_YAML)
+        (self._root / "bad.yaml").write_text("connectors: [unclosed")
+
+        result = self._invoke(str(self._root))
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("FAILED", result.output)
+        self.assertIn("2 files, 1 failed", result.output)
+        self.assertTrue((self._root / "good.bom.tsv").exists())
+
+    def test_layout_from_the_environment(self):
+        (self._root / "harness.yaml").write_text(_YAML)
+
+        with patch("wireviz_gui.__main__.set_layout_backend") as mock_set:
+            result = CliRunner().invoke(
+                main,
+                ["render", "-f", "tsv", "-j", "1", str(self._root)],
+                env={"WIREVIZ_GUI_LAYOUT": "subprocess"},
+            )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        mock_set.assert_called_once_with("subprocess", concurrent=False)
+
+    def test_layout_option_leaves_the_environment_alone(self):
+        (self._root / "harness.yaml").write_text(_YAML)
+
+        with (
+            patch.dict(os.environ),
+            patch("wireviz_gui.__main__.set_layout_backend") as mock_set,
+        ):
+            os.environ.pop("WIREVIZ_GUI_LAYOUT", None)
+            result = CliRunner().invoke(
+                main,
+                ["--layout", "subprocess", "render", "-f", "tsv", str(self._root)],
+            )
+            self.assertNotIn("WIREVIZ_GUI_LAYOUT", os.environ)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        mock_set.assert_called_once_with("subprocess", concurrent=False)
+
+    def test_gui_renders_concurrently(self):
+        with (
+            patch("wireviz_gui.__main__.set_layout_backend") as mock_set,
+            patch("wireviz_gui.app.Application") as mock_application,
+            patch("logging.basicConfig"),
+        ):
+            result = CliRunner().invoke(main, [])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        mock_set.assert_called_once_with("auto", concurrent=True)
+        mock_application.assert_called_once()
+
+    def test_unknown_layout_in_the_environment(self):
+        out = subprocess.run(
+            [sys.executable, "-m", "wireviz_gui", "--help"],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "WIREVIZ_GUI_LAYOUT": "neato"},
+            check=True,
+        )
+        self.assertIn("WIREVIZ_GUI_LAYOUT", out.stdout)
+
+    def test_tkinter_is_not_imported(self):
+        code = (
+            "import sys, wireviz_gui.__main__, wireviz_gui.batch; "
+            "print('tkinter' in sys.modules)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(out.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -50,6 +50,32 @@ class TestDialogIntegration(unittest.TestCase):
             self.assertIn("X1", parsed["connectors"])
             self.assertEqual(parsed["connectors"]["X1"]["type"], "D-Sub")
 
+    @patch("wireviz_gui.app.tk.Tk")
+    @patch("wireviz_gui.app.tk.PhotoImage")
+    @patch("wireviz_gui.app.ttk.Notebook")
+    def test_text_that_cannot_be_loaded_is_kept(
+        self, mock_notebook, mock_photo, mock_tk
+    ):
+        with (
+            patch("wireviz_gui.app.InputOutputFrame.grid"),
+            patch("wireviz_gui.app.ButtonFrame"),
+            patch("wireviz_gui.app.StructureViewFrame"),
+            patch("wireviz_gui.app.TextEntryFrame") as MockTextEntry,
+            patch("wireviz_gui.app.HarnessViewFrame"),
+            patch("wireviz_gui.app.showerror") as mock_showerror,
+        ):
+            frame = InputOutputFrame(MagicMock())
+
+            # valid YAML, but there is no 13th month
+            text_entry_instance = MockTextEntry.return_value
+            text_entry_instance.get.return_value = "date: 2020-13-45\n"
+
+            for _ in range(2):
+                frame._update_yaml_section("connectors", {"X1": {"pincount": 2}})
+
+            self.assertEqual(mock_showerror.call_count, 2)
+            text_entry_instance.clear.assert_not_called()
+
     def test_dialog_outputs(self):
         # Verify dialogs produce the expected dict structure
         harness = MagicMock()
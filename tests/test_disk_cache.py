@@ -0,0 +1,58 @@
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+
+from wireviz_gui.disk_cache import DiskRenderCache
+
+
+def _write_entries(path, worker):
+    cache = DiskRenderCache(Path(path))
+    for i in range(20):
+        cache.put(f"{worker}-{i}", png=b"\x89PNG" + bytes(100), summary={"i": i})
+    return worker
+
+
+class TestDiskRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self._path = Path(self._tmp.name) / "renders.sqlite3"
+
+    def test_round_trip(self):
+        cache = DiskRenderCache(self._path)
+        self.assertIsNone(cache.get("abc"))
+
+        cache.put("abc", png=b"png-data", summary={"connectors": {}})
+        cache.put("abc", svg="<svg/>")
+
+        stored = cache.get("abc")
+        self.assertEqual(stored["png"], b"png-data")
+        self.assertEqual(stored["svg"], "<svg/>")
+        self.assertEqual(stored["summary"], {"connectors": {}})
+
+        # a second instance, as another process would open it, sees the entry
+        self.assertEqual(DiskRenderCache(self._path).get("abc")["png"], b"png-data")
+
+    def test_size_based_eviction(self):
+        cache = DiskRenderCache(self._path, max_bytes=250)
+        cache.put("old", png=bytes(100))
+        cache.put("newer", png=bytes(100))
+        cache.get("old")  # refresh "old" so that "newer" is evicted first
+        cache.put("newest", png=bytes(100))
+
+        self.assertIsNotNone(cache.get("old"))
+        self.assertIsNone(cache.get("newer"))
+        self.assertIsNotNone(cache.get("newest"))
+        self.assertLessEqual(cache.stats()["bytes"], 250)
+
+    def test_concurrent_processes(self):
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(4) as pool:
+            pool.starmap(_write_entries, [(str(self._path), w) for w in range(4)])
+
+        self.assertEqual(DiskRenderCache(self._path).stats()["entries"], 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from wireviz_gui.app import TabRecord, export_stems
+
+
+class TestExportStems(unittest.TestCase):
+    def test_named_after_files_then_titles(self):
+        records = [
+            TabRecord("main.yaml", "", file_path="/work/main.yaml"),
+            TabRecord("Untitled", ""),
+            TabRecord("a/b: c?", ""),
+        ]
+        self.assertEqual(export_stems(records), ["main", "Untitled", "a_b_ c_"])
+
+    def test_names_are_not_reused(self):
+        records = [
+            TabRecord("harness.yaml", "", file_path="/one/harness.yaml"),
+            TabRecord("harness.yaml", "", file_path="/two/harness.yaml"),
+            TabRecord("Harness", ""),
+            TabRecord("   ", ""),
+        ]
+        self.assertEqual(
+            export_stems(records), ["harness", "harness-2", "Harness-3", "harness-4"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
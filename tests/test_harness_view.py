@@ -0,0 +1,431 @@
+import threading
+import time
+import unittest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from wireviz_gui.app import HarnessViewFrame
+
+
+def _png(width, height):
+    data = BytesIO()
+    Image.new("RGB", (width, height), "red").save(data, format="PNG")
+    return data.getvalue()
+
+
+class ViewTestCase(unittest.TestCase):
+    """Builds HarnessViewFrames on a mocked canvas, with after() recorded"""
+
+    def setUp(self):
+        for patcher in (
+            patch("wireviz_gui.app.tk.Canvas"),
+            patch("wireviz_gui.app.tk.Scrollbar"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # what after() was asked to call, by the id it returned
+        self._after = {}
+
+    def _schedule(self, ms, func):
+        after_id = f"after#{len(self._after)}"
+        self._after[after_id] = (ms, func)
+        return after_id
+
+    def _frame(self, **kwargs):
+        frame = HarnessViewFrame(MagicMock(), **kwargs)
+        frame.after = MagicMock(side_effect=self._schedule)
+        frame.after_idle = MagicMock(return_value="idle")
+        frame.after_cancel = MagicMock()
+        self.addCleanup(frame.release_images)
+        return frame
+
+    def _finish_decoding(self, frame):
+        deadline = time.monotonic() + 10
+        while frame._decodes:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+            frame._poll_decode()
+
+
+class DecodingTestCase(ViewTestCase):
+    """Records the threads that images are decoded on"""
+
+    def setUp(self):
+        super().setUp()
+        self._threads = []
+        decode = HarnessViewFrame._decode
+
+        def record(png_data):
+            self._threads.append(threading.current_thread())
+            return decode(png_data)
+
+        patcher = patch.object(HarnessViewFrame, "_decode", side_effect=record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestDecoding(DecodingTestCase):
+    def test_new_render_is_decoded_in_the_background(self):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+        frame._view_item = "previous diagram"
+
+        frame.update_image(_png(300, 200))
+
+        # nothing is decoded yet, and the previous diagram is left in view
+        self.assertIsNone(frame._display)
+        self.assertEqual(frame._view_item, "previous diagram")
+        frame._redraw.assert_not_called()
+
+        self._finish_decoding(frame)
+
+        self.assertEqual(len(self._threads), 1)
+        self.assertIsNot(self._threads[0], threading.current_thread())
+        self.assertEqual(frame._display.size, (300, 200))
+        self.assertTrue(frame._display.ready)
+        frame._redraw.assert_called()
+
+    def test_hidden_tab_waits_until_shown(self):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+        frame.set_visible(False)
+
+        frame.update_image(_png(300, 200))
+        self.assertEqual(self._threads, [])
+        self.assertTrue(frame.has_image())
+
+        frame.set_visible(True)
+        self._finish_decoding(frame)
+        self.assertEqual(frame._display.size, (300, 200))
+
+    def test_newer_render_is_shown(self):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+
+        frame.update_image(_png(300, 200))
+        frame.update_image(_png(120, 80))
+        self._finish_decoding(frame)
+
+        self.assertEqual(frame._display.size, (120, 80))
+
+    def test_scale_set_while_decoding(self):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+
+        frame.update_image(_png(300, 200))
+        frame.set_scale(1.5)
+        self._finish_decoding(frame)
+
+        self.assertEqual(frame.scale, 1.5)
+        frame._redraw.assert_called()
+
+    def test_render_that_cannot_be_decoded(self):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+        frame._view_item = "previous diagram"
+
+        # a valid header, but the pixels are cut short
+        frame.update_image(_png(300, 200)[:100])
+        self._finish_decoding(frame)
+
+        self.assertIsNone(frame._display)
+        self.assertIsNone(frame._view_item)
+        frame._redraw.assert_not_called()
+
+
+class TestVariants(DecodingTestCase):
+    def _shown(self, png_data):
+        frame = self._frame()
+        frame._redraw = MagicMock()
+        frame.update_image(png_data)
+        self._finish_decoding(frame)
+        self._threads.clear()
+        return frame
+
+    def test_variant_is_decoded_in_the_background(self):
+        frame = self._shown(_png(300, 200))
+        frame._wanted_dpi = 192
+
+        frame.add_variant(192, _png(600, 400))
+        self.assertEqual(frame._display_dpi, 96)
+
+        self._finish_decoding(frame)
+        self.assertEqual(len(self._threads), 1)
+        self.assertIsNot(self._threads[0], threading.current_thread())
+        self.assertEqual(frame._display_dpi, 192)
+        self.assertEqual(frame._display.size, (600, 400))
+
+    def test_freed_variant_is_decoded_again_when_wanted(self):
+        frame = self._shown(_png(300, 200))
+        frame.add_variant(192, _png(600, 400))
+        self._finish_decoding(frame)
+        self.assertEqual(frame._display_dpi, 96)
+
+        frame._variants.clear()
+        frame._wanted_dpi = 192
+        frame._show_variant(192)
+        frame._show_variant(192)
+        self.assertEqual(frame._display_dpi, 96)
+
+        self._finish_decoding(frame)
+        self.assertEqual(len(self._threads), 2)
+        self.assertIsNot(self._threads[-1], threading.current_thread())
+        self.assertEqual(frame._display_dpi, 192)
+
+    def test_variant_of_an_older_render_is_dropped(self):
+        frame = self._shown(_png(300, 200))
+        frame._wanted_dpi = 192
+
+        frame.add_variant(192, _png(600, 400))
+        frame.update_image(_png(120, 80))
+        self._finish_decoding(frame)
+
+        self.assertEqual(frame._variants, {})
+        self.assertEqual(frame._display_dpi, 96)
+        self.assertEqual(frame._display.size, (120, 80))
+
+    def test_variant_that_cannot_be_decoded(self):
+        frame = self._shown(_png(300, 200))
+        frame._wanted_dpi = 192
+
+        frame.add_variant(192, _png(600, 400)[:100])
+        self._finish_decoding(frame)
+
+        self.assertNotIn(192, frame._variant_data)
+        self.assertEqual(frame._display_dpi, 96)
+
+
+class FakePhotoImage:
+    """Stands in for ImageTk.PhotoImage, which needs a Tk interpreter"""
+
+    def __init__(self, image):
+        self._size = image.size
+        self.pastes = 0
+
+    def width(self):
+        return self._size[0]
+
+    def height(self):
+        return self._size[1]
+
+    def paste(self, image):
+        assert image.size == self._size
+        self.pastes += 1
+
+
+class DrawingTestCase(ViewTestCase):
+    """Shows a decoded diagram in a 400x300 view scrolled to ``self._view``"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch(
+            "wireviz_gui.app.ImageTk.PhotoImage", side_effect=FakePhotoImage
+        )
+        self._photo_image = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self._view = [0, 0]
+
+    def _shown(self, width=2000, height=1500):
+        frame = self._frame()
+        canvas = frame._canvas
+        canvas.winfo_width.return_value = 400
+        canvas.winfo_height.return_value = 300
+        canvas.canvasx.side_effect = lambda x: self._view[0] + x
+        canvas.canvasy.side_effect = lambda y: self._view[1] + y
+        canvas.create_image.return_value = "view item"
+        canvas.xview_moveto.side_effect = lambda f: self._move_to(canvas, 0, f)
+        canvas.yview_moveto.side_effect = lambda f: self._move_to(canvas, 1, f)
+
+        frame.update_image(_png(width, height))
+        self._finish_decoding(frame)
+        return frame
+
+    def _move_to(self, canvas, axis, fraction):
+        # as Tk does, keeping the view within the scroll region
+        size = canvas.configure.call_args.kwargs["scrollregion"][2 + axis]
+        view = (400, 300)[axis]
+        self._view[axis] = round(min(max(fraction * size, 0), max(size - view, 0)))
+
+    def _scroll(self, frame, x, y):
+        self._view = [x, y]
+        frame._draw_view()
+
+
+class TestViewImage(DrawingTestCase):
+    def test_one_image_across_zooms_and_scrolls(self):
+        frame = self._shown()
+        canvas = frame._canvas
+
+        for scale in (1.1, 1.21, 0.9, 2.5):
+            frame.set_scale(scale)
+            self._scroll(frame, 700, 500)
+            self._scroll(frame, 0, 0)
+
+        self._photo_image.assert_called_once()
+        canvas.create_image.assert_called_once()
+        deleted = {call.args[0] for call in canvas.delete.call_args_list}
+        self.assertEqual(deleted, {"status"})
+        # each zoom and scroll was drawn into the same image
+        self.assertEqual(frame._view_image.pastes, 12)
+
+        # only a new size of view needs a new image
+        canvas.winfo_width.return_value = 700
+        frame._draw_view()
+        self.assertEqual(self._photo_image.call_count, 2)
+        canvas.itemconfigure.assert_called_once_with(
+            "view item", image=frame._view_image
+        )
+        canvas.create_image.assert_called_once()
+
+    def test_scroll_within_the_margin_does_not_draw(self):
+        frame = self._shown()
+        canvas = frame._canvas
+        view_image = frame._view_image
+        pastes = view_image.pastes
+        canvas.coords.reset_mock()
+
+        self._scroll(frame, 200, 150)
+        self._scroll(frame, 256, 0)
+
+        self.assertEqual(view_image.pastes, pastes)
+        canvas.coords.assert_not_called()
+
+    def test_scroll_past_the_margin_draws(self):
+        frame = self._shown()
+        canvas = frame._canvas
+        view_image = frame._view_image
+        pastes = view_image.pastes
+
+        self._scroll(frame, 257, 0)
+
+        self.assertEqual(view_image.pastes, pastes + 1)
+        canvas.coords.assert_called_with("view item", 1, -256)
+        self.assertEqual(frame._drawn_box, (1, -256, 1 + 912, 556))
+
+
+class TestRefine(DrawingTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(
+            Image.Image, "resize", autospec=True, side_effect=Image.Image.resize
+        )
+        self._resize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _filters(self):
+        filters = {call.args[2] for call in self._resize.call_args_list}
+        self._resize.reset_mock()
+        return filters
+
+    def _zoom_in(self, frame):
+        frame._on_zoom(MagicMock(num=4, delta=0, x=200, y=150))
+
+    def test_preview_then_refine(self):
+        frame = self._shown()
+        self._resize.reset_mock()
+
+        self._zoom_in(frame)
+        frame.after_idle.assert_called_once_with(frame._draw_preview)
+        ms, refine = self._after[frame._refine_id]
+        self.assertEqual((ms, refine), (150, frame._refine))
+
+        frame._draw_preview()
+        self.assertEqual(self._filters(), {Image.Resampling.BILINEAR})
+        pastes = frame._view_image.pastes
+
+        refine()
+        self.assertEqual(self._filters(), {Image.Resampling.LANCZOS})
+        self.assertEqual(frame._view_image.pastes, pastes + 1)
+
+        # the refined drawing serves later requests
+        frame._draw_view()
+        self.assertEqual(frame._view_image.pastes, pastes + 1)
+
+    def test_further_zoom_cancels_the_refine(self):
+        frame = self._shown()
+
+        self._zoom_in(frame)
+        first = frame._refine_id
+        self._zoom_in(frame)
+
+        frame.after_cancel.assert_any_call(first)
+        self.assertNotEqual(frame._refine_id, first)
+        # the wheel events share one preview
+        frame.after_idle.assert_called_once()
+
+        frame._draw_preview()
+        pastes = frame._view_image.pastes
+        self._resize.reset_mock()
+
+        # Tk runs what was not cancelled
+        cancelled = {call.args[0] for call in frame.after_cancel.call_args_list}
+        for after_id, (_, func) in list(self._after.items()):
+            if after_id not in cancelled and func == frame._refine:
+                func()
+
+        self.assertEqual(frame._view_image.pastes, pastes + 1)
+        self.assertEqual(self._filters(), {Image.Resampling.LANCZOS})
+        self.assertAlmostEqual(frame._drawn_key[0][1], 1.21)
+
+
+class TestZoom(DrawingTestCase):
+    def _wheel(self, frame, clicks, x=200, y=150):
+        for _ in range(abs(clicks)):
+            frame._on_zoom(MagicMock(num=4 if clicks > 0 else 5, delta=0, x=x, y=y))
+
+    def test_zoom_is_clamped(self):
+        frame = self._shown()
+
+        self._wheel(frame, 40)
+        self.assertEqual(frame.scale, 20.0)
+        scheduled = len(self._after)
+        self._wheel(frame, 1)
+        self.assertEqual(frame.scale, 20.0)
+        self.assertEqual(len(self._after), scheduled)
+
+        self._wheel(frame, -80)
+        self.assertEqual(frame.scale, 0.05)
+
+    def test_point_under_the_cursor_stays(self):
+        frame = self._shown()
+        self._view = [500, 400]
+
+        # the cursor is over (600, 480) of the diagram at scale 1
+        self._wheel(frame, 1, x=100, y=80)
+        self.assertEqual(self._view, [560, 448])
+        self.assertAlmostEqual(frame._canvas.canvasx(100) / frame.scale, 600)
+        self.assertAlmostEqual(frame._canvas.canvasy(80) / frame.scale, 480)
+
+        self._wheel(frame, -1, x=100, y=80)
+        self.assertEqual(self._view, [500, 400])
+
+    def test_zoom_out_near_the_edge(self):
+        frame = self._shown()
+
+        # the diagram is smaller than the view at this scale
+        self._wheel(frame, -20)
+        self.assertEqual(self._view, [0, 0])
+
+    def test_coarser_levels_when_zoomed_out(self):
+        frame = self._shown()
+
+        # 1 / 1.1 ** 14 is just over a quarter of the finest level
+        self._wheel(frame, -14)
+        frame._draw_preview()
+        self.assertEqual({key[0] for key in frame._scaled_tiles}, {1})
+
+        self._wheel(frame, -1)
+        frame._draw_preview()
+        self.assertEqual({key[0] for key in frame._scaled_tiles}, {2})
+
+        self._wheel(frame, 15)
+        frame._draw_preview()
+        self.assertEqual({key[0] for key in frame._scaled_tiles}, {0})
+
+
+if __name__ == "__main__":
+    unittest.main()
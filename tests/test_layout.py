@@ -0,0 +1,183 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from graphviz import ExecutableNotFound
+
+from wireviz_gui import layout, render
+from wireviz_gui.layout import (
+    Cancellation,
+    PygraphvizLayout,
+    RenderCancelled,
+    SubprocessLayout,
+    get_layout_backend,
+    run_dot,
+    run_dot_formats,
+)
+
+# a stand-in for graphviz that takes far longer than any test should wait for
+_SLOW_DOT = f"""#!{sys.executable}
+import sys, time
+sys.stdin.read()
+time.sleep(30)
+"""
+
+
+@unittest.skipIf(sys.platform == "win32", "uses a shebang script as a fake dot")
+class TestRunDot(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        self._dot = Path(tmp.name) / "dot"
+        self._dot.write_text(_SLOW_DOT)
+        self._dot.chmod(0o755)
+
+        patcher = patch.object(layout, "DOT_BINARY", str(self._dot))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cancel_kills_running_process(self):
+        cancel = Cancellation()
+        threading.Timer(0.2, cancel.cancel).start()
+
+        start = time.monotonic()
+        with self.assertRaises(RenderCancelled):
+            run_dot("graph {}", "png", cancel=cancel)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_cancelled_before_start(self):
+        cancel = Cancellation()
+        cancel.cancel()
+        with self.assertRaises(RenderCancelled):
+            run_dot("graph {}", "png", cancel=cancel)
+
+    def test_missing_executable(self):
+        with patch.object(layout, "DOT_BINARY", os.fspath(self._dot) + "-missing"):
+            with self.assertRaises(ExecutableNotFound):
+                run_dot("graph {}", "png")
+
+
+# a stand-in for graphviz that writes the format name to each output file
+_FAKE_DOT = f"""#!{sys.executable}
+import sys
+sys.stdin.read()
+args = sys.argv[1:]
+with open(sys.argv[0] + ".runs", "a") as f:
+    f.write(" ".join(args) + "\\n")
+fmt = None
+for arg in args:
+    if arg.startswith("-T"):
+        fmt = arg[2:]
+    elif arg.startswith("-o"):
+        with open(arg[2:], "w") as f:
+            f.write(fmt)
+"""
+
+
+@unittest.skipIf(sys.platform == "win32", "uses a shebang script as a fake dot")
+class TestRenderFormats(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        self._dot = Path(tmp.name) / "dot"
+        self._dot.write_text(_FAKE_DOT)
+        self._dot.chmod(0o755)
+
+        patcher = patch.object(layout, "DOT_BINARY", str(self._dot))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _runs(self):
+        return Path(f"{self._dot}.runs").read_text().splitlines()
+
+    def test_one_process_for_all_formats(self):
+        outputs = SubprocessLayout().render_formats("graph {}", ["png", "svg"], dpi=144)
+
+        self.assertEqual(outputs, {"png": b"png", "svg": b"svg"})
+        self.assertEqual(len(self._runs()), 1)
+        self.assertIn("-Gdpi=144", self._runs()[0])
+
+    def test_writes_each_output(self):
+        out = Path(self._dot).parent
+        run_dot_formats("graph {}", {"svg": out / "a.svg", "png": out / "a.png"})
+
+        self.assertEqual((out / "a.svg").read_text(), "svg")
+        self.assertEqual((out / "a.png").read_text(), "png")
+
+
+class TestLayoutBackends(unittest.TestCase):
+    def test_falls_back_without_pygraphviz(self):
+        with patch.object(layout, "pygraphviz", None):
+            self.assertIsInstance(get_layout_backend("auto"), SubprocessLayout)
+            self.assertIsInstance(get_layout_backend("pygraphviz"), SubprocessLayout)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_layout_backend("neato")
+
+    def test_render_processes_start_with_the_same_backend(self):
+        with (
+            patch.object(render, "layout_name", "subprocess"),
+            patch("concurrent.futures.ProcessPoolExecutor") as mock_executor,
+        ):
+            render.process_pool(2)
+
+        kwargs = mock_executor.call_args.kwargs
+        self.assertEqual(kwargs["max_workers"], 2)
+        self.assertIs(kwargs["initializer"], render.set_layout_backend)
+        self.assertEqual(kwargs["initargs"], ("subprocess",))
+
+    def test_pygraphviz_renders_in_process(self):
+        fake = MagicMock()
+        fake.AGraph.return_value.draw.return_value = b"png"
+
+        with patch.object(layout, "pygraphviz", fake):
+            backend = get_layout_backend("auto")
+            self.assertIsInstance(backend, PygraphvizLayout)
+            self.assertEqual(backend.render("graph {}", "png"), b"png")
+
+        fake.AGraph.assert_called_with(string="graph {}")
+        fake.AGraph.return_value.layout.assert_called_with(prog="dot")
+        fake.AGraph.return_value.close.assert_called()
+
+    def test_concurrent_renders_run_dot(self):
+        with patch.object(layout, "pygraphviz", MagicMock()):
+            backend = get_layout_backend("auto", concurrent=True)
+            self.assertIsInstance(backend, SubprocessLayout)
+
+            # unless asked for
+            backend = get_layout_backend("pygraphviz", concurrent=True)
+            self.assertIsInstance(backend, PygraphvizLayout)
+
+    def test_pygraphviz_failure_runs_dot(self):
+        fake = MagicMock()
+        fake.AGraph.side_effect = RuntimeError("libgvc blew up")
+
+        with (
+            patch.object(layout, "pygraphviz", fake),
+            patch.object(layout, "run_dot", return_value=b"dot") as mock_run_dot,
+        ):
+            self.assertEqual(PygraphvizLayout().render("graph {}", "svg"), b"dot")
+
+        mock_run_dot.assert_called_once()
+
+    def test_pygraphviz_lays_out_once_for_all_formats(self):
+        fake = MagicMock()
+        fake.AGraph.return_value.draw.side_effect = lambda format: format.encode()
+
+        with patch.object(layout, "pygraphviz", fake):
+            outputs = PygraphvizLayout().render_formats("graph {}", ["png", "svg"])
+
+        self.assertEqual(outputs, {"png": b"png", "svg": b"svg"})
+        fake.AGraph.return_value.layout.assert_called_once_with(prog="dot")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from wireviz_gui.app import TextEntryFrame
+
+
+class TestLivePreview(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("wireviz_gui.app.tk.Text")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _frame(self):
+        frame = TextEntryFrame(MagicMock(), live_preview=True, idle_ms=250)
+        frame.after = MagicMock(return_value="idle-id")
+        frame.after_cancel = MagicMock()
+        frame._text.edit_modified.return_value = True
+        return frame
+
+    def test_render_waits_for_the_last_edit(self):
+        frame = self._frame()
+
+        frame._on_modified(None)
+        frame._on_modified(None)
+
+        frame.after_cancel.assert_called_once_with("idle-id")
+        self.assertEqual(frame.after.call_count, 2)
+        frame.after.assert_called_with(250, frame._on_idle)
+
+    def test_closing_cancels_the_pending_render(self):
+        frame = self._frame()
+        callback = MagicMock()
+        frame.associate_callback(callback)
+        frame._on_modified(None)
+
+        with patch("wireviz_gui.app.BaseFrame.destroy") as destroy:
+            frame.destroy()
+
+        frame.after_cancel.assert_called_once_with("idle-id")
+        destroy.assert_called_once()
+        self.assertIsNone(frame._idle_id)
+        callback.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
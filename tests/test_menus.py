@@ -149,6 +149,73 @@ class TestMenuStructure(unittest.TestCase):
                 if method == "add_command"
             ]
             self.assertIn("New (CTRL+N)", labels)
+            self.assertNotIn("Open Files...", labels)
+
+    def test_open_many(self):
+        with patch.dict(sys.modules, {"tkinter": FakeTkModule}):
+            from wireviz_gui.menus import FileMenu
+
+            callbacks = {
+                name: MagicMock()
+                for name in (
+                    "open_file",
+                    "save",
+                    "save_as",
+                    "save_graph_image",
+                    "export_all",
+                    "refresh",
+                    "reload_file",
+                    "open_files",
+                    "open_folder",
+                )
+            }
+
+            menu = FileMenu(MagicMock(), **callbacks)
+
+            commands = {
+                kwargs.get("label"): kwargs.get("command")
+                for method, kwargs in menu.calls
+                if method == "add_command"
+            }
+            commands["Open Files..."]()
+            commands["Open Folder..."]()
+
+            callbacks["open_files"].assert_called_once()
+            callbacks["open_folder"].assert_called_once()
+
+    def test_export_tabs(self):
+        with patch.dict(sys.modules, {"tkinter": FakeTkModule}):
+            from wireviz_gui.menus import FileMenu
+
+            callbacks = {
+                name: MagicMock()
+                for name in (
+                    "open_file",
+                    "save",
+                    "save_as",
+                    "save_graph_image",
+                    "export_all",
+                    "refresh",
+                    "reload_file",
+                    "export_tabs",
+                )
+            }
+
+            menu = FileMenu(MagicMock(), **callbacks)
+
+            export_menu = next(
+                kwargs["menu"]
+                for method, kwargs in menu.calls
+                if method == "add_cascade" and kwargs.get("label") == "Export"
+            )
+            commands = {
+                kwargs.get("label"): kwargs.get("command")
+                for method, kwargs in export_menu.calls
+                if method == "add_command"
+            }
+            commands["All Formats of Several Tabs..."]()
+
+            callbacks["export_tabs"].assert_called_once()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+import gc
+import threading
+import time
+import unittest
+
+import yaml
+
+from wireviz_gui.normalize import preprocess_yaml_data
+
+
+def _harness(n: int) -> dict:
+    """A harness with ``n`` connections, a quarter of them star topologies"""
+    connections = []
+    for i in range(n):
+        if i % 4 == 0:
+            connections.append({f"X{i % 50}.1": [{f"W{i % 30}": 1}, f"Y{i % 50}.2"]})
+        else:
+            connections.append([f"X{i % 50}.{i % 4 + 1}", {f"W{i % 30}": 1}, "Y1.1"])
+
+    return {
+        "connectors": {f"{c}{j}": {"pincount": 4} for c in "XY" for j in range(50)},
+        "cables": {f"W{j}": {"wirecount": 3, "label": "L"} for j in range(30)},
+        "connections": connections,
+    }
+
+
+class TestPreprocess(unittest.TestCase):
+    def test_cable_labels_move_to_notes(self):
+        data = preprocess_yaml_data(
+            {"cables": {"W1": {"label": "a"}, "W2": {"label": "b", "notes": "n"}}}
+        )
+        self.assertEqual(
+            data["cables"], {"W1": {"notes": "a"}, "W2": {"notes": "n\nb"}}
+        )
+
+    def test_connector_pin_syntax(self):
+        data = preprocess_yaml_data(
+            {
+                "connectors": {"X1": {}, "X2": {}},
+                "connections": [["X1.1", {"W1": 1}, "X2.1", "Z.1", "X1.2.3", 4]],
+            }
+        )
+        self.assertEqual(
+            data["connections"],
+            [[{"X1": "1"}, {"W1": 1}, {"X2": "1"}, "Z.1", "X1.2.3", 4]],
+        )
+
+    def test_star_topology_is_flattened(self):
+        data = preprocess_yaml_data(
+            {
+                "connectors": {"X1": {}, "X2": {}},
+                "connections": [
+                    ["X1", "X2"],
+                    {"X1.1": [{"W1": 1}, "X2.2", {}]},
+                    {},
+                    {"X1": "X2"},
+                ],
+            }
+        )
+        self.assertEqual(
+            data["connections"],
+            [
+                ["X1", "X2"],
+                [{"X1": "1"}, 1, "W1"],
+                [{"X1": "1"}, {"X2": "2"}],
+                [{"X1": "1"}],
+                ["X1", "X2"],
+            ],
+        )
+
+        # wireviz may modify each node, so none may be shared
+        connections = data["connections"]
+        self.assertIsNot(connections[1][0], connections[2][0])
+
+    def test_aliased_connections(self):
+        text = """
+connectors: {X1: {}, X2: {}}
+connections:
+  - &c [X1.1, W1: 1, X2.1]
+  - *c
+"""
+        connections = preprocess_yaml_data(yaml.safe_load(text))["connections"]
+
+        expected = [{"X1": "1"}, {"W1": 1}, {"X2": "1"}]
+        self.assertEqual(connections, [expected, expected])
+        self.assertIsNot(connections[0][0], connections[1][0])
+
+    def test_anything_else_is_left_alone(self):
+        self.assertEqual(preprocess_yaml_data(["a"]), ["a"])
+        self.assertEqual(
+            preprocess_yaml_data({"connections": None}), {"connections": None}
+        )
+        self.assertEqual(
+            preprocess_yaml_data({"connections": ["X1.1", None]}),
+            {"connections": ["X1.1", None]},
+        )
+
+    def test_connectors_changed_between_calls(self):
+        def connections(designators):
+            data = {
+                "connectors": {d: {} for d in designators},
+                "connections": [["X1.1", "X2.1"], {"X2.2": ["X1.2"]}],
+            }
+            return preprocess_yaml_data(data)["connections"]
+
+        self.assertEqual(
+            connections(["X1", "X2"]),
+            [[{"X1": "1"}, {"X2": "1"}], [{"X2": "2"}, {"X1": "2"}]],
+        )
+        self.assertEqual(
+            connections(["X2"]), [["X1.1", {"X2": "1"}], [{"X2": "2"}, "X1.2"]]
+        )
+        self.assertEqual(
+            connections(["X1", "X2"]),
+            [[{"X1": "1"}, {"X2": "1"}], [{"X2": "2"}, {"X1": "2"}]],
+        )
+
+    def test_threads_with_different_connectors(self):
+        designators = [["X1"], ["X2"], ["X1", "X2"], []]
+        wrong = []
+
+        def run(known):
+            expected = [{d: "1"} if d in known else f"{d}.1" for d in ("X1", "X2")]
+            for _ in range(200):
+                data = {
+                    "connectors": {d: {} for d in known},
+                    "connections": [["X1.1", "X2.1"], {"X1.1": ["X2.1"]}],
+                }
+                connections = preprocess_yaml_data(data)["connections"]
+                if connections != [expected, expected]:
+                    wrong.append((known, connections))
+
+        threads = [threading.Thread(target=run, args=(d,)) for d in designators]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(wrong, [])
+
+    def test_nodes_are_not_shared_between_calls(self):
+        def first_node():
+            data = {"connectors": {"X1": {}}, "connections": [["X1.1"]]}
+            return preprocess_yaml_data(data)["connections"][0][0]
+
+        node = first_node()
+        node["X1"] = "changed"
+        self.assertEqual(first_node(), {"X1": "1"})
+
+    def test_time_grows_linearly(self):
+        def best_time(n):
+            best = float("inf")
+            for _ in range(3):
+                data = _harness(n)
+                # collections depend on everything else the run left alive
+                gc.disable()
+                try:
+                    start = time.perf_counter()
+                    preprocess_yaml_data(data)
+                    best = min(best, time.perf_counter() - start)
+                finally:
+                    gc.enable()
+            return best
+
+        small = best_time(10_000)
+        large = best_time(100_000)
+
+        # ten times the connections; allow plenty for noise, but nowhere near
+        # the hundredfold of quadratic behaviour
+        self.assertLess(large, small * 25, f"{small:.3f}s, then {large:.3f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
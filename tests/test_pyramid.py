@@ -0,0 +1,106 @@
+import unittest
+
+from PIL import Image
+
+from wireviz_gui.pyramid import ImageBudget, ImagePyramid
+
+
+def _pyramid(width, height, tile_size=256):
+    pyramid = ImagePyramid(Image.new("RGB", (width, height)), tile_size=tile_size)
+    pyramid.build()
+    return pyramid
+
+
+class TestImagePyramid(unittest.TestCase):
+    def test_levels_halve_down_to_a_tile(self):
+        pyramid = _pyramid(2000, 1000)
+
+        self.assertTrue(pyramid.ready)
+        self.assertEqual(pyramid.level_for(1.0), 0)
+        self.assertEqual(pyramid.level_for(0.5), 1)
+        self.assertEqual(pyramid.level_for(0.3), 1)
+        self.assertEqual(pyramid.level_for(0.25), 2)
+        # 2000 -> 1000 -> 500 -> 250, and no further
+        self.assertEqual(pyramid.level_for(0.01), 3)
+
+    def test_finest_level_until_built(self):
+        pyramid = ImagePyramid(Image.new("RGB", (2000, 1000)))
+        self.assertFalse(pyramid.ready)
+        self.assertEqual(pyramid.level_for(0.1), 0)
+
+    def test_only_visible_tiles_are_placed(self):
+        pyramid = _pyramid(2560, 2560)
+
+        placements = pyramid.visible_tiles(1.0, (300, 300, 700, 600))
+        self.assertEqual(
+            {(p.col, p.row) for p in placements}, {(1, 1), (2, 1), (1, 2), (2, 2)}
+        )
+
+    def test_tiles_cover_the_view_without_gaps(self):
+        pyramid = _pyramid(1000, 700)
+        scale = 0.37
+        width, height = round(1000 * scale), round(700 * scale)
+
+        placements = pyramid.visible_tiles(scale, (0, 0, width, height))
+        self.assertTrue(all(p.level == 1 for p in placements))
+
+        columns = sorted({(p.x, p.width) for p in placements})
+        for (x, w), (next_x, _) in zip(columns, columns[1:]):
+            self.assertEqual(x + w, next_x)
+        self.assertEqual(columns[0][0], 0)
+        self.assertEqual(sum(w for _, w in columns), width)
+
+    def test_tiles_are_cropped_at_the_edges(self):
+        pyramid = _pyramid(300, 300)
+        self.assertEqual(pyramid.tile(0, 0, 0).size, (256, 256))
+        self.assertEqual(pyramid.tile(0, 1, 1).size, (44, 44))
+
+
+class _View:
+    def __init__(self, budget, visible=False):
+        self.budget = budget
+        self.visible = visible
+        self.released = False
+
+    def release_images(self):
+        self.released = True
+        self.budget.release(self)
+
+
+class TestImageBudget(unittest.TestCase):
+    def test_least_recently_used_hidden_views_are_freed(self):
+        budget = ImageBudget(max_bytes=100)
+        first, second, third = (_View(budget) for _ in range(3))
+
+        budget.charge(first, 40)
+        budget.charge(second, 40)
+        budget.touch(first)
+        budget.charge(third, 40)
+
+        self.assertTrue(second.released)
+        self.assertFalse(first.released)
+        self.assertNotIn(second, budget)
+        self.assertEqual(budget.total, 80)
+
+    def test_visible_views_are_kept(self):
+        budget = ImageBudget(max_bytes=100)
+        shown, hidden = _View(budget, visible=True), _View(budget)
+
+        budget.charge(shown, 80)
+        budget.charge(hidden, 80)
+
+        self.assertFalse(shown.released)
+        self.assertTrue(hidden.released)
+
+        # once another tab is selected, the formerly shown view can be freed
+        shown.visible = False
+        budget.charge(_View(budget, visible=True), 80)
+        self.assertTrue(shown.released)
+
+    def test_estimated_bytes(self):
+        pyramid = ImagePyramid(Image.new("RGBA", (300, 300)))
+        self.assertEqual(pyramid.estimated_bytes, 300 * 300 * 4 * 8 // 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
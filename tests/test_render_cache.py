@@ -0,0 +1,268 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+from render_fakes import fake_graphviz
+from wireviz.wireviz import parse
+
+from wireviz_gui import render
+from wireviz_gui.cache import LRUCache, canonical_hash
+from wireviz_gui.layout import Cancellation, RenderCancelled
+
+_YAML = """
+connectors:
+  X1:
+    pincount: 2
+  X2:
+    pincount: 2
+cables:
+  W1:
+    wirecount: 2
+connections:
+  - [X1.1, W1: 1, X2.1]
+"""
+
+_REORDERED_YAML = """
+# same harness, different key order and comments
+cables:
+  W1: {wirecount: 2}
+connectors:
+  X2: {pincount: 2}
+  X1: {pincount: 2}
+connections:
+  - [X1.1, W1: 1, X2.1]
+"""
+
+
+class TestCanonicalHash(unittest.TestCase):
+    def test_key_order_and_comments_are_ignored(self):
+        self.assertEqual(
+            canonical_hash(yaml.safe_load(_YAML)),
+            canonical_hash(yaml.safe_load(_REORDERED_YAML)),
+        )
+
+    def test_key_types_are_distinguished(self):
+        self.assertNotEqual(canonical_hash({1: "a"}), canonical_hash({"1": "a"}))
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_byte_budget_evicts_oldest(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put("a", "A", 40)
+        cache.put("b", "B", 40)
+        cache.get("a")  # "a" is now the most recently used
+        cache.put("c", "C", 40)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["bytes"], 80)
+
+    def test_oversized_entries_are_not_stored(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", "A", 11)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+class TestRenderPipelineCache(unittest.TestCase):
+    def setUp(self):
+        fake_graphviz(self, render)
+
+    def test_hit_skips_wireviz_and_graphviz(self):
+        with patch.object(render, "parse", wraps=parse) as mock_parse:
+            png_data, source = render.render_yaml(_YAML)
+            cached_png, cached_source = render.render_yaml(_REORDERED_YAML)
+
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(render.layout_backend.render.call_count, 1)
+        self.assertEqual(cached_png, png_data)
+        self.assertIs(cached_source, source)
+        self.assertEqual(set(cached_source.harness.connectors), {"X1", "X2"})
+
+    def test_unchanged_dot_source_skips_graphviz(self):
+        render.render_yaml(_YAML)
+        # the metadata is not drawn, so the DOT source does not change
+        render.render_yaml(_YAML + "metadata:\n  author: someone\n")
+
+        self.assertEqual(len(render.source_cache), 2)
+        self.assertEqual(render.layout_backend.render.call_count, 1)
+
+    def test_resolutions_are_cached_separately(self):
+        _, source = render.render_yaml(_YAML)
+        render.render_dpi((source, 192))
+        render.render_dpi((source, 192))
+
+        calls = render.layout_backend.render.call_args_list
+        self.assertEqual([call.kwargs["dpi"] for call in calls], [None, 192])
+
+
+class ExportTestCase(unittest.TestCase):
+    """Exports to a temporary directory, with graphviz stood in for"""
+
+    def setUp(self):
+        fake_graphviz(self, render)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._path = Path(tmp.name) / "harness.yaml"
+
+
+class TestDocument(ExportTestCase):
+    def test_parsed_and_built_once(self):
+        document = render.Document(_YAML)
+        with (
+            patch.object(render.yaml, "load", wraps=yaml.load) as mock_load,
+            patch.object(render, "parse", wraps=parse) as mock_parse,
+        ):
+            _, source = render.render_yaml(document)
+            self.assertIs(document.source(), source)
+            self.assertEqual(document.input_hash, source.input_hash)
+            render.export_document(document, self._path, ("tsv",))
+
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(document.tree()["connectors"]["X1"], {"pincount": 2})
+
+    def test_export_matches_export_of_text(self):
+        render.export_document(render.Document(_YAML), self._path, ("tsv",))
+        self.assertFalse(render.export_yaml(_YAML, self._path, ("tsv",)))
+
+    def test_source_built_elsewhere(self):
+        _, source = render.render_yaml(_YAML)
+
+        document = render.Document(_YAML)
+        document.set_source(source)
+        with patch.object(render.yaml, "load") as mock_load:
+            self.assertIs(document.source(), source)
+            self.assertEqual(document.input_hash, source.input_hash)
+        mock_load.assert_not_called()
+
+    def test_editable_tree_is_a_copy(self):
+        document = render.Document(_YAML)
+        tree = document.editable_tree()
+        tree["connectors"]["X1"]["pincount"] = 3
+
+        self.assertEqual(document.tree()["connectors"]["X1"], {"pincount": 2})
+
+    def test_errors_are_raised_every_time(self):
+        document = render.Document("connectors: [")
+        for _ in range(2):
+            with self.assertRaises(yaml.YAMLError):
+                document.source()
+        with self.assertRaises(yaml.YAMLError):
+            document.tree()
+
+        # WireViz rejects a bad harness with a bare Exception
+        document = render.Document("connections:\n  - [X9.1, X8.1]\n")
+        for _ in range(2):
+            with self.assertRaisesRegex(Exception, "redefine 1 from X9 to X8"):
+                document.source()
+
+    def test_values_that_cannot_be_loaded(self):
+        # valid YAML, but there is no 13th month
+        document = render.Document("date: 2020-13-45\n")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                document.tree()
+        with self.assertRaises(ValueError):
+            document.editable_tree()
+        with self.assertRaises(ValueError):
+            document.source()
+
+    def test_untitled_harnesses(self):
+        _, source = render.render_yaml(_YAML)
+        self.assertFalse(source.titled)
+
+        _, source = render.render_yaml(_YAML + "metadata:\n  title: T\n")
+        self.assertTrue(source.titled)
+
+
+class TestExport(ExportTestCase):
+    def test_lays_out_once_for_all_formats(self):
+        steps = []
+        render.export_yaml(
+            _YAML,
+            self._path,
+            ("png", "svg", "tsv"),
+            progress=lambda *step: steps.append(step),
+        )
+
+        render.layout_backend.render_formats.assert_called_once()
+        render.layout_backend.render.assert_not_called()
+        self.assertEqual(self._path.with_suffix(".png").read_bytes(), b"png")
+        self.assertIn("svg", self._path.with_suffix(".svg").read_text())
+        self.assertIn("W1", self._path.with_suffix(".bom.tsv").read_text())
+
+        # building, laying out and three files
+        self.assertEqual(steps[-1], (5, 5, "done"))
+        self.assertEqual([done for done, _, _ in steps], list(range(6)))
+
+    def test_cached_formats_are_not_laid_out_again(self):
+        render.export_yaml(_YAML, self._path, ("png", "svg"))
+        render.export_yaml(_YAML, self._path, ("png", "svg"))
+
+        render.layout_backend.render_formats.assert_called_once()
+
+    def test_unchanged_exports_are_skipped(self):
+        self.assertTrue(render.export_yaml(_YAML, self._path, ("tsv",)))
+        tsv = self._path.with_suffix(".bom.tsv")
+        written = tsv.stat().st_mtime_ns
+
+        # the same harness, in another order
+        self.assertFalse(render.export_yaml(_REORDERED_YAML, self._path, ("tsv",)))
+        self.assertEqual(tsv.stat().st_mtime_ns, written)
+
+        self.assertTrue(render.export_yaml(_YAML, self._path, ("tsv",), force=True))
+
+    def test_changed_inputs_outputs_and_formats_are_exported(self):
+        render.export_yaml(_YAML, self._path, ("tsv",))
+
+        changed = _YAML.replace("wirecount: 2", "wirecount: 3")
+        self.assertTrue(render.export_yaml(changed, self._path, ("tsv",)))
+
+        self._path.with_suffix(".bom.tsv").write_text("edited by hand")
+        self.assertTrue(render.export_yaml(changed, self._path, ("tsv",)))
+
+        self.assertTrue(render.export_yaml(changed, self._path, ("tsv", "png")))
+        self.assertFalse(render.export_yaml(changed, self._path, ("png",)))
+
+    def test_new_tools_are_exported(self):
+        render.export_yaml(_YAML, self._path, ("tsv",))
+        with patch.object(render, "current_tools", return_value="graphviz 99"):
+            self.assertTrue(render.export_yaml(_YAML, self._path, ("tsv",)))
+
+    def test_cancel(self):
+        cancel = Cancellation()
+        cancel.cancel()
+        with self.assertRaises(RenderCancelled):
+            render.export_yaml(_YAML, self._path, ("tsv",), cancel=cancel)
+
+        self.assertFalse(self._path.with_suffix(".bom.tsv").exists())
+
+
+class TestZoomDpi(unittest.TestCase):
+    def test_default_resolution_when_not_zoomed_in(self):
+        self.assertEqual(render.zoom_dpi(1.0, (800, 600)), render.DEFAULT_DPI)
+        self.assertEqual(render.zoom_dpi(0.5, (800, 600)), render.DEFAULT_DPI)
+
+    def test_rounds_up_to_a_step(self):
+        self.assertEqual(render.zoom_dpi(1.1, (800, 600)), 144)
+        self.assertEqual(render.zoom_dpi(2.0, (800, 600)), 192)
+
+    def test_pixel_budget(self):
+        # 4x the default resolution would be 16x the pixels
+        self.assertEqual(render.zoom_dpi(4.0, (1000, 1000), max_pixels=4e6), 192)
+        self.assertEqual(
+            render.zoom_dpi(4.0, (1000, 1000), max_pixels=1e6), render.DEFAULT_DPI
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
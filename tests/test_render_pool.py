@@ -0,0 +1,77 @@
+import importlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from render_fakes import fake_graphviz
+from yaml import YAMLError
+
+_YAML = """
+connectors:
+  X{n}:
+    pincount: 2
+  Y{n}:
+    pincount: 2
+cables:
+  W{n}:
+    wirecount: 2
+connections:
+  - [X{n}.1, W{n}: 1, Y{n}.1]
+"""
+
+
+class TestRenderPool(unittest.TestCase):
+    def setUp(self):
+        # imported here since other tests purge wireviz_gui from sys.modules,
+        # and the pool pickles its worker function by module name
+        pool = importlib.import_module("wireviz_gui.pool")
+        render = importlib.import_module("wireviz_gui.render")
+        self._layout = importlib.import_module("wireviz_gui.layout")
+
+        self._pool = pool.RenderPool(workers=2)
+        self.addCleanup(self._pool.shutdown)
+
+        fake_graphviz(self, render)
+
+    def test_renders_in_worker_processes(self):
+        futures = [self._pool.submit(_YAML.format(n=n)) for n in range(4)]
+        sources = [future.result(timeout=60) for future in futures]
+
+        for n, source in enumerate(sources):
+            self.assertEqual(set(source.harness.connectors), {f"X{n}", f"Y{n}"})
+            self.assertIn(f"W{n}", source.dot_source)
+
+        png_data, source = self._pool.render(_YAML.format(n=0))
+        self.assertEqual(png_data, b"png")
+        self.assertEqual(set(source.harness.cables), {"W0"})
+
+    def test_errors_are_raised_in_the_caller(self):
+        with self.assertRaises(YAMLError):
+            self._pool.render("connectors: [")
+
+    def test_exports_in_worker_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [Path(tmp) / f"tab{n}.yaml" for n in range(3)]
+            futures = [
+                # the bill of materials does not need graphviz
+                self._pool.submit_export(_YAML.format(n=n), path, ("tsv",))
+                for n, path in enumerate(paths)
+            ]
+            futures.append(self._pool.submit_export("connectors: [", paths[0]))
+
+            results = [future.result(timeout=60) for future in futures]
+
+            self.assertTrue(all(result.ok for result in results[:3]))
+            self.assertFalse(results[3].ok)
+            for n, path in enumerate(paths):
+                self.assertIn(f"W{n}", path.with_suffix(".bom.tsv").read_text())
+
+    def test_cancelled_wait(self):
+        cancel = self._layout.Cancellation()
+        cancel.cancel()
+        with self.assertRaises(self._layout.RenderCancelled):
+            self._pool.render(_YAML.format(n=9), cancel=cancel)
+
+
+if __name__ == "__main__":
+    unittest.main()
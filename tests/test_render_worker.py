@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from wireviz_gui.render import RenderWorker
+
+
+def _wait_for(worker, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = worker.poll()
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("render worker did not deliver a result")
+
+
+class TestRenderWorker(unittest.TestCase):
+    def test_result_is_delivered(self):
+        worker = RenderWorker(render_func=lambda text, cancel: (text.encode(), text))
+
+        revision = worker.submit("connectors: {}")
+        self.assertTrue(worker.busy)
+
+        result = _wait_for(worker)
+        self.assertEqual(result.revision, revision)
+        self.assertEqual(result.png_data, b"connectors: {}")
+        self.assertIsNone(result.error)
+        self.assertFalse(worker.busy)
+        worker.stop()
+
+    def test_errors_are_returned_not_raised(self):
+        def render(_, cancel):
+            raise ValueError("bad harness")
+
+        worker = RenderWorker(render_func=render)
+        worker.submit("x")
+
+        result = _wait_for(worker)
+        self.assertIsInstance(result.error, ValueError)
+        worker.stop()
+
+    def test_stale_results_are_dropped(self):
+        release = threading.Event()
+        rendered = []
+
+        def render(text, cancel):
+            if text == "first":
+                release.wait(5)
+            rendered.append(text)
+            return text.encode(), None
+
+        worker = RenderWorker(render_func=render)
+        worker.submit("first")
+        time.sleep(0.05)  # let the worker pick up the first request
+
+        worker.submit("second")
+        newest = worker.submit("third")
+        release.set()
+
+        result = _wait_for(worker)
+        self.assertEqual(result.revision, newest)
+        self.assertEqual(result.png_data, b"third")
+
+        # "second" was superseded before the worker got to it
+        self.assertNotIn("second", rendered)
+        worker.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,559 @@
+import concurrent.futures
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from graphviz import ExecutableNotFound
+
+from wireviz_gui import app
+from wireviz_gui.app import Application, HibernatedTab, InputOutputFrame, TabRecord
+from wireviz_gui.layout import RenderCancelled
+from wireviz_gui.render import output_cache
+from wireviz_gui.watch import content_hash
+
+_YAML = "connectors:\n  X1:\n    pincount: 2\n"
+
+
+def _application(frames, active, max_live_tabs):
+    """An Application without any widgets, holding ``frames`` as its tabs"""
+    application = Application.__new__(Application)
+    application._logger = logging.getLogger("TestApplication")
+    application._notebook = MagicMock()
+    application._notebook.tab.side_effect = lambda frame, option: frame.title
+    application._tab_lru = list(frames)
+    application._max_live_tabs = max_live_tabs
+    application._prerender = False
+    application._prerender_id = None
+    application._prerender_ms = 200
+    application.get_active_frame = lambda: active
+    return application
+
+
+def _tab(title):
+    frame = MagicMock(spec=InputOutputFrame)
+    frame.title = title
+    frame.snapshot.side_effect = lambda t: TabRecord(t, f"text of {t}")
+    return frame
+
+
+class TestHibernation(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(app, "HibernatedTab")
+        self._placeholder = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_are_hibernated(self):
+        a, b, c, d = (_tab(title) for title in "abcd")
+        application = _application([a, b, c, d], active=b, max_live_tabs=2)
+
+        application._hibernate_tabs()
+
+        # "b" is older than "c", but it is the tab being looked at
+        self.assertEqual(application._tab_lru, [b, d])
+        for frame in (a, c):
+            frame.destroy.assert_called_once()
+        for frame in (b, d):
+            frame.destroy.assert_not_called()
+
+        records = [call.args[1] for call in self._placeholder.call_args_list]
+        self.assertEqual([record.title for record in records], ["a", "c"])
+        self.assertEqual(records[0].text, "text of a")
+
+        inserted = application._notebook.insert.call_args_list
+        self.assertEqual([call.args[0] for call in inserted], [a, c])
+        self.assertEqual(inserted[0].kwargs, {"text": "a"})
+
+    def test_nothing_hibernated_within_the_limit(self):
+        a, b = _tab("a"), _tab("b")
+        application = _application([a, b], active=a, max_live_tabs=2)
+
+        application._hibernate_tabs()
+
+        self.assertEqual(application._tab_lru, [a, b])
+        self._placeholder.assert_not_called()
+        a.destroy.assert_not_called()
+        b.destroy.assert_not_called()
+
+
+class TestWaking(unittest.TestCase):
+    def test_selecting_a_hibernated_tab_rebuilds_it(self):
+        record = TabRecord("b", _YAML, cursor="2.3")
+        placeholder = HibernatedTab.__new__(HibernatedTab)
+        placeholder.record = record
+        placeholder.destroy = MagicMock()
+
+        a = _tab("a")
+        application = _application([a], active=placeholder, max_live_tabs=2)
+        rebuilt = _tab("b")
+        application._create_frame = MagicMock(return_value=rebuilt)
+
+        application._on_tab_changed(None)
+
+        rebuilt.restore.assert_called_once_with(record)
+        application._notebook.insert.assert_called_once_with(
+            placeholder, rebuilt, text="b"
+        )
+        application._notebook.select.assert_called_once_with(rebuilt)
+        placeholder.destroy.assert_called_once()
+        self.assertEqual(application._tab_lru, [a, rebuilt])
+
+
+class HeldExecutor:
+    """Takes tasks without running them, until :meth:`run` is called"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, func, *args, **kwargs):
+        future = concurrent.futures.Future()
+        self.tasks.append((future, func, args, kwargs))
+        return future
+
+    def run(self, index):
+        future, func, args, kwargs = self.tasks[index]
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    def run_all(self):
+        for index, (future, *_) in enumerate(self.tasks):
+            if not future.done():
+                self.run(index)
+
+
+class TestOpenPaths(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._root = Path(tmp.name)
+
+        for patcher in (
+            patch.object(app, "ToplevelBase"),
+            patch.object(app, "ProgressFrame"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "HibernatedTab")
+        self._placeholder = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "showerror")
+        self._showerror = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self._executor = HeldExecutor()
+        application = _application([], active=None, max_live_tabs=1)
+        application._get_executor = lambda: self._executor
+        application._render_func = MagicMock()
+        application.after = MagicMock()
+        application._create_frame = MagicMock(side_effect=MagicMock)
+        self._application = application
+
+    def _files(self, *names):
+        paths = []
+        for name in names:
+            path = self._root / name
+            path.write_text(f"# {name}\n" + _YAML)
+            paths.append(path)
+        return paths
+
+    def _poll(self):
+        # as the Tk main loop would, once the time given to after() is up
+        args = self._application.after.call_args.args
+        self._application.after.reset_mock()
+        args[1](*args[2:])
+
+    def _open_all(self, paths):
+        self._application.open_paths(paths)
+        self._executor.run_all()
+        self._poll()
+
+        # the renders of the tabs were submitted as they opened
+        self._executor.run_all()
+        self._poll()
+        self._application.after.assert_not_called()
+
+    def _titles(self):
+        return [
+            c.kwargs["text"] for c in self._application._notebook.add.call_args_list
+        ]
+
+    def test_tabs_open_in_order(self):
+        paths = self._files("a.yaml", "b.yaml", "c.yaml")
+
+        self._application.open_paths(paths)
+        self.assertEqual(self._titles(), [])
+
+        # a later file read first waits for the ones before it
+        self._executor.run(2)
+        self._executor.run(1)
+        self._poll()
+        self.assertEqual(self._titles(), [])
+
+        self._executor.run(0)
+        self._poll()
+        self.assertEqual(self._titles(), ["a.yaml", "b.yaml", "c.yaml"])
+
+        self._executor.run_all()
+        self._poll()
+        self._application.after.assert_not_called()
+        self.assertEqual(self._application._render_func.call_count, 3)
+
+    def test_all_but_the_selected_tab_hibernate(self):
+        paths = self._files("a.yaml", "b.yaml", "c.yaml")
+
+        self._open_all(paths)
+
+        records = [c.args[1] for c in self._placeholder.call_args_list]
+        self.assertEqual([r.title for r in records], ["a.yaml", "b.yaml"])
+        self.assertEqual(records[0].file_path, str(paths[0]))
+        self.assertTrue(records[0].text.startswith("# a.yaml"))
+
+        # only the last file, which is selected, gets a live tab
+        self._application._create_frame.assert_called_once()
+        frame = self._application._tab_lru[0]
+        self.assertEqual(self._application._tab_lru, [frame])
+        self._application._notebook.select.assert_called_once_with(frame)
+        frame.track_file.assert_called_once_with(str(paths[2]), paths[2].read_text())
+
+    def test_read_errors_are_listed(self):
+        good, bad = self._files("good.yaml", "bad.yaml")
+        bad.write_bytes(b"\xff\xfe not utf-8")
+        missing = self._root / "missing.yaml"
+
+        self._open_all([missing, good, bad])
+
+        self.assertEqual(self._titles(), ["good.yaml"])
+        self._showerror.assert_called_once()
+        message = self._showerror.call_args.args[1]
+        self.assertIn("missing.yaml:", message)
+        self.assertIn("bad.yaml:", message)
+        self.assertNotIn("good.yaml", message)
+
+
+class FrameTestCase(unittest.TestCase):
+    """Builds InputOutputFrames with their child widgets mocked out"""
+
+    def setUp(self):
+        output_cache.clear()
+
+        for patcher in (
+            patch.object(InputOutputFrame, "grid"),
+            patch.object(app, "ButtonFrame"),
+            patch.object(app, "StructureViewFrame"),
+            patch.object(app, "TextEntryFrame"),
+            patch.object(app, "HarnessViewFrame"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _frame(self, text=""):
+        frame = InputOutputFrame(MagicMock())
+        frame._render_worker = MagicMock()
+
+        text_entry = frame._text_entry_frame
+        text_entry.get.return_value = text
+        text_entry.get_text.return_value = text
+        text_entry.get_cursor.return_value = "1.0"
+        return frame
+
+
+class TestSnapshot(FrameTestCase):
+    def test_round_trip(self):
+        frame = self._frame(_YAML)
+        frame._text_entry_frame.get_cursor.return_value = "2.5"
+        frame._harness_view_frame.scale = 1.5
+        frame._graph_source = MagicMock(dot_hash="key")
+        frame._current_file_path = "harness.yaml"
+        frame._watched_file = watched = MagicMock()
+        frame._clean_digest = "digest"
+
+        record = frame.snapshot("harness")
+
+        self.assertEqual(record.title, "harness")
+        self.assertEqual(record.text, _YAML)
+        self.assertEqual(record.cursor, "2.5")
+        self.assertEqual(record.scale, 1.5)
+        self.assertEqual(record.render_key, "key")
+
+        output_cache.put(("key", "png", None), b"png", 3)
+        restored = self._frame(_YAML)
+        restored.restore(record)
+
+        text_entry = restored._text_entry_frame
+        text_entry.append.assert_called_once_with(_YAML)
+        text_entry.set_cursor.assert_called_once_with("2.5")
+        restored._harness_view_frame.update_image.assert_called_once_with(b"png")
+        restored._harness_view_frame.set_scale.assert_called_once_with(1.5)
+        self.assertEqual(restored._current_file_path, "harness.yaml")
+        self.assertIs(restored._watched_file, watched)
+        self.assertEqual(restored._clean_digest, "digest")
+
+        # the harness itself comes back by rendering again
+        restored._render_worker.submit.assert_called_once()
+
+    def test_scale_waits_for_a_render_that_is_not_cached(self):
+        record = TabRecord("harness", _YAML, scale=2.0, render_key="gone")
+
+        restored = self._frame(_YAML)
+        restored.restore(record)
+
+        restored._harness_view_frame.update_image.assert_not_called()
+        self.assertEqual(restored._restore_scale, 2.0)
+
+    def test_file_read_just_before_hibernating_is_watched(self):
+        record = TabRecord("harness", _YAML, file_path="harness.yaml")
+
+        restored = self._frame(_YAML)
+        restored.restore(record)
+
+        self.assertEqual(restored._watched_file.path, Path("harness.yaml"))
+
+
+class TestDeferredRendering(FrameTestCase):
+    def test_hidden_tab_renders_once_selected(self):
+        frame = self._frame(_YAML)
+        frame.set_visible(False)
+
+        frame.parse_text()
+        frame.parse_text()
+        self.assertTrue(frame.render_pending)
+        frame._render_worker.submit.assert_not_called()
+
+        frame.set_visible(True)
+        self.assertFalse(frame.render_pending)
+        frame._render_worker.submit.assert_called_once()
+
+        # nothing was put off, so selecting it again does not render
+        frame.set_visible(False)
+        frame.set_visible(True)
+        frame._render_worker.submit.assert_called_once()
+
+    def test_prerender_of_a_hidden_tab(self):
+        frame = self._frame(_YAML)
+        frame.set_visible(False)
+
+        frame.prerender()
+        frame._render_worker.submit.assert_not_called()
+
+        frame.parse_text()
+        frame.prerender()
+        self.assertFalse(frame.render_pending)
+        frame._render_worker.submit.assert_called_once()
+
+    def test_prerender_waits_for_busy_tabs(self):
+        busy, pending, rendered = _tab("busy"), _tab("pending"), _tab("rendered")
+        busy.busy, busy.render_pending = True, False
+        pending.busy, pending.render_pending = False, True
+        rendered.busy, rendered.render_pending = False, False
+
+        application = _application([], active=busy, max_live_tabs=8)
+        application._prerender = True
+        application.after = MagicMock(return_value="after-id")
+        application._live_frames = lambda: [busy, rendered, pending]
+
+        application._prerender_next()
+        pending.prerender.assert_not_called()
+        application.after.assert_called_once()
+
+        busy.busy = False
+        application._prerender_id = None
+        application._prerender_next()
+        pending.prerender.assert_called_once()
+        rendered.prerender.assert_not_called()
+
+
+class TestFileReload(FrameTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._path = Path(tmp.name) / "harness.yaml"
+        self._path.write_text(_YAML)
+
+        # files are read on a thread of their own; here, when the test says
+        self._executor = HeldExecutor()
+        patcher = patch.object(
+            app,
+            "run_in_thread",
+            side_effect=lambda name, func, *args: self._executor.submit(func, *args),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "askyesno")
+        self._askyesno = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _tracked(self, text=_YAML):
+        frame = self._frame(text)
+        frame.after = MagicMock(return_value="poll-id")
+        frame.parse_text = MagicMock()
+        frame.track_file(str(self._path), _YAML)
+        return frame
+
+    def _poll(self, frame):
+        # one poll starts the read, the next one applies it
+        frame._poll_file()
+        self._executor.run_all()
+        frame._poll_file()
+
+    def test_change_on_disk_reloads(self):
+        frame = self._tracked()
+        changed = _YAML + "  X2:\n    pincount: 3\n"
+        self._path.write_text(changed)
+
+        self._poll(frame)
+
+        frame._text_entry_frame.append.assert_called_once_with(changed)
+        frame.parse_text.assert_called_once()
+        self._askyesno.assert_not_called()
+        self.assertEqual(frame._watched_file.digest, content_hash(changed))
+
+    def test_edits_are_kept_if_asked_to(self):
+        frame = self._tracked()
+        frame._text_entry_frame.get_text.return_value = "edited"
+        self._askyesno.return_value = False
+        changed = _YAML + "  X2:\n    pincount: 3\n"
+        self._path.write_text(changed)
+
+        self._poll(frame)
+
+        self._askyesno.assert_called_once()
+        frame._text_entry_frame.append.assert_not_called()
+        frame.parse_text.assert_not_called()
+        self.assertTrue(frame.modified)
+
+        # nothing more is asked until the file changes again
+        self._poll(frame)
+        self._askyesno.assert_called_once()
+
+    def test_deleted_file(self):
+        frame = self._tracked()
+        self._path.unlink()
+
+        self._poll(frame)
+
+        frame._text_entry_frame.append.assert_not_called()
+        self._askyesno.assert_not_called()
+        # the file is still watched, in case it comes back
+        self.assertEqual(frame._file_poll_id, "poll-id")
+
+        self._path.write_text(_YAML + "# back\n")
+        self._poll(frame)
+        frame._text_entry_frame.append.assert_called_once_with(_YAML + "# back\n")
+
+
+class TestExport(FrameTestCase):
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            patch.object(app, "ToplevelBase"),
+            patch.object(app, "ProgressFrame"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # the export thread runs when the test says
+        self._executor = HeldExecutor()
+        patcher = patch.object(
+            app,
+            "run_in_thread",
+            side_effect=lambda name, func, *args: self._executor.submit(func, *args),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "export_document", return_value=True)
+        self._export_document = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "showerror")
+        self._showerror = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(app, "askyesno", return_value=False)
+        self._askyesno = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _start(self):
+        frame = self._frame(_YAML)
+        frame.after = MagicMock()
+        frame._start_export(Path("out/harness"), frame.document())
+        return frame
+
+    def _finish(self, frame):
+        self._executor.run_all()
+        frame._poll_export()
+
+    def test_progress_is_shown_until_done(self):
+        frame = self._start()
+        job = frame._export
+        progress = job.progress_frame
+
+        progress.set_progress.assert_called_once_with(0, "starting", maximum=1)
+        frame.after.assert_called_once_with(50, frame._poll_export)
+
+        # written by the export thread
+        job.set_progress(2, 4, "svg")
+        frame._poll_export()
+        progress.set_progress.assert_called_with(2, "svg", maximum=4)
+        self.assertEqual(frame.after.call_count, 2)
+
+        self._finish(frame)
+        self.assertIsNone(frame._export)
+        job.window.destroy.assert_called_once()
+        self.assertEqual(frame.after.call_count, 2)
+        self._showerror.assert_not_called()
+
+        kwargs = self._export_document.call_args.kwargs
+        self.assertIs(kwargs["cancel"], job.cancel)
+        self.assertFalse(kwargs["force"])
+
+    def test_errors_are_reported(self):
+        for error, message in (
+            (ValueError("no such connector"), "no such connector"),
+            (ExecutableNotFound(["dot"]), "Graphviz executable not found"),
+        ):
+            self._showerror.reset_mock()
+            self._export_document.side_effect = error
+
+            frame = self._start()
+            self._finish(frame)
+
+            self._showerror.assert_called_once()
+            self.assertIn(message, self._showerror.call_args.args[1])
+            self.assertIsNone(frame._export)
+
+    def test_cancelled_export(self):
+        self._export_document.side_effect = RenderCancelled()
+        frame = self._start()
+
+        frame._cancel_export()
+        self.assertTrue(frame._export.cancel.cancelled)
+        self._finish(frame)
+
+        self.assertIsNone(frame._export)
+        self._showerror.assert_not_called()
+
+    def test_current_exports_may_be_forced(self):
+        self._export_document.return_value = False
+        self._askyesno.return_value = True
+        frame = self._start()
+
+        self._finish(frame)
+        self._askyesno.assert_called_once()
+        self.assertIsNotNone(frame._export)
+
+        self._export_document.return_value = True
+        self._finish(frame)
+        self.assertTrue(self._export_document.call_args.kwargs["force"])
+        self.assertIsNone(frame._export)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,278 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from wireviz_gui import watch as watch_module
+from wireviz_gui.watch import (
+    ContentIndex,
+    PollingWatcher,
+    WatchdogWatcher,
+    WatchedFile,
+    watch,
+)
+
+_YAML = """
+connectors:
+  X1:
+    pincount: 2
+  X2:
+    pincount: 2
+cables:
+  W1:
+    wirecount: 2
+connections:
+  - [X1.1, W1: 1, X2.1]
+"""
+
+
+class TestContentIndex(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._path = Path(tmp.name) / "harness.yaml"
+
+    def test_only_new_contents_count(self):
+        index = ContentIndex()
+        self._path.write_text(_YAML)
+        self.assertTrue(index.update(self._path))
+
+        # touched, or saved without changes
+        self._path.write_text(_YAML)
+        self.assertFalse(index.update(self._path))
+
+        self._path.write_text(_YAML + "\n# edited\n")
+        self.assertTrue(index.update(self._path))
+
+    def test_deleted_files_are_forgotten(self):
+        index = ContentIndex()
+        self._path.write_text(_YAML)
+        index.update(self._path)
+        self._path.unlink()
+
+        self.assertFalse(index.update(self._path))
+        self.assertEqual(len(index), 0)
+
+
+class TestWatchedFile(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._path = Path(tmp.name) / "harness.yaml"
+        self._path.write_text(_YAML)
+
+    def test_first_check_compares_the_text(self):
+        # the file changed between being read and being watched
+        watched = WatchedFile(self._path, "connectors: {}\n")
+
+        self.assertTrue(watched.stat_changed())
+        self.assertEqual(watched.read_changes(), _YAML)
+
+    def test_touch_is_not_a_change(self):
+        watched = WatchedFile(self._path, _YAML)
+        self.assertIsNone(watched.read_changes())
+        self.assertFalse(watched.stat_changed())
+
+        os.utime(self._path, ns=(0, 0))
+        self.assertTrue(watched.stat_changed())
+        self.assertIsNone(watched.read_changes())
+        self.assertFalse(watched.stat_changed())
+
+    def test_accepted_changes_are_not_reported_again(self):
+        watched = WatchedFile(self._path, _YAML)
+        watched.read_changes()
+
+        edited = _YAML.replace("X2", "X3")
+        self._path.write_text(edited)
+        os.utime(self._path, ns=(1, 1))
+        self.assertEqual(watched.read_changes(), edited)
+
+        watched.accept(edited)
+        os.utime(self._path, ns=(2, 2))
+        self.assertIsNone(watched.read_changes())
+
+    def test_deleted(self):
+        watched = WatchedFile(self._path, _YAML)
+        self._path.unlink()
+
+        self.assertTrue(watched.stat_changed())
+        with self.assertRaises(OSError):
+            watched.read_changes()
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_reports_created_modified_and_deleted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            kept = root / "kept.yaml"
+            gone = root / "gone.yml"
+            kept.write_text(_YAML)
+            gone.write_text(_YAML)
+            (root / "notes.txt").write_text("ignored")
+
+            watcher = PollingWatcher(root, interval=0)
+            stop = threading.Event()
+            self.assertEqual(watcher.wait(stop), set())
+
+            (root / "sub").mkdir()
+            added = root / "sub" / "added.yaml"
+            added.write_text(_YAML)
+            os.utime(kept, ns=(0, 0))
+            gone.unlink()
+            (root / "notes.txt").write_text("still ignored")
+
+            self.assertEqual(watcher.wait(stop), {kept, gone, added})
+
+
+class TestWatchdogWatcher(unittest.TestCase):
+    def setUp(self):
+        # the notifications are fed in by hand, so watchdog is not needed
+        patcher = patch.object(watch_module, "Observer")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self._watcher = WatchdogWatcher(Path("."), interval=0.05)
+        self.addCleanup(self._watcher.close)
+
+    def _feed(self, count: int, every: float):
+        def run():
+            for i in range(count):
+                self._watcher._events.put(Path(f"{i}.yaml"))
+                time.sleep(every)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_waits_for_changes_to_settle(self):
+        # a save in several steps, each well within the settle time
+        self._feed(8, WatchdogWatcher.settle / 4)
+
+        changed = self._watcher.wait(threading.Event())
+        self.assertEqual(changed, {Path(f"{i}.yaml") for i in range(8)})
+
+    def test_stops_waiting_for_files_that_keep_changing(self):
+        self._watcher.max_settle = 0.3
+        self._feed(40, WatchdogWatcher.settle / 4)
+
+        start = time.monotonic()
+        changed = self._watcher.wait(threading.Event())
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertLess(len(changed), 40)
+
+    def test_nothing_changed(self):
+        self.assertEqual(self._watcher.wait(threading.Event()), set())
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self._root = Path(tmp.name)
+        self._out = self._root / "out"
+
+        self._results = []
+        self._rendered = threading.Semaphore(0)
+        self._stop = threading.Event()
+
+    def _start(self):
+        def on_result(result):
+            self._results.append(result)
+            self._rendered.release()
+
+        # the bill of materials does not need graphviz
+        thread = threading.Thread(
+            target=watch,
+            args=(self._root, ["tsv"], self._out),
+            kwargs=dict(
+                interval=0.05, polling=True, on_result=on_result, stop=self._stop
+            ),
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self._stop.set)
+
+    def _wait_for(self, count):
+        for _ in range(count):
+            self.assertTrue(self._rendered.acquire(timeout=30))
+
+    def test_renders_only_changed_contents(self):
+        (self._root / "a.yaml").write_text(_YAML)
+        (self._root / "sub").mkdir()
+        (self._root / "sub" / "b.yaml").write_text(_YAML)
+
+        self._start()
+        self._wait_for(2)
+        self.assertTrue((self._out / "a.bom.tsv").exists())
+        self.assertTrue((self._out / "sub" / "b.bom.tsv").exists())
+
+        # touching a file does not render it; changing one does
+        os.utime(self._root / "a.yaml", ns=(0, 0))
+        time.sleep(0.3)
+        (self._root / "sub" / "b.yaml").write_text(_YAML.replace("X2", "X3"))
+        self._wait_for(1)
+
+        self.assertEqual(
+            [r.path.name for r in self._results], ["a.yaml", "b.yaml", "b.yaml"]
+        )
+        self.assertTrue(all(r.ok for r in self._results))
+        self.assertIn("X3", (self._out / "sub" / "b.bom.tsv").read_text())
+
+    def test_refuses_to_start_on_colliding_outputs(self):
+        (self._root / "a").mkdir()
+        (self._root / "a" / "h.yaml").write_text(_YAML)
+        (self._root / "a" / "h.yml").write_text(_YAML)
+
+        with self.assertRaisesRegex(ValueError, "overwrite"):
+            watch(self._root, ["tsv"], self._out, polling=True, stop=self._stop)
+        self.assertFalse(self._out.exists())
+
+    def test_new_colliding_file_fails(self):
+        (self._root / "h.yaml").write_text(_YAML)
+
+        self._start()
+        self._wait_for(1)
+        (self._root / "h.yml").write_text(_YAML.replace("X2", "X3"))
+        self._wait_for(1)
+
+        result = self._results[-1]
+        self.assertEqual(result.path.name, "h.yml")
+        self.assertIn("would overwrite those of", result.error)
+        self.assertNotIn("X3", (self._out / "h.bom.tsv").read_text())
+
+    def test_events_may_name_files_in_another_form(self):
+        (self._root / "sub").mkdir()
+        harness = self._root / "sub" / "b.yaml"
+        harness.write_text(_YAML)
+        stop = self._stop
+
+        class Watcher:
+            name = "fake"
+
+            def wait(self, _):
+                harness.write_text(_YAML.replace("X2", "X3"))
+                stop.set()
+                return {harness.resolve()}
+
+            def close(self):
+                pass
+
+        with patch.object(watch_module, "get_watcher", return_value=Watcher()):
+            watch(
+                self._root / "sub" / "..",
+                ["tsv"],
+                self._out,
+                on_result=self._results.append,
+                stop=stop,
+            )
+
+        self.assertEqual(len(self._results), 2)
+        self.assertTrue(all(r.ok for r in self._results))
+        self.assertIn("X3", (self._out / "sub" / "b.bom.tsv").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,75 @@
 import logging
+import multiprocessing
 import os
+import sys
+import time
 from pathlib import Path
 
 import click
 
-from wireviz_gui.app import Application
+from wireviz_gui.layout import LAYOUT_BACKENDS
+from wireviz_gui.render import EXPORT_FORMATS, set_layout_backend
 
+# tkinter is only imported when the GUI is started, so that the commands run
+# on machines without a display or a Tk installation
 
-@click.command()
+
+@click.group(invoke_without_command=True)
 @click.option(
     "--graphviz-path",
     "-p",
     default=None,
     help="The path on which GraphViz binary may be found.",
 )
-def main(graphviz_path):
+@click.option(
+    "--live-preview/--no-live-preview",
+    default=False,
+    help="Re-render automatically when typing pauses.",
+)
+@click.option(
+    "--preview-delay",
+    default=500,
+    show_default=True,
+    help="Idle time in milliseconds before a live preview render starts.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=None,
+    type=click.IntRange(min=0),
+    help="Render processes shared by all tabs; defaults to the number of "
+    "cores, 0 renders within the GUI process.",
+)
+@click.option(
+    "--layout",
+    default="auto",
+    show_default=True,
+    envvar="WIREVIZ_GUI_LAYOUT",
+    show_envvar=True,
+    type=click.Choice(LAYOUT_BACKENDS),
+    help="How graphviz is run; pygraphviz keeps graphviz loaded in-process "
+    "and is used automatically by the commands when installed.",
+)
+@click.option(
+    "--max-tabs",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Tabs kept alive; the least recently used beyond this are hibernated "
+    "and rebuilt when selected.",
+)
+@click.option(
+    "--prerender/--no-prerender",
+    default=False,
+    help="Render tabs in the background before they are first selected.",
+)
+@click.pass_context
+def main(
+    ctx, graphviz_path, live_preview, preview_delay, jobs, layout, max_tabs, prerender
+):
+    """
+    Edit WireViz harnesses; without a command, the GUI is started.
+    """
     if graphviz_path is not None:
         _graphviz_path = Path(__file__).parent / ".." / "graphviz_238_win32" / "bin"
 
@@ -23,8 +78,182 @@ def main(graphviz_path):
         else:
             os.environ["PATH"] += os.pathsep + str(_graphviz_path)
 
+    # the tabs of the GUI render on threads of their own, while each render
+    # process of the commands renders one file at a time; render processes
+    # are started with the same backend
+    set_layout_backend(layout, concurrent=ctx.invoked_subcommand is None)
+
+    if ctx.invoked_subcommand is not None:
+        return
+
+    from wireviz_gui.app import Application
+
     logging.basicConfig(level=logging.DEBUG)
-    Application()
+    Application(
+        live_preview=live_preview,
+        live_preview_ms=preview_delay,
+        render_jobs=jobs,
+        max_live_tabs=max_tabs,
+        prerender=prerender,
+    )
+
+
+@main.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option(
+    "--format",
+    "-f",
+    "formats",
+    multiple=True,
+    type=click.Choice(EXPORT_FORMATS),
+    help="An output format; may be repeated.  Defaults to all of them.",
+)
+@click.option(
+    "--output-dir",
+    "-o",
+    default=None,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Where the outputs go, mirroring the directories of the inputs; "
+    "defaults to next to each input.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Render processes; defaults to the number of cores.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Render even if the export manifest shows the outputs are current.",
+)
+def render(inputs, formats, output_dir, jobs, force):
+    """
+    Render harness files, directories of them or glob patterns, with the
+    same fixes to the YAML as the GUI applies.
+    """
+    from wireviz_gui.batch import expand_inputs, render_files
+
+    try:
+        paths = expand_inputs(inputs)
+    except FileNotFoundError as e:
+        raise click.BadParameter(str(e), param_hint="INPUTS")
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = jobs or os.cpu_count() or 1
+    failures = 0
+    skipped = 0
+    total = 0.0
+    start = time.perf_counter()
+    for result in render_files(
+        paths, formats or EXPORT_FORMATS, output_dir, jobs, force=force
+    ):
+        total += result.seconds
+        if result.skipped:
+            skipped += 1
+            click.echo(f"{result.seconds:8.2f}s  current {result.path}")
+        elif result.ok:
+            click.echo(f"{result.seconds:8.2f}s  ok      {result.path}")
+        else:
+            failures += 1
+            click.echo(f"{result.seconds:8.2f}s  FAILED  {result.path}")
+            click.echo(f"           {result.error}", err=True)
+
+    click.echo(
+        f"{len(paths)} files, {failures} failed, {skipped} current, "
+        f"{total:.2f}s rendering in {time.perf_counter() - start:.2f}s "
+        f"across {min(jobs, len(paths))} jobs"
+    )
+    sys.exit(1 if failures else 0)
+
+
+@main.command()
+@click.argument(
+    "directory",
+    default=".",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+)
+@click.option(
+    "--format",
+    "-f",
+    "formats",
+    multiple=True,
+    type=click.Choice(EXPORT_FORMATS),
+    help="An output format; may be repeated.  Defaults to all of them.",
+)
+@click.option(
+    "--output-dir",
+    "-o",
+    default=None,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Where the outputs go, mirroring the watched tree; defaults to next "
+    "to each input.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Render processes; defaults to the number of cores.",
+)
+@click.option(
+    "--interval",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0.05),
+    help="Seconds between looks for changes.",
+)
+@click.option(
+    "--polling/--no-polling",
+    default=False,
+    help="Poll for changes even if watchdog is installed.",
+)
+@click.option(
+    "--initial/--no-initial",
+    default=True,
+    help="Render every file once when starting.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Render even if the export manifest shows the outputs are current.",
+)
+def watch(directory, formats, output_dir, jobs, interval, polling, initial, force):
+    """
+    Render the harness files under DIRECTORY whenever their contents change,
+    until interrupted.
+    """
+    from wireviz_gui.watch import watch as watch_tree
+
+    def report(result):
+        status = "FAILED" if not result.ok else "current" if result.skipped else "ok"
+        click.echo(f"{result.seconds:8.2f}s  {status:<7} {result.path}")
+        if not result.ok:
+            click.echo(f"           {result.error}", err=True)
+
+    click.echo(f"watching {directory}; press Ctrl+C to stop")
+    try:
+        watch_tree(
+            directory,
+            formats or EXPORT_FORMATS,
+            output_dir,
+            jobs=jobs or os.cpu_count() or 1,
+            interval=interval,
+            polling=polling,
+            initial=initial,
+            on_result=report,
+            force=force,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        pass
 
 
-main()
+if __name__ == "__main__":
+    # render processes are spawned, which re-imports this module
+    multiprocessing.freeze_support()
+    main()
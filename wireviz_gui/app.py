@@ -1,10 +1,20 @@
+import concurrent.futures
 import logging
+import os
+import queue
+import re
+import threading
 import tkinter as tk
 from io import BytesIO
 from pathlib import Path
 from tkinter import ttk
-from tkinter.filedialog import askopenfilename, asksaveasfilename
-from tkinter.messagebox import showerror, showinfo
+from tkinter.filedialog import (
+    askdirectory,
+    askopenfilename,
+    askopenfilenames,
+    asksaveasfilename,
+)
+from tkinter.messagebox import askyesno, showerror, showinfo
 from typing import Callable, Optional
 
 import yaml
@@ -12,16 +22,20 @@ from graphviz import ExecutableNotFound
 from PIL import Image, ImageTk
 from tk_tools import ToolTip
 from wireviz.DataClasses import Connector, Metadata, Options, Tweak
-from wireviz.wireviz import Harness, parse
+from wireviz.wireviz import Harness
 from yaml import YAMLError
 
 from wireviz_gui import __version__
 from wireviz_gui._base import BaseFrame, HeadButton, LinkLabel, NormLabel, ToplevelBase
+from wireviz_gui.batch import export_text
 from wireviz_gui.dialogs import (
     AboutFrame,
     AddCableFrame,
     AddConnectionFrame,
     AddConnectorFrame,
+    ExportResultsFrame,
+    ExportTabsFrame,
+    ProgressFrame,
 )
 from wireviz_gui.examples import EXAMPLES
 from wireviz_gui.images import (
@@ -33,104 +47,216 @@ from wireviz_gui.images import (
     refresh_fill,
     slightlynybbled_logo_small,
 )
+from wireviz_gui.layout import Cancellation, RenderCancelled
 from wireviz_gui.mating_dialog import AddMateDialog
 from wireviz_gui.menus import Menu
+from wireviz_gui.normalize import (  # noqa: F401
+    normalize_connections,
+    preprocess_yaml_data,
+)
+from wireviz_gui.pool import RenderPool
+from wireviz_gui.pyramid import ImagePyramid, image_budget
+from wireviz_gui.render import (
+    DEFAULT_DPI,
+    EXPORT_FORMATS,
+    Document,
+    RenderWorker,
+    export_document,
+    output_cache,
+    render_dpi,
+    render_yaml,
+    zoom_dpi,
+)
+from wireviz_gui.watch import WatchedFile, content_hash
 
 
-def preprocess_yaml_data(data):
+class TabRecord:
     """
-    Preprocess the YAML data to handle compatibility issues and normalize connections.
-    - Moves 'label' from cables to 'notes' (compatibility fix).
-    - Resolves 'Connector.Pin' syntax in connections to {Connector: Pin} (syntax fix).
-    - Flattens nested dictionary connections (star topology).
+    What is kept of a hibernated tab: enough to rebuild it, with the render
+    itself coming back from the render caches.
     """
-    if not isinstance(data, dict):
-        return data
-
-    # Fix: Handle Cable labels by moving them to notes
-    if "cables" in data and isinstance(data["cables"], dict):
-        for cable_name, cable_data in data["cables"].items():
-            if isinstance(cable_data, dict) and "label" in cable_data:
-                label = cable_data.pop("label")
-                if "notes" in cable_data:
-                    cable_data["notes"] = str(cable_data["notes"]) + "\n" + str(label)
-                else:
-                    cable_data["notes"] = str(label)
-
-    if "connections" not in data:
-        return data
-
-    connections = data["connections"]
-    if not isinstance(connections, list):
-        return data
-
-    # Get known connectors (designators) to support Connector.Pin syntax
-    known_connectors = set()
-    if "connectors" in data and isinstance(data["connectors"], dict):
-        known_connectors = set(data["connectors"].keys())
-
-    new_connections = []
-
-    # Helper to parse node string into wireviz compatible format
-    def parse_node(node_str):
-        # Fix: Handle Connector.Pin syntax
-        if isinstance(node_str, str) and "." in node_str:
-            parts = node_str.split(".")
-            if len(parts) == 2:
-                designator = parts[0]
-                pin = parts[1]
-                if designator in known_connectors:
-                    # It is Connector.Pin, convert to {Designator: Pin}
-                    return {designator: pin}
-        return node_str
-
-    for conn in connections:
-        if isinstance(conn, dict):
-            keys = list(conn.keys())
-            if len(keys) == 0:
-                continue
 
-            start_node = keys[0]
-            value = conn[start_node]
-
-            if isinstance(value, list):
-                for item in value:
-                    p = [parse_node(start_node)]
-                    if isinstance(item, dict):
-                        if len(item) > 0:
-                            k = list(item.keys())[0]
-                            v = list(item.values())[0]
-                            p.append(parse_node(v))
-                            p.append(parse_node(k))
-                    else:
-                        p.append(parse_node(item))
-                    new_connections.append(p)
-            else:
-                p = [parse_node(start_node), parse_node(value)]
-                new_connections.append(p)
-        else:
-            # If it's a list, we should also check for Connector.Pin syntax in its items
-            if isinstance(conn, list):
-                new_conn = [parse_node(item) for item in conn]
-                new_connections.append(new_conn)
-            else:
-                new_connections.append(conn)
+    def __init__(
+        self,
+        title: str,
+        text: str,
+        file_path: Optional[str] = None,
+        cursor: str = "1.0",
+        scale: float = 1.0,
+        render_key: Optional[str] = None,
+        watched_file: Optional[WatchedFile] = None,
+        clean_digest: Optional[str] = None,
+    ):
+        """
+        :param render_key: the hash of the DOT source last rendered, under
+            which the render caches hold its image
+        :param watched_file: what the file of the tab is known to contain
+        :param clean_digest: the hash of the text when it was last loaded or
+            saved, to tell whether it has unsaved edits
+        """
+        self.title = title
+        self.text = text
+        self.file_path = file_path
+        self.cursor = cursor
+        self.scale = scale
+        self.render_key = render_key
+        self.watched_file = watched_file
+        self.clean_digest = clean_digest
+
+
+class OpenBatch:
+    """The files of one :meth:`Application.open_paths`, as they are opened"""
+
+    def __init__(self, paths, reads):
+        self.paths = paths
+        self.reads = reads
+        self.renders = []
+        self.cancels = []
+        self.errors = []
+        self.opened = 0
+        self.cancelled = False
+        self.window = None
+        self.progress = None
+
+    @property
+    def finished(self) -> int:
+        return len(self.errors) + sum(future.done() for future in self.renders)
+
+
+class ExportBatch:
+    """The tabs of one :meth:`Application.export_tabs`, as they are exported"""
+
+    def __init__(self, titles, paths, futures):
+        self.titles = titles
+        self.paths = paths
+        self.futures = futures
+        self.cancelled = False
+        self.window = None
+        self.progress = None
+
+    @property
+    def finished(self) -> int:
+        return sum(future is None or future.done() for future in self.futures)
+
+
+def export_stems(records) -> list:
+    """
+    Name the exports of several tabs after their files, or their titles if
+    they have none, so that no two overwrite each other.
+
+    :param records: the :class:`TabRecord` of each tab
+    :return: the file name, without a suffix, for each tab
+    """
+    stems = []
+    used = set()
+    for record in records:
+        name = Path(record.file_path).stem if record.file_path else record.title
+        name = re.sub(r'[\\/:*?"<>|]+', "_", name).strip() or "harness"
+
+        stem, n = name, 1
+        while stem.lower() in used:
+            n += 1
+            stem = f"{name}-{n}"
+        used.add(stem.lower())
+        stems.append(stem)
+
+    return stems
+
+
+class ExportJob:
+    """One export of a tab, running on a thread of its own"""
+
+    def __init__(self, path: Path, document: Document):
+        self.path = path
+        self.document = document
+        self.cancel = Cancellation()
+        self.future: Optional[concurrent.futures.Future] = None
+        self.window = None
+        self.progress_frame = None
+
+        # written by the export thread, read by the Tk main loop
+        self.progress = (0, 1, "starting")
+
+    def set_progress(self, done: int, total: int, text: str):
+        self.progress = (done, total, text)
+
+
+def run_in_thread(name: str, func: Callable, *args) -> concurrent.futures.Future:
+    """
+    Run ``func`` on a new daemon thread, for one-off work that should not
+    hold up the Tk main loop.
 
-    data["connections"] = new_connections
-    return data
+    :return: the future of its result, to be polled from the main loop
+    """
+    future = concurrent.futures.Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
 
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
 
-# Alias for backward compatibility if needed, though mostly internal
-normalize_connections = preprocess_yaml_data
+
+class HibernatedTab(ttk.Frame):
+    """Stands in the notebook for a tab whose widgets have been destroyed"""
+
+    def __init__(self, parent, record: TabRecord):
+        super().__init__(parent)
+        self.record = record
 
 
 class Application(tk.Tk):
-    def __init__(self, loglevel=logging.INFO, **kwargs):
+    def __init__(
+        self,
+        loglevel=logging.INFO,
+        live_preview: bool = False,
+        live_preview_ms: int = 500,
+        render_jobs: Optional[int] = None,
+        max_live_tabs: int = 8,
+        prerender: bool = False,
+        **kwargs,
+    ):
+        """
+        :param render_jobs: the number of render processes shared by all tabs;
+            defaults to the number of cores, 0 renders within this process
+        :param max_live_tabs: beyond this many tabs, the least recently used
+            are hibernated, destroying their widgets until they are selected
+        :param prerender: render tabs that have not been selected yet in the
+            background, one at a time, whenever no other render is running;
+            otherwise tabs are rendered when first selected
+        """
         self._logger = logging.getLogger(self.__class__.__name__)
         self._logger.setLevel(loglevel)
 
         super().__init__(**kwargs)
 
+        if render_jobs == 0:
+            self._render_pool = None
+            self._render_func = render_yaml
+        else:
+            self._render_pool = RenderPool(workers=render_jobs, loglevel=loglevel)
+            self._render_func = self._render_pool.render
+
+        self._live_preview = tk.BooleanVar(self, value=live_preview)
+        self._live_preview_ms = live_preview_ms
+
+        # live tabs, least recently selected first
+        self._max_live_tabs = max(max_live_tabs, 1)
+        self._tab_lru = []
+
+        self._prerender = prerender
+        self._prerender_id = None
+        self._prerender_ms = 200
+
+        # reads files and renders them into the caches when many are opened
+        self._workers = render_jobs or os.cpu_count() or 1
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
         self.title(f"wireviz-gui {__version__}")
 
         self._icon = tk.PhotoImage(data=slightlynybbled_logo_small)
@@ -143,6 +269,7 @@ class Application(tk.Tk):
         r += 1
         self._notebook = ttk.Notebook(self)
         self._notebook.grid(row=r, column=0, sticky="news")
+        self._notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # Configure grid expansion
         self.grid_rowconfigure(r, weight=1)
@@ -175,8 +302,13 @@ class Application(tk.Tk):
             else None,
             about=self._about,
             new_file=lambda: self.add_tab(),
+            open_files=self.open_files,
+            open_folder=self.open_folder,
+            export_tabs=self.export_tabs,
             load_example=self.add_tab,
             close_tab=self.close_current_tab,
+            live_preview=self._apply_live_preview,
+            live_preview_var=self._live_preview,
             examples=EXAMPLES,
         )
         self.config(menu=self._menu)
@@ -207,11 +339,339 @@ class Application(tk.Tk):
 
         self.mainloop()
 
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._render_pool is not None:
+            self._render_pool.shutdown()
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="wireviz-open"
+            )
+        return self._executor
+
+    def open_files(self):
+        paths = askopenfilenames(
+            filetypes=[("YAML files", "*.yaml *.yml"), ("All files", "*.*")]
+        )
+        if paths:
+            self.open_paths(paths)
+
+    def open_folder(self):
+        folder = askdirectory()
+        if not folder:
+            return
+
+        paths = sorted(
+            path
+            for path in Path(folder).iterdir()
+            if path.suffix.lower() in (".yaml", ".yml") and path.is_file()
+        )
+        if not paths:
+            showinfo("Open Folder", f"No YAML files were found in {folder}")
+            return
+
+        self.open_paths(paths)
+
+    def open_paths(self, paths):
+        """
+        Open each file in a tab of its own.
+
+        The files are read on a thread pool, and rendered in parallel into
+        the render caches, so that each tab shows its diagram as soon as it
+        is selected.  Tabs beyond the live tab limit start out hibernated.
+
+        :param paths: the YAML files to open
+        """
+        paths = [Path(path) for path in paths]
+        if not paths:
+            return
+
+        executor = self._get_executor()
+        reads = [
+            executor.submit(Path.read_text, path, encoding="utf-8") for path in paths
+        ]
+        batch = OpenBatch(paths, reads)
+
+        if len(paths) > 1:
+            batch.window = ToplevelBase(self)
+            batch.window.title("Opening")
+            batch.window.protocol("WM_DELETE_WINDOW", lambda: self._cancel_open(batch))
+            batch.progress = ProgressFrame(
+                batch.window,
+                title=f"Opening {len(paths)} files",
+                maximum=len(paths),
+                on_cancel=lambda: self._cancel_open(batch),
+            )
+            batch.progress.grid()
+
+        self._poll_open(batch)
+
+    def _cancel_open(self, batch: OpenBatch):
+        # tabs already open stay; they render when selected
+        batch.cancelled = True
+        for future in batch.reads + batch.renders:
+            future.cancel()
+        for cancel in batch.cancels:
+            cancel.cancel()
+
+        self._finish_open(batch)
+
+    def _poll_open(self, batch: OpenBatch):
+        if batch.cancelled:
+            return
+
+        total = len(batch.paths)
+
+        # tabs are added in the order the files were given
+        while batch.opened < total and batch.reads[batch.opened].done():
+            path = batch.paths[batch.opened]
+            read = batch.reads[batch.opened]
+            batch.opened += 1
+
+            try:
+                content = read.result()
+            except (OSError, UnicodeDecodeError) as e:
+                batch.errors.append(f"{path.name}: {e}")
+                continue
+
+            if total - batch.opened < self._max_live_tabs:
+                self.add_tab(title=path.name, content=content, filepath=str(path))
+            else:
+                record = TabRecord(path.name, content, file_path=str(path))
+                self._notebook.add(
+                    HibernatedTab(self._notebook, record), text=path.name
+                )
+
+            cancel = Cancellation()
+            batch.cancels.append(cancel)
+            batch.renders.append(
+                self._get_executor().submit(self._prerender_text, content, cancel)
+            )
+
+        finished = batch.finished
+        if batch.progress is not None:
+            batch.progress.set_progress(
+                finished, f"{batch.opened} of {total} read, {finished} rendered"
+            )
+
+        if finished < total:
+            self.after(50, self._poll_open, batch)
+            return
+
+        self._finish_open(batch)
+        if batch.errors:
+            showerror("Open Error", "Could not open:\n" + "\n".join(batch.errors))
+
+    def _finish_open(self, batch: OpenBatch):
+        if batch.window is not None:
+            batch.window.destroy()
+            batch.window = None
+
+    def _prerender_text(self, yaml_input: str, cancel: Cancellation):
+        # runs on the executor; only fills the render caches, and errors are
+        # left for the tab to report once it is selected
+        try:
+            self._render_func(yaml_input, cancel)
+        except Exception as e:
+            self._logger.debug(f"background render failed: {e}")
+
+    def _tab_records(self):
+        """:return: a :class:`TabRecord` of every tab, in notebook order"""
+        records = []
+        for tab in self._notebook.tabs():
+            widget = self._notebook.nametowidget(tab)
+            if isinstance(widget, HibernatedTab):
+                records.append(widget.record)
+            else:
+                records.append(widget.snapshot(self._notebook.tab(tab, "text")))
+        return records
+
+    def export_tabs(self):
+        """
+        Export every format of each of the chosen tabs into a directory,
+        rendering them in parallel in the render processes.
+        """
+        records = self._tab_records()
+
+        window = ToplevelBase(self)
+        window.title("Export Tabs")
+
+        def on_export(chosen, directory, force):
+            window.destroy()
+            self._start_tab_export([records[i] for i in chosen], Path(directory), force)
+
+        ExportTabsFrame(
+            window, [record.title for record in records], on_export=on_export
+        ).grid()
+
+    def _start_tab_export(self, records, directory: Path, force: bool = False):
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            showerror("Export Error", f"Could not create {directory}:\n{e}")
+            return
+
+        paths = [directory / f"{stem}.yaml" for stem in export_stems(records)]
+        futures = []
+        for record, path in zip(records, paths):
+            if record.text.strip() == "":
+                futures.append(None)
+            elif self._render_pool is not None:
+                futures.append(
+                    self._render_pool.submit_export(
+                        record.text, path, EXPORT_FORMATS, force
+                    )
+                )
+            else:
+                futures.append(
+                    self._get_executor().submit(
+                        export_text, record.text, path, EXPORT_FORMATS, force
+                    )
+                )
+
+        batch = ExportBatch([record.title for record in records], paths, futures)
+        batch.window = ToplevelBase(self)
+        batch.window.title("Exporting")
+        batch.window.protocol("WM_DELETE_WINDOW", lambda: self._cancel_tab_export(batch))
+        batch.progress = ProgressFrame(
+            batch.window,
+            title=f"Exporting {len(records)} tabs into {directory.name}",
+            maximum=len(records),
+            on_cancel=lambda: self._cancel_tab_export(batch),
+        )
+        batch.progress.grid()
+
+        self._poll_tab_export(batch)
+
+    def _cancel_tab_export(self, batch: ExportBatch):
+        # exports already running are left to finish
+        batch.cancelled = True
+        for future in batch.futures:
+            if future is not None:
+                future.cancel()
+
+    def _poll_tab_export(self, batch: ExportBatch):
+        finished = batch.finished
+        total = len(batch.futures)
+        text = "cancelling\u2026" if batch.cancelled else f"{finished} of {total}"
+        batch.progress.set_progress(finished, text)
+
+        if finished < total:
+            self.after(100, self._poll_tab_export, batch)
+            return
+
+        batch.window.destroy()
+
+        results = []
+        for title, path, future in zip(batch.titles, batch.paths, batch.futures):
+            if future is None:
+                results.append((title, "skipped", "the tab is empty"))
+                continue
+            if future.cancelled():
+                results.append((title, "cancelled", ""))
+                continue
+
+            try:
+                result = future.result()
+            except Exception as e:
+                results.append((title, "failed", f"{type(e).__name__}: {e}"))
+                continue
+
+            if not result.ok:
+                results.append((title, "failed", result.error))
+            elif result.skipped:
+                results.append((title, "up to date", path.stem))
+            else:
+                results.append(
+                    (title, "exported", f"{result.seconds:.2f}s, {path.stem}")
+                )
+
+        window = ToplevelBase(self)
+        window.title("Export Results")
+        ExportResultsFrame(window, results, on_close=window.destroy).grid()
+
     def _about(self):
         top = ToplevelBase(self)
         top.title("About")
         AboutFrame(top).grid()
 
+    def _apply_live_preview(self):
+        enabled = self._live_preview.get()
+        for frame in self._live_frames():
+            frame.set_live_preview(enabled)
+
+    def _live_frames(self):
+        frames = (self._notebook.nametowidget(tab) for tab in self._notebook.tabs())
+        return [frame for frame in frames if isinstance(frame, InputOutputFrame)]
+
+    def _on_tab_changed(self, _):
+        active = self.get_active_frame()
+        if isinstance(active, HibernatedTab):
+            # selecting the rebuilt tab brings us back here
+            self._wake_tab(active)
+            return
+
+        for frame in self._live_frames():
+            frame.set_visible(frame is active)
+
+        if active in self._tab_lru:
+            self._tab_lru.remove(active)
+            self._tab_lru.append(active)
+
+        self._hibernate_tabs()
+        self._schedule_prerender()
+
+    def _schedule_prerender(self):
+        if self._prerender and self._prerender_id is None:
+            self._prerender_id = self.after(self._prerender_ms, self._prerender_next)
+
+    def _prerender_next(self):
+        self._prerender_id = None
+
+        frames = self._live_frames()
+        if any(frame.busy for frame in frames):
+            # whatever is rendering, most likely the selected tab, goes first
+            self._schedule_prerender()
+            return
+
+        for frame in frames:
+            if frame.render_pending:
+                frame.prerender()
+                self._schedule_prerender()
+                return
+
+    def _hibernate_tabs(self):
+        active = self.get_active_frame()
+        for frame in list(self._tab_lru):
+            if len(self._tab_lru) <= self._max_live_tabs:
+                break
+            if frame is not active:
+                self._hibernate_tab(frame)
+
+    def _hibernate_tab(self, frame):
+        record = frame.snapshot(self._notebook.tab(frame, "text"))
+        self._logger.debug(f'hibernating tab "{record.title}"')
+
+        placeholder = HibernatedTab(self._notebook, record)
+        self._notebook.insert(frame, placeholder, text=record.title)
+
+        self._tab_lru.remove(frame)
+        frame.destroy()
+
+    def _wake_tab(self, placeholder: HibernatedTab):
+        record = placeholder.record
+        self._logger.debug(f'rebuilding tab "{record.title}"')
+
+        frame = self._create_frame()
+        frame.restore(record)
+
+        self._notebook.insert(placeholder, frame, text=record.title)
+        self._tab_lru.append(frame)
+        self._notebook.select(frame)
+        placeholder.destroy()
+
     def get_active_frame(self):
         try:
             tab_id = self._notebook.select()
@@ -221,8 +681,16 @@ class Application(tk.Tk):
         except tk.TclError:
             return None
 
+    def _create_frame(self):
+        frame = InputOutputFrame(self._notebook, render_func=self._render_func)
+        frame.set_live_preview(self._live_preview.get(), idle_ms=self._live_preview_ms)
+
+        # nothing is rendered until the tab is selected
+        frame.set_visible(False)
+        return frame
+
     def add_tab(self, title="Untitled", content=None, filepath=None):
-        frame = InputOutputFrame(self._notebook)
+        frame = self._create_frame()
 
         if content:
             frame._text_entry_frame.clear()
@@ -230,15 +698,20 @@ class Application(tk.Tk):
             frame.parse_text()
 
         if filepath:
-            frame._current_file_path = filepath
+            frame.track_file(filepath, content or "")
 
         self._notebook.add(frame, text=title)
+        self._tab_lru.append(frame)
         self._notebook.select(frame)
+        self._hibernate_tabs()
+        self._schedule_prerender()
         return frame
 
     def close_current_tab(self):
         active_tab = self.get_active_frame()
         if active_tab:
+            if active_tab in self._tab_lru:
+                self._tab_lru.remove(active_tab)
             active_tab.destroy()
 
         # If no tabs left, create a default one
@@ -257,12 +730,44 @@ class TitleFrame(BaseFrame):
 
 
 class InputOutputFrame(BaseFrame):
-    def __init__(self, parent, loglevel=logging.INFO):
+    def __init__(
+        self,
+        parent,
+        render_func: Callable = render_yaml,
+        loglevel=logging.INFO,
+    ):
         super().__init__(parent, loglevel=loglevel)
 
         self._current_file_path = None
         self._harness = Harness(Metadata(), Options(), Tweak())
 
+        self._render_worker = RenderWorker(render_func=render_func, loglevel=loglevel)
+        self._render_poll_id = None
+        self._render_poll_ms = 50
+
+        # sharper renders of the current source for when the view is zoomed in
+        self._graph_source = None
+
+        # the zoom level to return to once a rebuilt tab has rendered
+        self._restore_scale = None
+
+        # renders of tabs that have not been selected wait until they are
+        self._selected = True
+        self._render_pending = False
+        self._hires_worker = RenderWorker(render_func=render_dpi, loglevel=loglevel)
+
+        # the file is polled so that changes made elsewhere are picked up
+        self._watched_file: Optional[WatchedFile] = None
+        self._clean_digest = None
+        self._file_poll_id = None
+        self._file_poll_ms = 1000
+        self._file_read = None
+
+        self._export: Optional[ExportJob] = None
+
+        # the text as last parsed; see document()
+        self._document = Document("")
+
         r = 0
         self._button_frame = ButtonFrame(
             self,
@@ -293,15 +798,26 @@ class InputOutputFrame(BaseFrame):
         self._text_entry_frame = TextEntryFrame(
             self._paned_window, on_update_callback=self.parse_text
         )
-        self._harness_view_frame = HarnessViewFrame(self._paned_window)
+        self._harness_view_frame = HarnessViewFrame(
+            self._paned_window, on_request_dpi=self._request_dpi
+        )
 
         self._paned_window.add(self._text_entry_frame, weight=1)
         self._paned_window.add(self._harness_view_frame, weight=3)
 
+    def document(self) -> Document:
+        """
+        :return: the current revision of the text, which is only parsed and
+            built once however many times it is rendered, saved or exported
+        """
+        text = self._text_entry_frame.get()
+        if text != self._document.text:
+            self._document = Document(text, self._document.revision + 1)
+        return self._document
+
     def _update_yaml_section(self, section, new_data):
-        current_text = self._text_entry_frame.get()
         try:
-            data = yaml.safe_load(current_text) or {}
+            data = self.document().editable_tree() or {}
 
             if section not in data:
                 # If section doesn't exist, create appropriate container
@@ -339,7 +855,8 @@ class InputOutputFrame(BaseFrame):
             )
             self.parse_text()
 
-        except yaml.YAMLError as e:
+        except Exception as e:
+            # such as a YAMLError, or a ValueError for an impossible date
             showerror("YAML Error", f"Error processing existing YAML: {e}")
             return
 
@@ -395,7 +912,7 @@ class InputOutputFrame(BaseFrame):
                 content = f.read()
             self._text_entry_frame.clear()
             self._text_entry_frame.append(content)
-            self._current_file_path = file_name
+            self.track_file(file_name, content)
             self.parse_text()
         except Exception as e:
             showerror("Open Error", f"Could not open file:\n{e}")
@@ -405,25 +922,103 @@ class InputOutputFrame(BaseFrame):
             try:
                 with open(self._current_file_path, "r", encoding="utf-8") as f:
                     content = f.read()
-                self._text_entry_frame.clear()
-                self._text_entry_frame.append(content)
+                self._load_text(content)
+                self.track_file(self._current_file_path, content)
                 self.parse_text()
             except Exception as e:
                 showerror("Reload Error", f"Could not reload file:\n{e}")
         else:
             showinfo("Reload Info", "No file to reload.")
 
+    def _load_text(self, content: str):
+        # replaces the text, keeping the cursor where it was
+        cursor = self._text_entry_frame.get_cursor()
+        self._text_entry_frame.clear()
+        self._text_entry_frame.append(content)
+        self._text_entry_frame.set_cursor(cursor)
+
+    def track_file(self, path: str, content: str):
+        """
+        Make ``path`` the file of this tab, and reload it whenever it changes.
+
+        :param path: the file
+        :param content: what the file is known to contain, and the text of the
+            tab matches
+        """
+        self._current_file_path = path
+        self._watched_file = WatchedFile(path, content)
+        self._clean_digest = content_hash(self._text_entry_frame.get_text())
+        self._file_read = None
+        self._schedule_file_poll()
+
+    @property
+    def modified(self) -> bool:
+        """True if the text has been edited since it was loaded or saved"""
+        return content_hash(self._text_entry_frame.get_text()) != self._clean_digest
+
+    def _schedule_file_poll(self):
+        if self._watched_file is not None and self._file_poll_id is None:
+            self._file_poll_id = self.after(self._file_poll_ms, self._poll_file)
+
+    def _poll_file(self):
+        """
+        Look for changes to the file of this tab.  Only its size and
+        modification time are looked at here; the file is read and hashed on
+        a thread, and only a change to its text reloads the tab.  Hidden tabs
+        catch up once they are selected.
+        """
+        self._file_poll_id = None
+        watched = self._watched_file
+        if watched is None:
+            return
+
+        if self._file_read is not None:
+            read_watched, future = self._file_read
+            if future.done():
+                self._file_read = None
+                if read_watched is watched:
+                    self._apply_file_read(watched, future)
+        elif self._selected and watched.stat_changed():
+            future = run_in_thread("wireviz-reload", watched.read_changes)
+            self._file_read = (watched, future)
+
+        self._schedule_file_poll()
+
+    def _apply_file_read(self, watched: WatchedFile, future):
+        try:
+            content = future.result()
+        except (OSError, UnicodeDecodeError) as e:
+            # most likely deleted or halfway through being written
+            self._logger.debug(f"could not read {watched.path}: {e}")
+            return
+
+        if content is None:
+            return
+
+        if self.modified and not askyesno(
+            "File Changed",
+            f"{watched.path.name} has changed on disk.\n\n"
+            "Reload it and lose the edits made here?",
+        ):
+            # keep the edits, and ask again only if the file changes again
+            watched.accept(content)
+            return
+
+        self._logger.info(f"reloading {watched.path}")
+        self._load_text(content)
+        watched.accept(content)
+        self._clean_digest = content_hash(self._text_entry_frame.get_text())
+        self.parse_text()
+
     def save_file(self):
         if self._current_file_path:
-            yaml_input = self._text_entry_frame.get()
-            if yaml_input.strip() == "":
+            document = self.document()
+            if document.empty:
                 return
 
-            # Validate YAML before saving
+            # Validate YAML before saving; a render has usually done this
             try:
-                data = yaml.safe_load(yaml_input)
-                data = normalize_connections(data)
-                parse(inp=data, return_types=("harness",))
+                document.source()
             except YAMLError as e:
                 showerror("Save Error", f"Invalid YAML content:\n{e}")
                 return
@@ -433,22 +1028,21 @@ class InputOutputFrame(BaseFrame):
 
             try:
                 with open(self._current_file_path, "w", encoding="utf-8") as f:
-                    f.write(yaml_input)
+                    f.write(document.text)
+                self.track_file(self._current_file_path, document.text)
             except Exception as e:
                 showerror("Save Error", f"Could not save file:\n{e}")
         else:
             self.save_as_file()
 
     def save_as_file(self):
-        yaml_input = self._text_entry_frame.get()
-        if yaml_input.strip() == "":
+        document = self.document()
+        if document.empty:
             return
 
-        # Validate YAML before saving
+        # Validate YAML before saving; a render has usually done this
         try:
-            data = yaml.safe_load(yaml_input)
-            data = normalize_connections(data)
-            parse(inp=data, return_types=("harness",))
+            document.source()
         except YAMLError as e:
             showerror("Save Error", f"Invalid YAML content:\n{e}")
             return
@@ -465,8 +1059,8 @@ class InputOutputFrame(BaseFrame):
 
         try:
             with open(file_name, "w", encoding="utf-8") as f:
-                f.write(yaml_input)
-            self._current_file_path = file_name
+                f.write(document.text)
+            self.track_file(file_name, document.text)
         except Exception as e:
             showerror("Save Error", f"Could not save file:\n{e}")
 
@@ -490,86 +1084,299 @@ class InputOutputFrame(BaseFrame):
         self._harness_view_frame.save_image(file_name)
 
     def export_all(self):
+        """
+        Export to every format in the background, with a window showing the
+        progress that allows the export to be cancelled.
+        """
+        if self._export is not None:
+            showinfo("Export", "An export of this tab is already running.")
+            return
+
         file_name = asksaveasfilename(title="Export All Formats")
         if file_name is None or file_name.strip() == "":
             return
 
-        path = Path(file_name)
-        yaml_input = self._text_entry_frame.get()
+        document = self.document()
+        if document.empty:
+            return
 
-        if yaml_input.strip() != "":
-            try:
-                data = yaml.safe_load(yaml_input)
-                data = normalize_connections(data)
-                parse(
-                    inp=data,
-                    output_dir=path.parent,
-                    output_name=path.stem,
-                    output_formats=(
-                        "png",
-                        "svg",
-                        "html",
-                        "tsv",
-                    ),
-                )
-            except (ExecutableNotFound, FileNotFoundError):
-                showerror(
-                    "Error",
-                    "Graphviz executable not found; Make sure that the "
-                    "executable is installed and in your system PATH",
-                )
-                return
-            except Exception as e:
-                showerror("Error", f"An unexpected error occurred:\n{e}")
-                return
+        self._start_export(Path(file_name), document)
+
+    def _start_export(self, path: Path, document: Document, force: bool = False):
+        job = ExportJob(path, document)
+        job.window = ToplevelBase(self)
+        job.window.title("Exporting")
+        job.window.protocol("WM_DELETE_WINDOW", self._cancel_export)
+        job.progress_frame = ProgressFrame(
+            job.window,
+            title=f"Exporting {job.path.name}",
+            maximum=1,
+            on_cancel=self._cancel_export,
+        )
+        job.progress_frame.grid()
+
+        job.future = run_in_thread(
+            "wireviz-export",
+            lambda: export_document(
+                document,
+                job.path,
+                cancel=job.cancel,
+                progress=job.set_progress,
+                force=force,
+            ),
+        )
+        self._export = job
+        self._poll_export()
+
+    def _cancel_export(self):
+        if self._export is not None:
+            self._export.cancel.cancel()
+
+    def _poll_export(self):
+        job = self._export
+        if job is None:
+            return
+
+        done, total, text = job.progress
+        job.progress_frame.set_progress(done, text, maximum=total)
+
+        if not job.future.done():
+            self.after(50, self._poll_export)
+            return
+
+        self._export = None
+        job.window.destroy()
+
+        try:
+            written = job.future.result()
+        except RenderCancelled:
+            self._logger.info(f"export to {job.path} cancelled")
+        except (ExecutableNotFound, FileNotFoundError):
+            showerror(
+                "Error",
+                "Graphviz executable not found; Make sure that the "
+                "executable is installed and in your system PATH",
+            )
+        except Exception as e:
+            showerror("Error", f"An unexpected error occurred:\n{e}")
+        else:
+            if not written and askyesno(
+                "Export",
+                f"The exports of {job.path.name} are already up to date.\n\n"
+                "Export again anyway?",
+            ):
+                self._start_export(job.path, job.document, force=True)
 
     def parse_text(self):
         """
         This is where the data is read from the text entry and parsed into an image
+
+        A snapshot of the text is handed to the render worker; the result is
+        collected by :meth:`_poll_render` from the Tk main loop.  While the
+        tab is not selected, the render is put off until it is.
         :return:
         """
-        yaml_input = self._text_entry_frame.get()
-        if yaml_input.strip() != "":
-            try:
-                data = yaml.safe_load(yaml_input)
-                data = normalize_connections(data)
-                png_data, new_harness = parse(inp=data, return_types=("png", "harness"))
-                self._harness.connectors = new_harness.connectors
-                self._harness.cables = new_harness.cables
-                self._harness.mates = new_harness.mates
-                self._harness.additional_bom_items = new_harness.additional_bom_items
-
-                self.refresh_view(png_data)
-            except YAMLError as e:
-                lines = str(e).lower()
-                for line in lines.split("\n"):
-                    if "line" in line:
-                        # determine the line number that has a problem
-                        parts = [line_part.strip() for line_part in line.split(",")]
-                        part = [
-                            line_part for line_part in parts if "line" in line_part
-                        ][0]
-                        error_line = part.split(" ")[1]
-                        self._text_entry_frame.highlight_line(error_line)
-                        break
-                showerror("Parse Error", f"Input is invalid: {e}")
-                return
-            except (ExecutableNotFound, FileNotFoundError):
-                showerror(
-                    "Error",
-                    "Graphviz executable not found; Make sure that the "
-                    "executable is installed and in your system PATH",
-                )
-                return
-            except Exception as e:
-                showerror("Error", f"An unexpected error occurred:\n{e}")
-                return
+        if not self._selected:
+            self._render_pending = True
+            return
+
+        self._submit_render()
+
+    @property
+    def render_pending(self) -> bool:
+        """True if a render has been put off until the tab is selected"""
+        return self._render_pending
+
+    @property
+    def busy(self) -> bool:
+        return self._render_worker.busy or self._hires_worker.busy
+
+    def prerender(self):
+        """Carry out a render that was put off, although the tab is hidden"""
+        if self._render_pending:
+            self._submit_render()
+
+    def _submit_render(self):
+        self._render_pending = False
+
+        document = self.document()
+        if document.empty:
+            self._text_entry_frame.highlight_line(None)
+            return
+
+        self._render_worker.submit(document)
+        self._harness_view_frame.set_status("rendering\u2026")
+        self._schedule_poll()
+
+    def _request_dpi(self, dpi: int):
+        """
+        Render the current diagram at a higher resolution in the background;
+        the view swaps it in once it is ready.
+
+        :param dpi: the resolution wanted by the view
+        """
+        if self._graph_source is None:
+            return
+
+        self._hires_worker.submit((self._graph_source, dpi))
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self._render_poll_id is None:
+            self._render_poll_id = self.after(self._render_poll_ms, self._poll_render)
+
+    def _poll_render(self):
+        self._render_poll_id = None
+
+        result = self._render_worker.poll()
+        if result is not None:
+            self._apply_render_result(result)
+
+        result = self._hires_worker.poll()
+        if result is not None:
+            self._apply_hires_result(result)
+
+        if self._render_worker.busy or self._hires_worker.busy:
+            self._schedule_poll()
+
+    def _apply_hires_result(self, result):
+        source, dpi = result.request
+        if result.error is not None:
+            self._logger.warning(f"rendering at {dpi} dpi failed: {result.error}")
+            return
+
+        if source is not self._graph_source:
+            self._logger.debug(f"dropping {dpi} dpi render of an older diagram")
+            return
+
+        self._harness_view_frame.add_variant(dpi, result.png_data)
 
-        self._text_entry_frame.highlight_line(None)
+    def _apply_render_result(self, result):
+        self._harness_view_frame.set_status(None)
+
+        if result.error is None:
+            self._graph_source = result.source
+            # saving or exporting this revision need not build it again
+            result.request.set_source(result.source)
+
+            new_harness = result.harness
+            self._harness.connectors = new_harness.connectors
+            self._harness.cables = new_harness.cables
+            self._harness.mates = new_harness.mates
+            self._harness.additional_bom_items = new_harness.additional_bom_items
+
+            self.refresh_view(result.png_data)
+            self._text_entry_frame.highlight_line(None)
+            return
+
+        try:
+            raise result.error
+        except YAMLError as e:
+            lines = str(e).lower()
+            for line in lines.split("\n"):
+                if "line" in line:
+                    # determine the line number that has a problem
+                    parts = [line_part.strip() for line_part in line.split(",")]
+                    part = [
+                        line_part for line_part in parts if "line" in line_part
+                    ][0]
+                    error_line = part.split(" ")[1]
+                    self._text_entry_frame.highlight_line(error_line)
+                    break
+            showerror("Parse Error", f"Input is invalid: {e}")
+        except (ExecutableNotFound, FileNotFoundError):
+            showerror(
+                "Error",
+                "Graphviz executable not found; Make sure that the "
+                "executable is installed and in your system PATH",
+            )
+        except Exception as e:
+            showerror("Error", f"An unexpected error occurred:\n{e}")
+
+    def set_live_preview(self, enabled: bool, idle_ms: Optional[int] = None):
+        self._text_entry_frame.set_live_preview(enabled, idle_ms=idle_ms)
+
+    def set_visible(self, visible: bool):
+        """
+        :param visible: True if this tab has been selected, False if another has
+        """
+        self._selected = visible
+        self._harness_view_frame.set_visible(visible)
+
+        if visible and self._render_pending:
+            self._submit_render()
+
+    def snapshot(self, title: str) -> TabRecord:
+        """
+        :param title: the title of the tab
+        :return: what is needed to rebuild this tab with :meth:`restore`
+        """
+        source = self._graph_source
+        return TabRecord(
+            title,
+            self._text_entry_frame.get_text(),
+            file_path=self._current_file_path,
+            cursor=self._text_entry_frame.get_cursor(),
+            scale=self._harness_view_frame.scale,
+            render_key=source.dot_hash if source is not None else None,
+            watched_file=self._watched_file,
+            clean_digest=self._clean_digest,
+        )
+
+    def restore(self, record: TabRecord):
+        """
+        Rebuild the state of a tab from its :meth:`snapshot`.
+
+        :param record: the snapshot of the tab
+        """
+        self._current_file_path = record.file_path
+        self._text_entry_frame.clear()
+        self._text_entry_frame.append(record.text)
+        self._text_entry_frame.set_cursor(record.cursor)
+
+        if record.watched_file is not None:
+            self._watched_file = record.watched_file
+            self._clean_digest = record.clean_digest
+            self._schedule_file_poll()
+        elif record.file_path:
+            # hibernated straight after being read
+            self.track_file(record.file_path, record.text)
+
+        # show the last render straight away; the harness itself comes back
+        # from the render caches by rendering again
+        png_data = None
+        if record.render_key is not None:
+            png_data = output_cache.get((record.render_key, "png", None))
+        if png_data:
+            self._harness_view_frame.update_image(png_data)
+            self._harness_view_frame.set_scale(record.scale)
+        else:
+            self._restore_scale = record.scale
+
+        self.parse_text()
+
+    def destroy(self):
+        if self._render_poll_id is not None:
+            self.after_cancel(self._render_poll_id)
+            self._render_poll_id = None
+        if self._file_poll_id is not None:
+            self.after_cancel(self._file_poll_id)
+            self._file_poll_id = None
+        if self._export is not None:
+            self._export.cancel.cancel()
+            self._export.window.destroy()
+            self._export = None
+        self._render_worker.stop()
+        self._hires_worker.stop()
+
+        super().destroy()
 
     def refresh_view(self, png_data=None):
         if png_data:
             self._harness_view_frame.update_image(png_data)
+            if self._restore_scale is not None:
+                self._harness_view_frame.set_scale(self._restore_scale)
+                self._restore_scale = None
 
         self._structure_view_frame.refresh()
 
@@ -742,20 +1549,65 @@ class TextEntryFrame(BaseFrame):
         self,
         parent,
         on_update_callback: Optional[Callable] = None,
+        live_preview: bool = False,
+        idle_ms: int = 500,
         loglevel=logging.INFO,
     ):
         super().__init__(parent, loglevel=loglevel)
 
         self._on_update_callback = on_update_callback
+        self._live_preview = live_preview
+        self._idle_ms = idle_ms
+        self._idle_id = None
 
         self._text = tk.Text(self)
         self._text.grid(row=0, column=1, sticky="news")
         self._text.bind("<Control-l>", lambda _: self._updated())
+        self._text.bind("<<Modified>>", self._on_modified)
         self._text.tag_config("highlight", background="yellow")
 
     def associate_callback(self, on_update_callback: Callable):
         self._on_update_callback = on_update_callback
 
+    def set_live_preview(self, enabled: bool, idle_ms: Optional[int] = None):
+        """
+        Render automatically once typing has paused.
+
+        :param enabled: True to render on edits, False to render on CTRL+L only
+        :param idle_ms: how long the text must be left alone before rendering
+        """
+        self._live_preview = enabled
+        if idle_ms is not None:
+            self._idle_ms = idle_ms
+
+        if not enabled:
+            self._cancel_idle()
+
+    def _cancel_idle(self):
+        if self._idle_id is not None:
+            self.after_cancel(self._idle_id)
+            self._idle_id = None
+
+    def _on_modified(self, _):
+        # the flag must be reset, otherwise <<Modified>> never fires again
+        if not self._text.edit_modified():
+            return
+        self._text.edit_modified(False)
+
+        if not self._live_preview:
+            return
+
+        self._cancel_idle()
+        self._idle_id = self.after(self._idle_ms, self._on_idle)
+
+    def _on_idle(self):
+        self._idle_id = None
+        self._updated()
+
+    def destroy(self):
+        self._cancel_idle()
+        super().destroy()
+
     def _updated(self):
         if self._on_update_callback is not None:
             self._on_update_callback()
@@ -763,6 +1615,17 @@ class TextEntryFrame(BaseFrame):
     def get(self):
         return self._text.get("1.0", "end")
 
+    def get_text(self):
+        """:return: the text without the newline Tk always adds at the end"""
+        return self._text.get("1.0", "end-1c")
+
+    def get_cursor(self) -> str:
+        return self._text.index("insert")
+
+    def set_cursor(self, index: str):
+        self._text.mark_set("insert", index)
+        self._text.see("insert")
+
     def append(self, text: str):
         self._text.insert("end", text)
 
@@ -777,9 +1640,20 @@ class TextEntryFrame(BaseFrame):
 
 
 class HarnessViewFrame(BaseFrame):
-    def __init__(self, parent, loglevel=logging.INFO):
+    def __init__(
+        self,
+        parent,
+        on_request_dpi: Optional[Callable] = None,
+        loglevel=logging.INFO,
+    ):
+        """
+        :param on_request_dpi: called with a resolution once the zoom level
+            settles on a scale that the available renders would upscale
+        """
         super().__init__(parent, loglevel=loglevel)
 
+        self._on_request_dpi = on_request_dpi
+
         # Configure grid for canvas and scrollbars
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -787,23 +1661,69 @@ class HarnessViewFrame(BaseFrame):
         self._canvas = tk.Canvas(self, bg="white")
         self._canvas.grid(row=0, column=0, sticky="news")
 
-        self._v_scroll = tk.Scrollbar(
-            self, orient="vertical", command=self._canvas.yview
-        )
+        self._v_scroll = tk.Scrollbar(self, orient="vertical", command=self._on_yview)
         self._v_scroll.grid(row=0, column=1, sticky="ns")
 
-        self._h_scroll = tk.Scrollbar(
-            self, orient="horizontal", command=self._canvas.xview
-        )
+        self._h_scroll = tk.Scrollbar(self, orient="horizontal", command=self._on_xview)
         self._h_scroll.grid(row=1, column=0, sticky="ew")
 
         self._canvas.configure(
             yscrollcommand=self._v_scroll.set, xscrollcommand=self._h_scroll.set
         )
 
+        # the compressed renders are kept for as long as the tab exists; the
+        # decoded images are freed while the tab is hidden, within the budget
+        # shared by all tabs, and decoded again in the background when shown
+        self._png_data: Optional[bytes] = None
+        self._variant_data = {}
         self._image = None
-        self._tk_image = None
+        self._image_size = None
+        self._visible = True
+        self._restoring = False
+
+        # images are decoded on threads of their own; the results are handed
+        # back to the Tk thread through this queue
+        self._decoded = queue.Queue()
+        self._decodes = 0
+        self._decode_poll_id = None
+
         self._scale = 1.0
+        self._status_text = None
+
+        # the diagram is drawn from tiles of an image pyramid; only the tiles
+        # in view, plus a margin, are resized and composited for Tk
+        self._pyramid: Optional[ImagePyramid] = None
+        self._scaled_tiles = {}
+        self._pyramid_poll_id = None
+        self._view_margin = 256
+
+        # one canvas item showing one PhotoImage, updated in place; both are
+        # only replaced when the size of the view changes
+        self._composite = None
+        self._view_image = None
+        self._view_item = None
+        self._drawn_box = None
+        self._drawn_key = None
+
+        # renders of the current document at other resolutions, keyed on dpi;
+        # the one on display is scaled to match the default resolution
+        self._variants = {}
+        self._variant_decodes = {}
+        self._display: Optional[ImagePyramid] = None
+        self._display_dpi = DEFAULT_DPI
+        self._wanted_dpi = DEFAULT_DPI
+        self._settle_id = None
+        self._settle_ms = 300
+
+        # wheel events are coalesced into one cheap preview per idle loop;
+        # the high quality pass waits until the wheel has been still a while
+        self._preview_id = None
+        self._refine_id = None
+        self._refine_ms = 150
+
+        # the zoom range, relative to the default resolution
+        self._min_scale = 0.05
+        self._max_scale = 20.0
 
         # Bindings for Pan and Zoom
         self._canvas.bind("<ButtonPress-1>", self._on_move_press)
@@ -811,31 +1731,373 @@ class HarnessViewFrame(BaseFrame):
         self._canvas.bind("<MouseWheel>", self._on_zoom)
         self._canvas.bind("<Button-4>", self._on_zoom)
         self._canvas.bind("<Button-5>", self._on_zoom)
+        self._canvas.bind("<Configure>", lambda _: self._draw_view())
 
     def _on_move_press(self, event):
         self._canvas.scan_mark(event.x, event.y)
 
     def _on_move_drag(self, event):
         self._canvas.scan_dragto(event.x, event.y, gain=1)
+        self._draw_view()
+
+    def _on_xview(self, *args):
+        self._canvas.xview(*args)
+        self._draw_view()
+
+    def _on_yview(self, *args):
+        self._canvas.yview(*args)
+        self._draw_view()
 
     def _on_zoom(self, event):
-        if not self._image:
+        if not self._display:
             return
 
         if event.num == 4 or event.delta > 0:
-            self._scale *= 1.1
+            scale = self._scale * 1.1
         elif event.num == 5 or event.delta < 0:
-            self._scale /= 1.1
+            scale = self._scale / 1.1
+        else:
+            return
+
+        scale = min(max(scale, self._min_scale), self._max_scale)
+        if scale == self._scale:
+            return
+
+        # keep the point under the cursor where it is
+        x = self._canvas.canvasx(event.x) * scale / self._scale
+        y = self._canvas.canvasy(event.y) * scale / self._scale
+        self._scale = scale
+
+        size = self._update_scrollregion()
+        if size is not None:
+            self._canvas.xview_moveto((x - event.x) / size[0])
+            self._canvas.yview_moveto((y - event.y) / size[1])
+
+        if self._preview_id is None:
+            self._preview_id = self.after_idle(self._draw_preview)
+
+        if self._refine_id is not None:
+            self.after_cancel(self._refine_id)
+        self._refine_id = self.after(self._refine_ms, self._refine)
+
+        if self._settle_id is not None:
+            self.after_cancel(self._settle_id)
+        self._settle_id = self.after(self._settle_ms, self._on_zoom_settled)
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    def set_scale(self, scale: float):
+        """
+        Zoom to a scale, as if the wheel had been used.
+
+        :param scale: the scale relative to the default resolution
+        """
+        if scale == self._scale:
+            return
+
+        self._scale = scale
+        if not self._display:
+            # applied once the image has been decoded
+            return
 
         self._redraw()
 
+        if self._settle_id is not None:
+            self.after_cancel(self._settle_id)
+        self._settle_id = self.after(self._settle_ms, self._on_zoom_settled)
+
+    def _draw_preview(self):
+        self._preview_id = None
+        self._redraw(fast=True)
+
+    def _refine(self):
+        self._refine_id = None
+        self._draw_view(fast=False)
+
+    def _on_zoom_settled(self):
+        self._settle_id = None
+        if not self._display:
+            return
+
+        dpi = zoom_dpi(self._scale, self._image_size)
+        self._wanted_dpi = dpi
+
+        if dpi not in self._variant_data and dpi != DEFAULT_DPI:
+            if self._on_request_dpi is not None:
+                self._logger.debug(f"requesting a {dpi} dpi render")
+                self._on_request_dpi(dpi)
+            return
+
+        self._show_variant(dpi)
+
+    def _show_variant(self, dpi: int):
+        if dpi == DEFAULT_DPI:
+            pyramid = self._pyramid
+        elif dpi in self._variants:
+            pyramid = self._variants[dpi]
+        else:
+            # freed while the tab was hidden; shown once decoded again
+            self._decode_variant(dpi)
+            return
+
+        if pyramid is self._display:
+            return
+
+        self._set_display(pyramid, dpi)
+        self._redraw()
+
+    def _set_display(self, pyramid: ImagePyramid, dpi: int):
+        self._display = pyramid
+        self._display_dpi = dpi
+        self._scaled_tiles = {}
+        self._drawn_key = None
+
+        if not pyramid.ready:
+            # draw with the coarser levels as soon as they exist
+            self._poll_pyramid()
+
+    def _poll_pyramid(self):
+        self._pyramid_poll_id = None
+        if self._display is None:
+            return
+
+        if self._display.ready:
+            # coarser levels are available now
+            self._draw_view(force=True)
+        else:
+            self._pyramid_poll_id = self.after(50, self._poll_pyramid)
+
+    def add_variant(self, dpi: int, png_data: bytes):
+        """
+        Add a render of the current document at another resolution, and show
+        it if it suits the current zoom level.
+
+        :param dpi: the resolution the document was rendered at
+        :param png_data: the rendered image
+        """
+        if self._png_data is None:
+            return
+
+        self._variant_data[dpi] = png_data
+        if self._display is None:
+            # decoded along with the rest once the tab is shown
+            return
+
+        self._decode_variant(dpi)
+
+    def _decode_variant(self, dpi: int):
+        """Decode a variant in the background, and show it if it is wanted"""
+        png_data = self._variant_data[dpi]
+        if self._variant_decodes.get(dpi) is png_data:
+            return
+
+        def decode():
+            pyramid = self._decode(png_data)
+            pyramid.start()
+            return pyramid
+
+        def on_decoded(pyramid, error):
+            if self._variant_decodes.get(dpi) is png_data:
+                del self._variant_decodes[dpi]
+
+            if self._variant_data.get(dpi) is not png_data or self._display is None:
+                # superseded by a newer render, or freed again meanwhile
+                if pyramid is not None:
+                    pyramid.stop()
+                return
+
+            if error is not None:
+                self._logger.warning(f"could not load {dpi} dpi render: {error}")
+                del self._variant_data[dpi]
+                return
+
+            self._variants[dpi] = pyramid
+            self._charge_budget()
+            if dpi == self._wanted_dpi:
+                self._show_variant(dpi)
+
+        self._variant_decodes[dpi] = png_data
+        self._decode_in_background(decode, on_decoded)
+
+    @staticmethod
+    def _decode(png_data: bytes) -> ImagePyramid:
+        return ImagePyramid(Image.open(BytesIO(png_data)))
+
+    def _charge_budget(self):
+        pyramids = (self._pyramid, *self._variants.values())
+        image_budget.charge(
+            self, sum(p.estimated_bytes for p in pyramids if p is not None)
+        )
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    def set_visible(self, visible: bool):
+        """
+        Called as the tab is shown or hidden.  A hidden view frees its Tk
+        image and leaves its decoded images to the shared budget; a shown
+        view decodes them again in the background if they were freed.
+
+        :param visible: True if the tab is now shown
+        """
+        self._visible = visible
+
+        if not visible:
+            self._release_view()
+            image_budget.enforce()
+            return
+
+        image_budget.touch(self)
+        if self._display is not None:
+            self._redraw()
+        elif self._png_data is not None:
+            self._restore_images()
+
+    def release_images(self, keep_view: bool = False):
+        """
+        Free the decoded images, keeping the PNG data to decode again.
+
+        :param keep_view: leave what is drawn on the canvas, to be drawn over
+            once another image has been decoded
+        """
+        for pyramid in (self._pyramid, *self._variants.values()):
+            if pyramid is not None:
+                pyramid.stop()
+
+        self._image = None
+        self._pyramid = None
+        self._variants.clear()
+        self._display = None
+        if not keep_view:
+            self._release_view()
+        image_budget.release(self)
+
+    def _release_view(self):
+        self._scaled_tiles = {}
+        self._composite = None
+        self._view_image = None
+        self._drawn_box = None
+        self._drawn_key = None
+        if self._view_item is not None:
+            self._canvas.delete(self._view_item)
+            self._view_item = None
+
+    def _decode_in_background(self, decode: Callable, on_decoded: Callable):
+        """
+        Run ``decode`` on a thread of its own, so that large images do not
+        hold up the GUI.
+
+        :param decode: takes no arguments and returns the decoded images
+        :param on_decoded: called on the Tk thread with the result of
+            ``decode`` and None, or None and the exception it raised
+        """
+
+        def run():
+            try:
+                result, error = decode(), None
+            except Exception as e:
+                result, error = None, e
+            self._decoded.put((on_decoded, result, error))
+
+        self._decodes += 1
+        threading.Thread(target=run, name="wireviz-decode", daemon=True).start()
+        if self._decode_poll_id is None:
+            self._decode_poll_id = self.after(20, self._poll_decode)
+
+    def _poll_decode(self):
+        self._decode_poll_id = None
+        while True:
+            try:
+                on_decoded, result, error = self._decoded.get_nowait()
+            except queue.Empty:
+                break
+            self._decodes -= 1
+            on_decoded(result, error)
+
+        if self._decodes and self._decode_poll_id is None:
+            self._decode_poll_id = self.after(20, self._poll_decode)
+
+    def _restore_images(self):
+        """Decode the current render, and the variant on display, again"""
+        if self._restoring:
+            return
+
+        png_data = self._png_data
+        dpi = self._display_dpi
+        variant_data = self._variant_data.get(dpi) if dpi != DEFAULT_DPI else None
+
+        def decode():
+            pyramid = self._decode(png_data)
+            pyramid.build()
+            variant = None
+            if variant_data is not None:
+                variant = self._decode(variant_data)
+                variant.build()
+            return pyramid, variant
+
+        def on_decoded(result, error):
+            self._restoring = False
+            if png_data is not self._png_data:
+                # a newer render arrived in the meantime; decode that instead
+                if self._display is None and self._visible:
+                    self._restore_images()
+                return
+            if self._display is not None:
+                return
+
+            if error is not None:
+                self._logger.error(f"Error loading image: {error}")
+                self._release_view()
+                return
+
+            pyramid, variant = result
+            self._image = pyramid.image
+            self._pyramid = pyramid
+            display_dpi = dpi
+            if variant is not None:
+                self._variants[dpi] = variant
+            else:
+                display_dpi = DEFAULT_DPI
+
+            self._set_display(variant or pyramid, display_dpi)
+            self._charge_budget()
+            if self._visible:
+                self._redraw()
+                if self._settle_id is None:
+                    # e.g. a scale set while decoding may want a sharper render
+                    self._on_zoom_settled()
+
+        self._restoring = True
+        self._decode_in_background(decode, on_decoded)
+
     def has_image(self):
-        return self._image is not None
+        return self._image is not None or self._png_data is not None
+
+    def destroy(self):
+        for after_id in (
+            self._settle_id,
+            self._preview_id,
+            self._refine_id,
+            self._pyramid_poll_id,
+            self._decode_poll_id,
+        ):
+            if after_id is not None:
+                self.after_cancel(after_id)
+
+        self.release_images()
+        super().destroy()
 
     def save_image(self, filepath):
-        if self._image:
+        image = self._image
+        if image is None and self._png_data:
+            image = Image.open(BytesIO(self._png_data))
+
+        if image:
             try:
-                self._image.save(filepath)
+                image.save(filepath)
             except Exception as e:
                 self._logger.error(f"Error saving image: {e}")
                 showerror("Save Error", f"Could not save image:\n{e}")
@@ -844,10 +2106,14 @@ class HarnessViewFrame(BaseFrame):
         if not png_data:
             return
 
+        if png_data == self._png_data:
+            # an edit that did not change the diagram keeps the zoom level
+            return
+
         try:
-            self._image = Image.open(BytesIO(png_data))
-            self._scale = 1.0
-            self._redraw()
+            # only the header is read here; the pixels are decoded in the
+            # background once the tab is shown
+            image = Image.open(BytesIO(png_data))
         except Exception as e:
             self._logger.error(f"Error loading image: {e}")
             from tkinter.messagebox import showerror
@@ -856,29 +2122,162 @@ class HarnessViewFrame(BaseFrame):
                 "Graph Creation Error",
                 f"There was an error parsing the last request: {e}",
             )
-
-    def _redraw(self):
-        if not self._image:
             return
 
-        w, h = self._image.size
-        new_w = int(w * self._scale)
-        new_h = int(h * self._scale)
+        # the previous diagram stays on the canvas until this one is decoded
+        self.release_images(keep_view=self._visible)
+
+        self._png_data = png_data
+        self._variant_data.clear()
+        self._image_size = image.size
+        self._scale = 1.0
+        self._display_dpi = self._wanted_dpi = DEFAULT_DPI
+
+        if self._visible:
+            self._restore_images()
+
+    def set_status(self, text: Optional[str]):
+        """
+        Show a short status message, such as "rendering...", over the canvas.
+
+        :param text: the message to show, or None to clear it
+        """
+        self._status_text = text
+        self._draw_status()
+
+    def _draw_status(self):
+        self._canvas.delete("status")
+        if self._status_text:
+            x = self._canvas.canvasx(8)
+            y = self._canvas.canvasy(8)
+            self._canvas.create_text(
+                x,
+                y,
+                text=self._status_text,
+                anchor="nw",
+                fill="gray40",
+                font=("Arial", 12, "italic"),
+                tags="status",
+            )
+
+    def _display_factor(self) -> float:
+        # sizes are relative to the default resolution whichever render is shown
+        return self._scale * DEFAULT_DPI / self._display_dpi
+
+    def _update_scrollregion(self):
+        """:return: the size of the diagram at the current scale, if any"""
+        if not self._display:
+            return None
+
+        factor = self._display_factor()
+        w, h = self._display.size
+        new_w = int(w * factor)
+        new_h = int(h * factor)
 
         if new_w <= 0 or new_h <= 0:
+            return None
+
+        self._canvas.configure(scrollregion=(0, 0, new_w, new_h))
+        return new_w, new_h
+
+    def _redraw(self, fast: bool = False):
+        if self._update_scrollregion() is not None:
+            self._draw_view(fast=fast)
+
+    def _draw_view(self, fast: Optional[bool] = None, force: bool = False):
+        """
+        Draw the visible part of the diagram, plus a margin around it, as a
+        single image.  Nothing is drawn while the view stays within what was
+        drawn last, and tiles that remain in the region are not resized again.
+
+        :param fast: resize tiles with a cheap filter, to be redrawn properly
+            later; by default, only while a zoom is still in progress
+        :param force: redraw even if the view is still covered
+        """
+        if not self._display:
             return
 
+        if fast is None:
+            fast = self._refine_id is not None
+
+        canvas = self._canvas
+        view_w = max(canvas.winfo_width(), 1)
+        view_h = max(canvas.winfo_height(), 1)
+        view_x = int(canvas.canvasx(0))
+        view_y = int(canvas.canvasy(0))
+
+        factor = self._display_factor()
+        key = (self._display, factor)
+        drawn = self._drawn_box
+        covered = (
+            drawn is not None
+            and drawn[0] <= view_x
+            and drawn[1] <= view_y
+            and view_x + view_w <= drawn[2]
+            and view_y + view_h <= drawn[3]
+        )
+        # a high quality drawing serves a request for a fast one, not vice versa
+        if not force and covered and self._drawn_key in ((key, False), (key, fast)):
+            return
+
+        margin = self._view_margin
+        x0, y0 = view_x - margin, view_y - margin
+        width, height = view_w + 2 * margin, view_h + 2 * margin
+
         try:
-            resample = Image.Resampling.LANCZOS
+            resample = Image.Resampling.BILINEAR if fast else Image.Resampling.LANCZOS
         except AttributeError:
-            resample = Image.ANTIALIAS
+            resample = Image.BILINEAR if fast else Image.ANTIALIAS
+
+        composite = self._composite
+        if composite is None or composite.size != (width, height):
+            composite = self._composite = Image.new("RGB", (width, height), "white")
+        else:
+            composite.paste("white", (0, 0, width, height))
+
+        # keep the tiles that are still in the region; a pan only adds new ones
+        scaled_tiles = {}
+        region = (x0, y0, x0 + width, y0 + height)
+        for placement in self._display.visible_tiles(factor, region):
+            tile_key = (placement.level, placement.col, placement.row)
+            entry = self._scaled_tiles.get(tile_key)
+            if entry is None or entry[0] != placement or (entry[1] and not fast):
+                tile = self._display.tile(*tile_key)
+                if tile.size != (placement.width, placement.height):
+                    tile = tile.resize((placement.width, placement.height), resample)
+                entry = (placement, fast, tile)
+            scaled_tiles[tile_key] = entry
+
+            tile = entry[2]
+            composite.paste(
+                tile,
+                (placement.x - x0, placement.y - y0),
+                tile if tile.mode == "RGBA" else None,
+            )
+
+        self._scaled_tiles = scaled_tiles
+        self._drawn_box = region
+        self._drawn_key = (key, fast)
+
+        view_image = self._view_image
+        if view_image is None or (view_image.width(), view_image.height()) != (
+            width,
+            height,
+        ):
+            self._logger.debug(f"allocating a {width}x{height} view image")
+            self._view_image = ImageTk.PhotoImage(composite)
+            if self._view_item is None:
+                self._view_item = canvas.create_image(
+                    x0, y0, image=self._view_image, anchor="nw"
+                )
+            else:
+                canvas.itemconfigure(self._view_item, image=self._view_image)
+        else:
+            view_image.paste(composite)
 
-        resized = self._image.resize((new_w, new_h), resample)
-        self._tk_image = ImageTk.PhotoImage(resized)
+        canvas.coords(self._view_item, x0, y0)
 
-        self._canvas.delete("all")
-        self._canvas.create_image(0, 0, image=self._tk_image, anchor="nw")
-        self._canvas.configure(scrollregion=self._canvas.bbox("all"))
+        self._draw_status()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+# renders harness files for the command line; nothing here may import tkinter
+import concurrent.futures
+import glob
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from wireviz_gui.render import EXPORT_FORMATS, export_yaml, process_pool
+
+YAML_SUFFIXES = (".yaml", ".yml")
+
+
+class FileResult:
+    def __init__(
+        self,
+        path: Path,
+        seconds: float,
+        error: Optional[str] = None,
+        skipped: bool = False,
+    ):
+        """
+        :param skipped: True if the outputs were already current
+        """
+        self.path = path
+        self.seconds = seconds
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[Path]:
+    """
+    Turn the command line inputs into the harness files to render.
+
+    :param inputs: files, directories, which are searched recursively for
+        YAML files, or glob patterns, which may use ``**``
+    :return: the files, sorted and without duplicates
+    :raises FileNotFoundError: if an input matches nothing
+    """
+    paths = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths.update(
+                p
+                for p in path.rglob("*")
+                if p.suffix.lower() in YAML_SUFFIXES and p.is_file()
+            )
+        elif path.is_file():
+            paths.add(path)
+        else:
+            matches = [Path(p) for p in glob.glob(item, recursive=True)]
+            matches = [p for p in matches if p.is_file()]
+            if not matches:
+                raise FileNotFoundError(f"no files match {item}")
+            paths.update(matches)
+
+    return sorted(paths)
+
+
+def output_path(path: Path, output_dir: Optional[Path] = None) -> Path:
+    """
+    :param path: the harness file
+    :param output_dir: where the outputs go; next to the harness file if None
+    :return: the path to pass to :func:`wireviz_gui.render.export_yaml`
+    """
+    return (Path(output_dir) if output_dir is not None else path.parent) / path.name
+
+
+def output_dirs(
+    paths: Sequence[Path], output_dir: Optional[Path] = None
+) -> Dict[Path, Optional[Path]]:
+    """
+    :param paths: the harness files
+    :param output_dir: where the outputs go; next to each harness file if None
+    :return: the output directory of each file, mirroring the directories the
+        files are in below their common parent, so that files of the same
+        name in different directories do not overwrite each other's outputs
+    """
+    if output_dir is None:
+        return {path: None for path in paths}
+
+    parents = {path: Path(path).resolve().parent for path in paths}
+    try:
+        root = Path(os.path.commonpath(list(parents.values()))) if paths else None
+    except ValueError:
+        # on different drives; collisions are left to render_files()
+        return {path: Path(output_dir) for path in paths}
+
+    return {
+        path: Path(output_dir) / parent.relative_to(root)
+        for path, parent in parents.items()
+    }
+
+
+def output_key(path: Path, output_dir: Optional[Path] = None) -> str:
+    """
+    :param path: the harness file
+    :param output_dir: where the outputs go; next to the harness file if None
+    :return: the same for every file whose outputs would overwrite each
+        other's, such as ``h.yaml`` and ``h.yml``
+    """
+    stem = output_path(Path(path), output_dir).with_suffix("")
+    return os.path.normcase(os.path.abspath(stem))
+
+
+def output_collisions(
+    paths: Sequence[Path], dirs: Dict[Path, Optional[Path]]
+) -> Dict[Path, Path]:
+    """
+    :param paths: the harness files, in order of precedence
+    :param dirs: the output directory of each file, as from :func:`output_dirs`
+    :return: each file whose outputs would overwrite those of an earlier
+        one, with that earlier file
+    """
+    owners = {}
+    collisions = {}
+    for path in paths:
+        owner = owners.setdefault(output_key(path, dirs[path]), path)
+        if owner != path:
+            collisions[path] = owner
+    return collisions
+
+
+def render_file(
+    path: Path,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    output_dir: Optional[Path] = None,
+    force: bool = False,
+) -> FileResult:
+    """
+    Normalize and render one harness file, as the GUI's export would.
+
+    :param path: the harness file
+    :param formats: any of "png", "svg", "html" and "tsv"
+    :param output_dir: where the outputs go; next to the harness file if None
+    :param force: render even if the export manifest shows the outputs are
+        current
+    :return: the time taken, and the error if the render failed
+    """
+    start = time.perf_counter()
+    try:
+        yaml_input = Path(path).read_text(encoding="utf-8")
+    except Exception as e:
+        return FileResult(path, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+    result = export_text(
+        yaml_input, output_path(Path(path), output_dir), formats, force
+    )
+    result.path = path
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def export_text(
+    yaml_input: str,
+    path: Path,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    force: bool = False,
+) -> FileResult:
+    """
+    Normalize and render YAML text, such as that of a GUI tab; the
+    counterpart of :func:`render_file` for text that is not in a file.
+
+    :param yaml_input: the YAML text of the harness
+    :param path: the output path; the suffix is replaced for each format
+    :return: the result, for ``path``
+    """
+    start = time.perf_counter()
+    try:
+        written = export_yaml(yaml_input, path, formats, force=force)
+    except Exception as e:
+        return FileResult(path, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+    return FileResult(path, time.perf_counter() - start, skipped=not written)
+
+
+def render_files(
+    paths: Sequence[Path],
+    formats: Sequence[str] = EXPORT_FORMATS,
+    output_dir: Optional[Path] = None,
+    jobs: int = 1,
+    force: bool = False,
+) -> Iterator[FileResult]:
+    """
+    Render harness files, in parallel across ``jobs`` processes.
+
+    With ``output_dir``, the outputs mirror the directories the files are
+    in; see :func:`output_dirs`.  A file whose outputs would overwrite those
+    of an earlier one, such as ``h.yaml`` next to ``h.yml``, fails.
+
+    :return: the results, in the order the renders finish
+    """
+    dirs = output_dirs(paths, output_dir)
+    collisions = output_collisions(paths, dirs)
+    kept = []
+    for path in paths:
+        if path in collisions:
+            error = f"its outputs would overwrite those of {collisions[path]}"
+            yield FileResult(path, 0.0, error)
+            continue
+
+        kept.append(path)
+        if dirs[path] is not None:
+            dirs[path].mkdir(parents=True, exist_ok=True)
+    paths = kept
+
+    if jobs <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield render_file(path, formats, dirs[path], force)
+        return
+
+    with process_pool(min(jobs, len(paths))) as executor:
+        futures = [
+            executor.submit(render_file, path, formats, dirs[path], force)
+            for path in paths
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def _canonical(obj):
+    """
+    Convert parsed YAML into a structure that serializes identically regardless
+    of key order.  Keys are tagged with their JSON representation so that
+    ``1`` and ``"1"`` remain distinct keys.
+    """
+    if isinstance(obj, dict):
+        items = [
+            (json.dumps(_canonical(k), default=str), _canonical(v))
+            for k, v in obj.items()
+        ]
+        items.sort(key=lambda kv: kv[0])
+        return ["{}", items]
+
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(item) for item in obj]
+
+    return obj
+
+
+def canonical_hash(data) -> str:
+    """
+    Hash parsed (and normalized) YAML data.
+
+    Two documents that differ only in key order, comments or formatting
+    produce the same hash.
+
+    :param data: the parsed YAML data
+    :return: the hex digest
+    """
+    serialized = json.dumps(
+        _canonical(data), default=str, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by a byte budget.
+
+    Callers supply the size of each entry; entries are evicted oldest-first
+    until the total fits the budget.  Hit, miss and eviction counters are kept
+    for diagnostics, see :meth:`stats`.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, loglevel=logging.INFO):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int):
+        if size > self._max_bytes:
+            self._logger.debug(
+                f"not caching {size} byte entry; budget is {self._max_bytes} bytes"
+            )
+            return
+
+        with self._lock:
+            if key in self._entries:
+                _, old_size = self._entries.pop(key)
+                self._bytes -= old_size
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while self._bytes > self._max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
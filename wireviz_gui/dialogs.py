@@ -2,8 +2,9 @@ import logging
 import tkinter as tk
 import tkinter.ttk as ttk
 import webbrowser
+from tkinter.filedialog import askdirectory
 from tkinter.messagebox import showerror
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Sequence, Tuple
 
 from wireviz.wireviz import Harness
 from wireviz.wv_colors import _color_full
@@ -75,6 +76,183 @@ class AboutFrame(BaseFrame):
         )
 
 
+class ProgressFrame(BaseFrame):
+    """
+    Shows the progress of work running in the background, such as opening or
+    exporting many files, with an optional button to cancel it.
+    """
+
+    def __init__(
+        self,
+        parent,
+        title: str,
+        maximum: int,
+        on_cancel: Optional[Callable] = None,
+        loglevel=logging.INFO,
+    ):
+        super().__init__(parent, loglevel=loglevel)
+
+        r = 0
+        HeadLabel(self, text=title).grid(row=r, column=0, sticky="ew", padx=8)
+
+        r += 1
+        self._progress_bar = ttk.Progressbar(
+            self, orient="horizontal", length=320, maximum=max(maximum, 1)
+        )
+        self._progress_bar.grid(row=r, column=0, sticky="ew", padx=8, pady=4)
+
+        r += 1
+        self._status_label = NormLabel(self, text="", anchor="w")
+        self._status_label.grid(row=r, column=0, sticky="ew", padx=8)
+
+        if on_cancel:
+            r += 1
+            NormButton(self, text="Cancel", command=on_cancel).grid(
+                row=r, column=0, pady=4
+            )
+
+    def set_progress(self, done: int, text: str = "", maximum: Optional[int] = None):
+        """
+        :param done: how many of the items are finished
+        :param text: a short description of the progress
+        :param maximum: the number of items, if it has changed
+        """
+        if maximum is not None:
+            self._progress_bar.configure(maximum=max(maximum, 1))
+        self._progress_bar.configure(value=done)
+        self._status_label.configure(text=text)
+
+
+class ExportTabsFrame(BaseFrame):
+    """
+    Chooses which tabs to export, and the directory to export them into.
+    """
+
+    def __init__(
+        self,
+        parent,
+        titles: Sequence[str],
+        on_export: Callable[[List[int], str, bool], None],
+        loglevel=logging.INFO,
+    ):
+        """
+        :param titles: the title of each tab
+        :param on_export: called with the indices of the chosen tabs, the
+            directory and whether to export even if the outputs are current
+        """
+        super().__init__(parent, loglevel=loglevel)
+
+        self._on_export = on_export
+
+        r = 0
+        HeadLabel(self, text="Export Tabs").grid(
+            row=r, column=0, columnspan=3, sticky="ew"
+        )
+
+        r += 1
+        tabs_frame = tk.Frame(self)
+        tabs_frame.grid(row=r, column=0, columnspan=3, sticky="ew", padx=8)
+        self._tab_vars = []
+        for i, title in enumerate(titles):
+            var = tk.BooleanVar(value=True)
+            ttk.Checkbutton(tabs_frame, text=title, variable=var).grid(
+                row=i // 2, column=i % 2, sticky="w", padx=4
+            )
+            self._tab_vars.append(var)
+
+        r += 1
+        NormButton(self, text="All", command=lambda: self._select(True)).grid(
+            row=r, column=0, sticky="ew"
+        )
+        NormButton(self, text="None", command=lambda: self._select(False)).grid(
+            row=r, column=1, sticky="ew"
+        )
+
+        r += 1
+        NormLabel(self, text="Directory:").grid(row=r, column=0, sticky="e")
+        self._directory_entry = tk.Entry(self, width=40)
+        self._directory_entry.grid(row=r, column=1, sticky="ew")
+        NormButton(self, text="Browse...", command=self._browse).grid(
+            row=r, column=2, sticky="ew"
+        )
+
+        r += 1
+        self._force_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self, text="Export even if up to date", variable=self._force_var
+        ).grid(row=r, column=1, sticky="w")
+
+        r += 1
+        NormButton(self, text="Export", command=self._export).grid(
+            row=r, column=0, columnspan=3, sticky="ew"
+        )
+
+    def _select(self, selected: bool):
+        for var in self._tab_vars:
+            var.set(selected)
+
+    def _browse(self):
+        directory = askdirectory(title="Export Into")
+        if directory:
+            self._directory_entry.delete(0, "end")
+            self._directory_entry.insert(0, directory)
+
+    def _export(self):
+        chosen = [i for i, var in enumerate(self._tab_vars) if var.get()]
+        directory = self._directory_entry.get().strip()
+
+        if not chosen:
+            showerror("Invalid Entry", "Choose at least one tab")
+            return
+        if not directory:
+            showerror("Invalid Entry", "Choose a directory to export into")
+            return
+
+        self._on_export(chosen, directory, self._force_var.get())
+
+
+class ExportResultsFrame(BaseFrame):
+    """Lists how the export of each tab went"""
+
+    def __init__(
+        self,
+        parent,
+        results: Sequence[Tuple[str, str, str]],
+        on_close: Optional[Callable] = None,
+        loglevel=logging.INFO,
+    ):
+        """
+        :param results: the tab, the outcome and details such as the time
+            taken or the error, for each exported tab
+        """
+        super().__init__(parent, loglevel=loglevel)
+
+        r = 0
+        HeadLabel(self, text="Export Results").grid(row=r, column=0, sticky="ew")
+
+        r += 1
+        columns = ("tab", "result", "details")
+        tree = ttk.Treeview(
+            self, columns=columns, show="headings", height=min(len(results), 20)
+        )
+        for column, width in zip(columns, (200, 100, 360)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor="w")
+        for row in results:
+            tree.insert("", "end", values=row)
+        tree.grid(row=r, column=0, sticky="news", padx=8, pady=4)
+
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=tree.yview)
+        scrollbar.grid(row=r, column=1, sticky="ns")
+        tree.configure(yscrollcommand=scrollbar.set)
+
+        if on_close:
+            r += 1
+            NormButton(self, text="Close", command=on_close).grid(
+                row=r, column=0, pady=4
+            )
+
+
 class AddConnectorFrame(BaseFrame):
     def __init__(
         self,
@@ -0,0 +1,248 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import graphviz
+import wireviz
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    png BLOB,
+    svg BLOB,
+    summary TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS renders_last_used ON renders (last_used);
+"""
+
+
+def default_cache_dir() -> Path:
+    """
+    The per-user cache directory, which may be overridden using the
+    ``WIREVIZ_GUI_CACHE_DIR`` environment variable.
+    """
+    override = os.environ.get("WIREVIZ_GUI_CACHE_DIR")
+    if override:
+        return Path(override)
+
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(base) / "wireviz-gui"
+
+
+@functools.lru_cache(maxsize=None)
+def tool_versions() -> str:
+    """
+    The wireviz and graphviz versions, which are part of every disk cache key
+    so that upgrading either tool never serves stale renders.
+    """
+    try:
+        graphviz_version = ".".join(str(v) for v in graphviz.version())
+    except Exception:
+        graphviz_version = "unknown"
+
+    return f"wireviz {wireviz.__version__}; graphviz {graphviz_version}"
+
+
+def harness_summary(harness) -> dict:
+    """
+    A JSON-serializable summary of a harness, stored alongside the rendered
+    output for diagnostics and for tools that do not need the full model.
+    """
+    return {
+        "connectors": {
+            name: {"type": connector.type, "pincount": connector.pincount}
+            for name, connector in harness.connectors.items()
+        },
+        "cables": {
+            name: {"type": cable.type, "wirecount": cable.wirecount}
+            for name, cable in harness.cables.items()
+        },
+        "mates": len(harness.mates),
+        "additional_bom_items": len(harness.additional_bom_items),
+    }
+
+
+class DiskRenderCache:
+    """
+    Rendered output persisted in a SQLite database in WAL mode.
+
+    The database may be shared by several wireviz-gui processes on the same
+    machine; SQLite's locking serializes the writers and readers never block.
+    Entries are keyed on a content hash plus :func:`tool_versions` and are
+    evicted least-recently-used first once the stored output exceeds
+    ``max_bytes``.
+
+    Any database error is logged and treated as a cache miss, so that a
+    broken or locked cache never prevents rendering.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        loglevel=logging.INFO,
+    ):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._local = threading.local()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def key(self, content_hash: str) -> str:
+        versioned = f"{content_hash}\n{tool_versions()}"
+        return hashlib.sha256(versioned.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+
+        return connection
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        """
+        :param content_hash: the hash of the rendered content
+        :return: a dict with ``png``, ``svg`` and ``summary`` keys, or None
+        """
+        key = self.key(content_hash)
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT png, svg, summary FROM renders WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE renders SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        except (sqlite3.Error, OSError) as e:
+            self._logger.warning(f"render cache at {self._path} unavailable: {e}")
+            return None
+
+        png, svg, summary = row
+        return {
+            "png": png,
+            "svg": svg.decode("utf-8") if svg is not None else None,
+            "summary": json.loads(summary) if summary else None,
+        }
+
+    def put(
+        self,
+        content_hash: str,
+        png: Optional[bytes] = None,
+        svg: Optional[str] = None,
+        summary: Optional[dict] = None,
+    ):
+        """
+        Store rendered output.  Formats that are not given keep any value that
+        is already stored, so PNG and SVG renders may arrive separately.
+        """
+        key = self.key(content_hash)
+        svg_data = svg.encode("utf-8") if svg is not None else None
+        summary_data = json.dumps(summary) if summary is not None else None
+        now = time.time()
+
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    """
+                    INSERT INTO renders (key, png, svg, summary, size, created, last_used)
+                    VALUES (?, ?, ?, ?, 0, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        png = COALESCE(excluded.png, png),
+                        svg = COALESCE(excluded.svg, svg),
+                        summary = COALESCE(excluded.summary, summary),
+                        last_used = excluded.last_used
+                    """,
+                    (key, png, svg_data, summary_data, now, now),
+                )
+                connection.execute(
+                    """
+                    UPDATE renders SET size = IFNULL(LENGTH(png), 0)
+                        + IFNULL(LENGTH(svg), 0) + IFNULL(LENGTH(summary), 0)
+                    WHERE key = ?
+                    """,
+                    (key,),
+                )
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, OSError) as e:
+            self._logger.warning(f"could not write render cache at {self._path}: {e}")
+
+    def _evict(self, connection: sqlite3.Connection):
+        (total,) = connection.execute(
+            "SELECT IFNULL(SUM(size), 0) FROM renders"
+        ).fetchone()
+        if total <= self._max_bytes:
+            return
+
+        evicted = 0
+        rows = connection.execute(
+            "SELECT key, size FROM renders ORDER BY last_used ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self._max_bytes:
+                break
+            connection.execute("DELETE FROM renders WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        self._logger.debug(f"evicted {evicted} renders from {self._path}")
+
+    def clear(self):
+        try:
+            self._connection().execute("DELETE FROM renders")
+        except (sqlite3.Error, OSError) as e:
+            self._logger.warning(f"could not clear render cache at {self._path}: {e}")
+
+    def stats(self) -> dict:
+        try:
+            entries, total = (
+                self._connection()
+                .execute("SELECT COUNT(*), IFNULL(SUM(size), 0) FROM renders")
+                .fetchone()
+            )
+        except (sqlite3.Error, OSError) as e:
+            self._logger.debug(f"could not read render cache at {self._path}: {e}")
+            entries, total = 0, 0
+
+        return {
+            "path": str(self._path),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self._max_bytes,
+        }
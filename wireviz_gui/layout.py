@@ -0,0 +1,298 @@
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from graphviz import CalledProcessError, ExecutableNotFound
+
+try:
+    import pygraphviz
+except ImportError:
+    pygraphviz = None
+
+DOT_BINARY = "dot"
+
+LAYOUT_BACKENDS = ("auto", "pygraphviz", "subprocess")
+
+_logger = logging.getLogger(__name__)
+
+
+class RenderCancelled(Exception):
+    """Raised when a render is abandoned because a newer one superseded it"""
+
+
+class Cancellation:
+    """
+    Cancels a render from another thread.
+
+    If the render is waiting on graphviz, the ``dot`` process is killed
+    immediately rather than being left to finish a layout nobody will see.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            process = self._process
+
+        if process is not None and process.poll() is None:
+            _logger.debug(f"killing superseded graphviz process {process.pid}")
+            process.kill()
+
+    def check(self):
+        """:raises RenderCancelled: if the render has been cancelled"""
+        if self._cancelled:
+            raise RenderCancelled()
+
+    def _attach(self, process: subprocess.Popen):
+        with self._lock:
+            self._process = process
+            cancelled = self._cancelled
+
+        if cancelled:
+            process.kill()
+
+    def _detach(self):
+        with self._lock:
+            self._process = None
+
+
+def _startupinfo():
+    # keep a console window from flashing up for every render on Windows
+    if sys.platform != "win32":
+        return None
+
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+def run_dot(
+    source: str,
+    fmt: str,
+    args: Sequence[str] = (),
+    cancel: Optional[Cancellation] = None,
+) -> bytes:
+    """
+    Lay out and render DOT source using the graphviz ``dot`` executable.
+
+    :param source: the DOT source
+    :param fmt: the graphviz output format, such as "png" or "svg"
+    :param args: additional command line arguments for ``dot``
+    :param cancel: kills the process when cancelled from another thread
+    :return: the rendered output
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    :raises ExecutableNotFound: if graphviz is not installed
+    """
+    return _run([DOT_BINARY, f"-T{fmt}", *args], source, cancel)
+
+
+def run_dot_formats(
+    source: str,
+    outputs: Dict[str, Path],
+    args: Sequence[str] = (),
+    cancel: Optional[Cancellation] = None,
+):
+    """
+    Lay out DOT source once and render it to several formats, using a single
+    ``dot`` process with a ``-T``/``-o`` pair for each.
+
+    :param source: the DOT source
+    :param outputs: the file to write for each graphviz output format
+    :param args: additional command line arguments for ``dot``
+    :param cancel: kills the process when cancelled from another thread
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    :raises ExecutableNotFound: if graphviz is not installed
+    """
+    cmd = [DOT_BINARY, *args]
+    for fmt, path in outputs.items():
+        cmd += [f"-T{fmt}", f"-o{path}"]
+
+    _run(cmd, source, cancel)
+
+
+def _run(cmd: Sequence[str], source: str, cancel: Optional[Cancellation]) -> bytes:
+    if cancel is not None:
+        cancel.check()
+
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            startupinfo=_startupinfo(),
+        )
+    except FileNotFoundError as e:
+        raise ExecutableNotFound(cmd) from e
+
+    if cancel is not None:
+        cancel._attach(process)
+
+    try:
+        out, err = process.communicate(source.encode("utf-8"))
+    finally:
+        if cancel is not None:
+            cancel._detach()
+
+    if cancel is not None:
+        cancel.check()
+
+    if process.returncode != 0:
+        raise CalledProcessError(process.returncode, cmd, output=out, stderr=err)
+
+    return out
+
+
+class SubprocessLayout:
+    """Runs a new ``dot`` process for every render"""
+
+    name = "subprocess"
+
+    def render(
+        self,
+        source: str,
+        fmt: str,
+        dpi: Optional[int] = None,
+        cancel: Optional[Cancellation] = None,
+    ) -> bytes:
+        args = [f"-Gdpi={dpi}"] if dpi else []
+        return run_dot(source, fmt, args=args, cancel=cancel)
+
+    def render_formats(
+        self,
+        source: str,
+        formats: Sequence[str],
+        dpi: Optional[int] = None,
+        cancel: Optional[Cancellation] = None,
+    ) -> Dict[str, bytes]:
+        """
+        Lay out once and render to each of ``formats``.
+
+        :return: the output for each format
+        """
+        args = [f"-Gdpi={dpi}"] if dpi else []
+        with tempfile.TemporaryDirectory(prefix="wireviz-gui-") as tmp:
+            outputs = {fmt: Path(tmp) / f"graph.{fmt}" for fmt in formats}
+            run_dot_formats(source, outputs, args=args, cancel=cancel)
+            return {fmt: path.read_bytes() for fmt, path in outputs.items()}
+
+
+class PygraphvizLayout:
+    """
+    Lays out and renders within this process using the graphviz libraries
+    through pygraphviz (1.7 or later), which avoids starting a ``dot`` process
+    for every render; on small harnesses that start up dominates the total
+    render time.
+
+    The graphviz libraries are not thread safe, so renders are serialized.
+    A render in progress cannot be interrupted; a cancelled render is
+    abandoned once it returns.  Should the library fail, the render is
+    retried through a ``dot`` process.
+    """
+
+    name = "pygraphviz"
+
+    _lock = threading.Lock()
+
+    def __init__(self):
+        if pygraphviz is None:
+            raise RuntimeError("pygraphviz is not installed")
+
+        self._fallback = SubprocessLayout()
+
+    def render(
+        self,
+        source: str,
+        fmt: str,
+        dpi: Optional[int] = None,
+        cancel: Optional[Cancellation] = None,
+    ) -> bytes:
+        if cancel is not None:
+            cancel.check()
+
+        try:
+            output = self._draw(source, [fmt], dpi)[fmt]
+        except Exception as e:
+            _logger.warning(f"pygraphviz render failed, running dot instead: {e}")
+            return self._fallback.render(source, fmt, dpi=dpi, cancel=cancel)
+
+        if cancel is not None:
+            cancel.check()
+
+        return output
+
+    def render_formats(
+        self,
+        source: str,
+        formats: Sequence[str],
+        dpi: Optional[int] = None,
+        cancel: Optional[Cancellation] = None,
+    ) -> Dict[str, bytes]:
+        """
+        Lay out once and render to each of ``formats``.
+
+        :return: the output for each format
+        """
+        if cancel is not None:
+            cancel.check()
+
+        try:
+            outputs = self._draw(source, formats, dpi)
+        except Exception as e:
+            _logger.warning(f"pygraphviz render failed, running dot instead: {e}")
+            return self._fallback.render_formats(
+                source, formats, dpi=dpi, cancel=cancel
+            )
+
+        if cancel is not None:
+            cancel.check()
+
+        return outputs
+
+    def _draw(
+        self, source: str, formats: Sequence[str], dpi: Optional[int]
+    ) -> Dict[str, bytes]:
+        with self._lock:
+            graph = pygraphviz.AGraph(string=source)
+            try:
+                if dpi:
+                    graph.graph_attr["dpi"] = str(dpi)
+                graph.layout(prog="dot")
+                return {fmt: graph.draw(format=fmt) for fmt in formats}
+            finally:
+                graph.close()
+
+
+def get_layout_backend(name: str = "auto", concurrent: bool = False):
+    """
+    :param name: one of :data:`LAYOUT_BACKENDS`; "auto" prefers pygraphviz
+        and falls back to running ``dot`` when it is not installed
+    :param concurrent: True if this process renders on several threads at
+        once, as the GUI does; "auto" then runs ``dot``, since pygraphviz
+        renders one at a time and cannot be cancelled
+    :return: the layout backend
+    """
+    if name not in LAYOUT_BACKENDS:
+        raise ValueError(f"unknown layout backend {name!r}")
+
+    if name == "pygraphviz" or (name == "auto" and not concurrent):
+        try:
+            return PygraphvizLayout()
+        except RuntimeError as e:
+            if name == "pygraphviz":
+                _logger.warning(f"{e}; falling back to running dot")
+
+    return SubprocessLayout()
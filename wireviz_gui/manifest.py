@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from wireviz_gui import __version__
+from wireviz_gui.disk_cache import tool_versions
+
+# bumped whenever the layout of the manifest changes
+MANIFEST_VERSION = 1
+
+_OUTPUT_SUFFIXES = {
+    "png": ".png",
+    "svg": ".svg",
+    "html": ".html",
+    "tsv": ".bom.tsv",
+}
+
+_logger = logging.getLogger(__name__)
+
+
+def output_files(path: Path, formats: Sequence[str]) -> Dict[str, Path]:
+    """
+    :param path: the output path passed to the export
+    :param formats: any of "png", "svg", "html" and "tsv"
+    :return: the file written for each format
+    """
+    filename = Path(path).parent / Path(path).stem
+    return {fmt: Path(f"{filename}{_OUTPUT_SUFFIXES[fmt]}") for fmt in formats}
+
+
+def manifest_path(path: Path) -> Path:
+    """:return: where the manifest of an export to ``path`` is kept"""
+    return Path(path).parent / f"{Path(path).stem}.manifest.json"
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def current_tools() -> str:
+    return f"wireviz-gui {__version__}; {tool_versions()}"
+
+
+class ExportManifest:
+    """
+    Records what an export was made from, so that exporting the same harness
+    to the same path again can be skipped: the hash of the normalized input,
+    the versions of the tools, and the hash of each output file.
+    """
+
+    def __init__(self, input_hash: str, tools: str, outputs: Dict[str, str]):
+        """
+        :param input_hash: the canonical hash of the normalized YAML data
+        :param tools: the versions of wireviz-gui, wireviz and graphviz
+        :param outputs: the hash of each output file, keyed on its format
+        """
+        self.input_hash = input_hash
+        self.tools = tools
+        self.outputs = outputs
+
+    @classmethod
+    def read(cls, path: Path) -> Optional["ExportManifest"]:
+        """
+        :param path: the output path passed to the export
+        :return: the manifest of the last export to ``path``, or None if there
+            is none or it cannot be read
+        """
+        try:
+            data = json.loads(manifest_path(path).read_text(encoding="utf-8"))
+            if data["version"] != MANIFEST_VERSION:
+                return None
+            return cls(data["input"], data["tools"], dict(data["outputs"]))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            _logger.debug(f"no usable manifest for {path}: {e}")
+            return None
+
+    @classmethod
+    def record(
+        cls, path: Path, formats: Sequence[str], input_hash: str, tools: str
+    ) -> "ExportManifest":
+        """Hash the output files of an export that has just finished"""
+        outputs = {
+            fmt: file_hash(file) for fmt, file in output_files(path, formats).items()
+        }
+        return cls(input_hash, tools, outputs)
+
+    def write(self, path: Path):
+        data = {
+            "version": MANIFEST_VERSION,
+            "input": self.input_hash,
+            "tools": self.tools,
+            "outputs": self.outputs,
+        }
+        manifest_path(path).write_text(
+            json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+
+    def is_current(
+        self, path: Path, formats: Sequence[str], input_hash: str, tools: str
+    ) -> bool:
+        """
+        :return: True if the outputs of ``formats`` were exported from the same
+            input with the same tools, and none of them has changed since
+        """
+        if self.input_hash != input_hash or self.tools != tools:
+            return False
+
+        for fmt, file in output_files(path, formats).items():
+            try:
+                if self.outputs.get(fmt) != file_hash(file):
+                    return False
+            except OSError:
+                return False
+
+        return True
@@ -18,8 +18,13 @@ class Menu(BaseMenu):
         reload_file: Callable,
         about: Callable,
         new_file: Optional[Callable] = None,
+        open_files: Optional[Callable] = None,
+        open_folder: Optional[Callable] = None,
+        export_tabs: Optional[Callable] = None,
         load_example: Optional[Callable] = None,
         close_tab: Optional[Callable] = None,
+        live_preview: Optional[Callable] = None,
+        live_preview_var=None,
         examples: Optional[dict] = None,
         loglevel=logging.INFO,
         **kwargs,
@@ -38,8 +43,13 @@ class Menu(BaseMenu):
                 refresh=refresh,
                 reload_file=reload_file,
                 new_file=new_file,
+                open_files=open_files,
+                open_folder=open_folder,
+                export_tabs=export_tabs,
                 load_example=load_example,
                 close_tab=close_tab,
+                live_preview=live_preview,
+                live_preview_var=live_preview_var,
                 examples=examples,
             ),
         )
@@ -58,8 +68,13 @@ class FileMenu(BaseMenu):
         refresh: Callable,
         reload_file: Callable,
         new_file: Optional[Callable] = None,
+        open_files: Optional[Callable] = None,
+        open_folder: Optional[Callable] = None,
+        export_tabs: Optional[Callable] = None,
         load_example: Optional[Callable] = None,
         close_tab: Optional[Callable] = None,
+        live_preview: Optional[Callable] = None,
+        live_preview_var=None,
         examples: Optional[dict] = None,
         loglevel=logging.INFO,
         **kwargs,
@@ -70,6 +85,10 @@ class FileMenu(BaseMenu):
             self.add_command(label="New (CTRL+N)", command=lambda: new_file())
 
         self.add_command(label="Open (CTRL+O)", command=lambda: open_file())
+        if open_files:
+            self.add_command(label="Open Files...", command=lambda: open_files())
+        if open_folder:
+            self.add_command(label="Open Folder...", command=lambda: open_folder())
         self.add_separator()
         self.add_command(label="Save (CTRL+S)", command=lambda: save())
         self.add_command(label="Save As...", command=lambda: save_as())
@@ -82,6 +101,10 @@ class FileMenu(BaseMenu):
         export_menu.add_command(
             label="All Formats (PNG, SVG, HTML)...", command=lambda: export_all()
         )
+        if export_tabs:
+            export_menu.add_command(
+                label="All Formats of Several Tabs...", command=lambda: export_tabs()
+            )
         self.add_cascade(label="Export", menu=export_menu)
 
         if examples and load_example:
@@ -96,6 +119,13 @@ class FileMenu(BaseMenu):
         self.add_command(label="Refresh Image (CTRL+L)", command=lambda: refresh())
         self.add_command(label="Reload File (CTRL+R)", command=lambda: reload_file())
 
+        if live_preview and live_preview_var is not None:
+            self.add_checkbutton(
+                label="Live Preview",
+                variable=live_preview_var,
+                command=lambda: live_preview(),
+            )
+
         if close_tab:
             self.add_separator()
             self.add_command(label="Close Tab (CTRL+W)", command=lambda: close_tab())
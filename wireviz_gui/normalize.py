@@ -0,0 +1,112 @@
+def preprocess_yaml_data(data):
+    """
+    Preprocess the YAML data to handle compatibility issues and normalize connections.
+    - Moves 'label' from cables to 'notes' (compatibility fix).
+    - Resolves 'Connector.Pin' syntax in connections to {Connector: Pin} (syntax fix).
+    - Flattens nested dictionary connections (star topology).
+
+    This runs before every render, so it makes a single pass over the
+    connections.  Each connection is a new list, as YAML aliases may share
+    one list between several connections.  ``data`` is modified.
+
+    The result is not cached per connection between revisions: a cached
+    connection would still have to be looked up by its contents and the
+    connectors it names, and copied, as wireviz modifies it, which takes
+    longer than normalizing it again.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    # Fix: Handle Cable labels by moving them to notes
+    cables = data.get("cables")
+    if isinstance(cables, dict):
+        for cable_data in cables.values():
+            if isinstance(cable_data, dict) and "label" in cable_data:
+                label = cable_data.pop("label")
+                if "notes" in cable_data:
+                    cable_data["notes"] = str(cable_data["notes"]) + "\n" + str(label)
+                else:
+                    cable_data["notes"] = str(label)
+
+    connections = data.get("connections")
+    if not isinstance(connections, list):
+        return data
+
+    # Get known connectors (designators) to support Connector.Pin syntax
+    connectors = data.get("connectors")
+    known_connectors = connectors if isinstance(connectors, dict) else {}
+    parse_node = _node_parser(known_connectors)
+
+    new_connections = []
+    append = new_connections.append
+
+    for conn in connections:
+        if isinstance(conn, list):
+            # Check for Connector.Pin syntax in its items
+            append([parse_node(item) for item in conn])
+            continue
+
+        if not isinstance(conn, dict):
+            append(conn)
+            continue
+
+        # only the first entry of the mapping is used
+        for start_node, value in conn.items():
+            break
+        else:
+            continue
+
+        if not isinstance(value, list):
+            append([parse_node(start_node), parse_node(value)])
+            continue
+
+        for item in value:
+            if isinstance(item, dict):
+                p = [parse_node(start_node)]
+                for k, v in item.items():
+                    p.append(parse_node(v))
+                    p.append(parse_node(k))
+                    break
+            else:
+                p = [parse_node(start_node), parse_node(item)]
+            append(p)
+
+    data["connections"] = new_connections
+    return data
+
+
+def _node_parser(known_connectors):
+    """
+    :param known_connectors: the designators that ``Connector.Pin`` may refer to
+    :return: a function turning a node into the form wireviz understands,
+        returning the node itself if it needs no change
+    """
+    # the designator and pin of each node string seen, or None if it is not
+    # Connector.Pin; the same nodes come up again and again
+    splits = {}
+
+    def parse_node(node):
+        if not isinstance(node, str) or "." not in node:
+            return node
+
+        try:
+            split = splits[node]
+        except KeyError:
+            designator, _, pin = node.partition(".")
+            if "." not in pin and designator in known_connectors:
+                split = (designator, pin)
+            else:
+                split = None
+            splits[node] = split
+
+        if split is None:
+            return node
+
+        # a new mapping each time, as wireviz may modify it
+        return {split[0]: split[1]}
+
+    return parse_node
+
+
+# Alias for backward compatibility if needed, though mostly internal
+normalize_connections = preprocess_yaml_data
@@ -0,0 +1,156 @@
+import concurrent.futures
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from wireviz_gui.batch import export_text
+from wireviz_gui.cache import LRUCache
+from wireviz_gui.layout import Cancellation, RenderCancelled
+from wireviz_gui.render import (
+    EXPORT_FORMATS,
+    Document,
+    GraphSource,
+    as_document,
+    build_source,
+    load_yaml,
+    process_pool,
+    render_source,
+)
+
+
+def _build_source(yaml_input: str) -> GraphSource:
+    # runs in a worker process
+    return build_source(load_yaml(yaml_input))
+
+
+class RenderPool:
+    """
+    Renders harnesses from several tabs in parallel using a process pool.
+
+    The worker processes do the Python-heavy part of a render: loading the
+    YAML, normalizing it and building the harness and its DOT source.  The
+    graphviz layout runs as a subprocess of this process, through the shared
+    output caches, so that it can still be cancelled and its output reused.
+
+    The pool is started on first use and uses the "spawn" start method, as
+    forking a process that runs Tk is not safe.
+    """
+
+    def __init__(self, workers: Optional[int] = None, loglevel=logging.INFO):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        self._workers = workers or os.cpu_count() or 1
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # keyed on the exact text, so repeated renders skip the round trip
+        self._sources = LRUCache(max_bytes=16 * 1024 * 1024, loglevel=loglevel)
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._logger.debug(f"starting {self._workers} render processes")
+                self._executor = process_pool(self._workers)
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, func, *args) -> concurrent.futures.Future:
+        try:
+            return self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            self._logger.warning("render process pool broke; restarting it")
+            self._reset_executor()
+            return self._get_executor().submit(func, *args)
+
+    def submit(self, yaml_input: str) -> concurrent.futures.Future:
+        """
+        Queue the YAML text to be turned into a :class:`GraphSource`.
+
+        :param yaml_input: the YAML text of the harness
+        :return: a future resolving to the :class:`GraphSource`
+        """
+        return self._submit(_build_source, yaml_input)
+
+    def submit_export(
+        self,
+        yaml_input: str,
+        path: Path,
+        formats: Sequence[str] = EXPORT_FORMATS,
+        force: bool = False,
+    ) -> concurrent.futures.Future:
+        """
+        Queue a whole export, graphviz included, to run in a worker process.
+
+        :param yaml_input: the YAML text of the harness
+        :param path: the output path; the suffix is replaced for each format
+        :return: a future resolving to a :class:`wireviz_gui.batch.FileResult`
+        """
+        return self._submit(export_text, yaml_input, path, formats, force)
+
+    def build_source(
+        self, yaml_input: str, cancel: Optional[Cancellation] = None
+    ) -> GraphSource:
+        """
+        Build the :class:`GraphSource` in a worker process, blocking until it
+        is ready.
+
+        :param yaml_input: the YAML text of the harness
+        :param cancel: abandons the wait; a request that has not started yet
+            is removed from the pool's queue
+        :raises RenderCancelled: if ``cancel`` was cancelled
+        """
+        key = hashlib.sha256(yaml_input.encode("utf-8")).hexdigest()
+        source = self._sources.get(key)
+        if source is not None:
+            return source
+
+        if cancel is not None:
+            cancel.check()
+
+        future = self.submit(yaml_input)
+        while True:
+            try:
+                source = future.result(timeout=0.05)
+                break
+            except concurrent.futures.TimeoutError:
+                if cancel is not None and cancel.cancelled:
+                    future.cancel()
+                    raise RenderCancelled()
+            except BrokenProcessPool:
+                self._reset_executor()
+                raise
+
+        self._sources.put(key, source, source.size)
+        return source
+
+    def render(
+        self, yaml_input: Union[str, Document], cancel: Optional[Cancellation] = None
+    ):
+        """
+        A drop-in replacement for :func:`wireviz_gui.render.render_yaml`.
+
+        :return: a tuple of ``(png_data, source)``
+        """
+        source = self.build_source(as_document(yaml_input).text, cancel=cancel)
+
+        if cancel is not None:
+            cancel.check()
+
+        return render_source(source, "png", cancel=cancel), source
+
+    def shutdown(self):
+        self._reset_executor()
@@ -0,0 +1,244 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Sequence
+
+from PIL import Image
+
+# the edge length of a tile, in pixels of the level it was cut from
+TILE_SIZE = 256
+
+
+class TilePlacement(NamedTuple):
+    """Where a tile of the pyramid goes on the canvas at a given scale"""
+
+    level: int
+    col: int
+    row: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class ImagePyramid:
+    """
+    A rendered diagram at successively halved resolutions, cut into tiles.
+
+    Level 0 is the image itself; each further level is half the size of the
+    one before, down to about one tile.  The levels are built on a background
+    thread by :meth:`start`; until they are ready, the finest level is used
+    for every scale.  Tiles are cut on first use and kept.
+
+    Drawing a view then only needs the few tiles that intersect it, taken
+    from the level closest to the view scale, so the cost of zooming and
+    panning depends on the size of the view rather than of the diagram.
+    """
+
+    def __init__(
+        self, image: Image.Image, tile_size: int = TILE_SIZE, loglevel=logging.INFO
+    ):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        # decode now, rather than racing the build thread to it
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        self._tile_size = tile_size
+        self._levels: List[Image.Image] = [image]
+        self._tiles = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = False
+
+    @property
+    def size(self):
+        """The ``(width, height)`` of the finest level"""
+        return self._levels[0].size
+
+    @property
+    def image(self) -> Image.Image:
+        return self._levels[0]
+
+    @property
+    def estimated_bytes(self) -> int:
+        """
+        The memory taken once every level is built and every tile is cut;
+        the levels add a third to the image, and the tiles copy all of it.
+        """
+        width, height = self.size
+        return width * height * len(self.image.getbands()) * 8 // 3
+
+    @property
+    def ready(self) -> bool:
+        """True once every level has been built"""
+        return self._ready.is_set()
+
+    def start(self):
+        """Build the coarser levels on a background thread"""
+        threading.Thread(target=self.build, name="wireviz-pyramid", daemon=True).start()
+
+    def stop(self):
+        """Abandon a build in progress"""
+        self._stopped = True
+
+    def build(self):
+        """Build the coarser levels, blocking until they are done"""
+        level = self._levels[-1]
+        while max(level.size) > self._tile_size and min(level.size) >= 2:
+            if self._stopped:
+                return
+
+            # a 2x2 box filter; cheap, and exact for halving
+            level = level.reduce(2)
+            with self._lock:
+                self._levels.append(level)
+
+        self._logger.debug(f"built {len(self._levels)} levels for {self.size}")
+        self._ready.set()
+
+    def level_for(self, scale: float) -> int:
+        """
+        :param scale: the view scale relative to the finest level
+        :return: the coarsest available level that is still at least as
+            detailed as the view
+        """
+        with self._lock:
+            levels = len(self._levels)
+
+        level = 0
+        while level + 1 < levels and scale <= 0.5 ** (level + 1):
+            level += 1
+        return level
+
+    def tile(self, level: int, col: int, row: int) -> Image.Image:
+        key = (level, col, row)
+        with self._lock:
+            tile = self._tiles.get(key)
+            image = self._levels[level]
+
+        if tile is None:
+            size = self._tile_size
+            left, top = col * size, row * size
+            tile = image.crop(
+                (
+                    left,
+                    top,
+                    min(left + size, image.width),
+                    min(top + size, image.height),
+                )
+            )
+            with self._lock:
+                self._tiles[key] = tile
+
+        return tile
+
+    def visible_tiles(self, scale: float, box: Sequence[float]) -> List[TilePlacement]:
+        """
+        Find the tiles needed to draw part of the image.
+
+        :param scale: the view scale relative to the finest level
+        :param box: the ``(x0, y0, x1, y1)`` region to draw, in view pixels
+        :return: the tiles intersecting the region and where they go
+        """
+        level = self.level_for(scale)
+        with self._lock:
+            image = self._levels[level]
+
+        # the scale from this level to the view
+        fx = scale * self.size[0] / image.width
+        fy = scale * self.size[1] / image.height
+
+        size = self._tile_size
+        cols = -(-image.width // size)
+        rows = -(-image.height // size)
+
+        x0, y0, x1, y1 = box
+        first_col = max(0, int(x0 // (size * fx)))
+        last_col = min(cols - 1, int((x1 - 1) // (size * fx)))
+        first_row = max(0, int(y0 // (size * fy)))
+        last_row = min(rows - 1, int((y1 - 1) // (size * fy)))
+
+        placements = []
+        for row in range(first_row, last_row + 1):
+            # round the edges rather than the sizes so that tiles never leave
+            # a gap between them
+            top = round(row * size * fy)
+            bottom = round(min((row + 1) * size, image.height) * fy)
+            for col in range(first_col, last_col + 1):
+                left = round(col * size * fx)
+                right = round(min((col + 1) * size, image.width) * fx)
+                if right > left and bottom > top:
+                    placements.append(
+                        TilePlacement(
+                            level, col, row, left, top, right - left, bottom - top
+                        )
+                    )
+
+        return placements
+
+
+class ImageBudget:
+    """
+    Bounds the memory taken by decoded images across all harness views.
+
+    Views charge the budget with what their decoded images take.  Once the
+    total exceeds the budget, the least recently used views that are not on
+    screen are asked to free theirs through ``release_images()``; they keep
+    the compressed image and decode it again when they are shown.  Views
+    must provide a ``visible`` attribute.
+
+    The budget is not thread safe; it is meant to be used from the Tk main
+    loop only.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, loglevel=logging.INFO):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        self.max_bytes = max_bytes
+        self._owners: OrderedDict = OrderedDict()
+
+    @property
+    def total(self) -> int:
+        return sum(self._owners.values())
+
+    def __contains__(self, owner):
+        return owner in self._owners
+
+    def charge(self, owner, nbytes: int):
+        """
+        Record what the decoded images of a view take, replacing any earlier
+        charge, and free those of other views if this exceeds the budget.
+        """
+        self._owners[owner] = nbytes
+        self._owners.move_to_end(owner)
+        self.enforce()
+
+    def touch(self, owner):
+        """Mark a view as the most recently used"""
+        if owner in self._owners:
+            self._owners.move_to_end(owner)
+
+    def release(self, owner):
+        """Record that a view has freed its decoded images"""
+        self._owners.pop(owner, None)
+
+    def enforce(self):
+        total = self.total
+        for owner, nbytes in list(self._owners.items()):
+            if total <= self.max_bytes:
+                break
+            if owner.visible:
+                continue
+
+            self._logger.debug(f"freeing {nbytes} bytes of decoded images")
+            owner.release_images()
+            self._owners.pop(owner, None)
+            total -= nbytes
+
+
+# shared by the harness views of all tabs
+image_budget = ImageBudget()
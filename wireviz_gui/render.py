@@ -0,0 +1,734 @@
+import concurrent.futures
+import copy
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import yaml
+from wireviz.DataClasses import Metadata
+from wireviz.svgembed import embed_svg_images
+from wireviz.wireviz import Harness, parse
+from wireviz.wv_bom import bom_list
+from wireviz.wv_helper import file_write_text, tuplelist2tsv
+from wireviz.wv_html import generate_html_output
+
+from wireviz_gui.cache import LRUCache, canonical_hash
+from wireviz_gui.disk_cache import DiskRenderCache, default_cache_dir, harness_summary
+from wireviz_gui.layout import (
+    LAYOUT_BACKENDS,
+    Cancellation,
+    RenderCancelled,
+    get_layout_backend,
+)
+from wireviz_gui.manifest import ExportManifest, current_tools
+from wireviz_gui.normalize import normalize_connections
+
+EXPORT_FORMATS = ("png", "svg", "html", "tsv")
+
+# the resolution of graphviz raster output unless told otherwise
+DEFAULT_DPI = 96
+
+# resolutions offered when zoomed in, so that nearby zoom levels share renders
+ZOOM_DPI_STEPS = (96, 144, 192, 288, 384)
+
+# the largest zoomed-in render, in pixels, before falling back to upscaling
+ZOOM_MAX_PIXELS = 40_000_000
+
+# rough allowance for the harness objects kept alongside each DOT source
+_HARNESS_ITEM_BYTES = 2048
+
+# libyaml parses several times faster than the pure Python loader
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_logger = logging.getLogger(__name__)
+
+
+class GraphSource:
+    """
+    The first render stage: the harness model and the DOT source generated
+    from it.  Building this is cheap compared to the graphviz layout.
+    """
+
+    def __init__(
+        self,
+        harness: Harness,
+        dot_source: str,
+        input_hash: Optional[str] = None,
+        titled: bool = True,
+    ):
+        """
+        :param harness: the harness built by wireviz
+        :param dot_source: the DOT source generated from it
+        :param input_hash: the canonical hash of the normalized YAML data
+        :param titled: False if the YAML data gave the harness no title, and
+            wireviz made one up
+        """
+        self.harness = harness
+        self.dot_source = dot_source
+        self.dot_hash = source_hash(dot_source)
+        self.input_hash = input_hash
+        self.titled = titled
+
+    @property
+    def size(self) -> int:
+        harness = self.harness
+        items = (
+            len(harness.connectors)
+            + len(harness.cables)
+            + len(harness.mates)
+            + len(harness.additional_bom_items)
+        )
+        return len(self.dot_source) + items * _HARNESS_ITEM_BYTES
+
+
+def source_hash(dot_source: str) -> str:
+    return hashlib.sha256(dot_source.encode("utf-8")).hexdigest()
+
+
+# YAML -> DOT, keyed on the hash of the normalized YAML data
+source_cache = LRUCache(max_bytes=16 * 1024 * 1024)
+
+# DOT -> rendered output, keyed on the hash of the DOT source and the format;
+# edits that do not change the DOT source never reach graphviz
+output_cache = LRUCache(max_bytes=64 * 1024 * 1024)
+
+# rendered output persisted across sessions and shared with other wireviz-gui
+# processes, keyed on the hash of the DOT source; set to None to disable
+disk_cache: Optional[DiskRenderCache] = DiskRenderCache(
+    default_cache_dir() / "renders.sqlite3"
+)
+
+
+def _default_layout_name() -> str:
+    name = os.environ.get("WIREVIZ_GUI_LAYOUT", "auto")
+    if name not in LAYOUT_BACKENDS:
+        # this runs on import, which must not fail for every command
+        _logger.warning(f"WIREVIZ_GUI_LAYOUT: unknown backend {name!r}; using auto")
+        return "auto"
+    return name
+
+
+# the layout backend asked for; render processes are started with it
+layout_name = _default_layout_name()
+
+# turns DOT source into rendered output; see set_layout_backend()
+layout_backend = get_layout_backend(layout_name)
+
+
+def set_layout_backend(name: str, concurrent: bool = False):
+    """
+    :param name: "auto", "pygraphviz" or "subprocess"
+    :param concurrent: True if this process renders on several threads at
+        once; see :func:`wireviz_gui.layout.get_layout_backend`
+    """
+    global layout_backend, layout_name
+    layout_backend = get_layout_backend(name, concurrent)
+    layout_name = name
+
+
+def process_pool(max_workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Start render processes that use the same layout backend as this one.
+
+    They are spawned rather than forked, as forking a process that runs Tk
+    is not safe.
+
+    :param max_workers: the number of processes
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=set_layout_backend,
+        initargs=(layout_name,),
+    )
+
+
+def load_yaml(yaml_input: str):
+    """
+    :param yaml_input: the YAML text of the harness
+    :return: the parsed and normalized data
+    """
+    data = yaml.load(yaml_input, Loader=SafeLoader)
+    return normalize_connections(data)
+
+
+def build_source(data, key: Optional[str] = None) -> GraphSource:
+    """
+    Build the harness and its DOT source from normalized YAML data.
+
+    :param data: the normalized data, which wireviz is allowed to modify
+    :param key: the canonical hash of ``data``, if it is already known
+    :return: the cached or newly built :class:`GraphSource`
+    """
+    if key is None:
+        key = canonical_hash(data)
+    source = source_cache.get(key)
+    if source is None:
+        titled = isinstance(data, dict) and "title" in (data.get("metadata") or {})
+        harness = parse(inp=data, return_types="harness")
+        source = GraphSource(harness, harness.graph.source, key, titled)
+        source_cache.put(key, source, source.size)
+
+    return source
+
+
+def _copy_tree(node):
+    # YAML data is made of dicts, lists and immutable scalars
+    if isinstance(node, dict):
+        return {key: _copy_tree(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_copy_tree(item) for item in node]
+    return node
+
+
+class Document:
+    """
+    One revision of the YAML text of a harness, parsed at most once.
+
+    Rendering, saving, exporting and editing all share the parse tree, its
+    canonical hash and the harness built from it, instead of each loading the
+    text again.  The text of a document never changes; a tab makes a new one
+    for each revision.  A document may be used from any thread.
+    """
+
+    def __init__(self, text: str, revision: int = 0):
+        """
+        :param text: the YAML text
+        :param revision: tells revisions of the same tab apart
+        """
+        self.text = text
+        self.revision = revision
+
+        self._lock = threading.RLock()
+        self._tree = None
+        self._parsed = False
+        self._load_error: Optional[Exception] = None
+        self._input_hash: Optional[str] = None
+        self._data = None
+        self._source: Optional[GraphSource] = None
+        self._error: Optional[Exception] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.text.strip() == ""
+
+    def tree(self):
+        """
+        :return: the parsed YAML, which is shared and must not be modified;
+            see :meth:`editable_tree`
+        :raises Exception: a :class:`yaml.YAMLError` if the text is not valid
+            YAML, or whatever else loading it raised, such as a ValueError for
+            an impossible date; again on every call
+        """
+        with self._lock:
+            if not self._parsed:
+                try:
+                    self._tree = yaml.load(self.text, Loader=SafeLoader)
+                except Exception as e:
+                    self._load_error = e
+                self._parsed = True
+            if self._load_error is not None:
+                raise self._load_error
+            return self._tree
+
+    def editable_tree(self):
+        """:return: a copy of the parsed YAML, to be modified as needed"""
+        return copy.deepcopy(self.tree())
+
+    def _normalized(self):
+        # a new copy each time, as wireviz modifies the data it is given
+        return normalize_connections(_copy_tree(self.tree()))
+
+    @property
+    def input_hash(self) -> str:
+        """
+        The canonical hash of the normalized data, without building the
+        harness.
+
+        :raises Exception: whatever loading the YAML raised
+        """
+        with self._lock:
+            if self._input_hash is None:
+                if self._source is not None and self._source.input_hash:
+                    self._input_hash = self._source.input_hash
+                else:
+                    # kept for building the harness, which usually comes next
+                    self._data = self._normalized()
+                    self._input_hash = canonical_hash(self._data)
+            return self._input_hash
+
+    def source(self) -> GraphSource:
+        """
+        Build the harness and its DOT source, unless that has already been
+        done for this revision, which also validates it.
+
+        :return: the :class:`GraphSource` of the harness
+        :raises Exception: whatever loading the YAML or building the harness
+            raised, again on every call
+        """
+        with self._lock:
+            if self._source is None:
+                if self._error is not None:
+                    raise self._error
+                data, self._data = self._data, None
+                if data is None:
+                    data = self._normalized()
+                try:
+                    self._source = build_source(data, key=self._input_hash)
+                except Exception as e:
+                    self._error = e
+                    raise
+            return self._source
+
+    def set_source(self, source: GraphSource):
+        """
+        Record the harness built from this text elsewhere, such as by a render
+        in another process.
+        """
+        with self._lock:
+            if self._source is None:
+                self._source = source
+
+
+def render_source(
+    source: GraphSource,
+    fmt: str = "png",
+    cancel: Optional[Cancellation] = None,
+    dpi: Optional[int] = None,
+) -> bytes:
+    """
+    Lay out and render the DOT source; graphviz only runs for DOT source that
+    has not been rendered to this format and resolution before.
+
+    :param source: the DOT source to render
+    :param fmt: "png" or "svg"
+    :param cancel: abandons the render, killing graphviz if it is running
+    :param dpi: the resolution of raster output; None for the graphviz
+        default of :data:`DEFAULT_DPI`
+    :return: the rendered output
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    """
+    return render_formats(source, [fmt], cancel=cancel, dpi=dpi)[fmt]
+
+
+def render_formats(
+    source: GraphSource,
+    formats: Sequence[str],
+    cancel: Optional[Cancellation] = None,
+    dpi: Optional[int] = None,
+) -> Dict[str, bytes]:
+    """
+    Render the DOT source to several formats, laying it out only once for
+    all of the formats that are not cached yet.
+
+    :param source: the DOT source to render
+    :param formats: "png" and/or "svg"
+    :param cancel: abandons the render, killing graphviz if it is running
+    :param dpi: the resolution of raster output; None for the graphviz
+        default of :data:`DEFAULT_DPI`
+    :return: the rendered output of each format
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    """
+    outputs = {}
+    for fmt in formats:
+        output = output_cache.get((source.dot_hash, fmt, dpi))
+        if output is not None:
+            outputs[fmt] = output
+
+    # only the default resolution is worth keeping across sessions
+    persist = disk_cache is not None and dpi is None
+
+    missing = [fmt for fmt in formats if fmt not in outputs]
+    stored = disk_cache.get(source.dot_hash) if persist and missing else None
+    for fmt in missing:
+        output = stored.get(fmt) if stored is not None else None
+        if output is not None:
+            outputs[fmt] = output.encode("utf-8") if isinstance(output, str) else output
+
+    missing = [fmt for fmt in formats if fmt not in outputs]
+    if len(missing) == 1:
+        rendered = {
+            missing[0]: layout_backend.render(
+                source.dot_source, missing[0], dpi=dpi, cancel=cancel
+            )
+        }
+    elif missing:
+        rendered = layout_backend.render_formats(
+            source.dot_source, missing, dpi=dpi, cancel=cancel
+        )
+    else:
+        rendered = {}
+
+    if persist and rendered:
+        disk_cache.put(
+            source.dot_hash,
+            png=rendered.get("png"),
+            svg=rendered["svg"].decode("utf-8") if "svg" in rendered else None,
+            summary=harness_summary(source.harness),
+        )
+
+    outputs.update(rendered)
+    for fmt in formats:
+        output_cache.put((source.dot_hash, fmt, dpi), outputs[fmt], len(outputs[fmt]))
+
+    return {fmt: outputs[fmt] for fmt in formats}
+
+
+def as_document(yaml_input: Union[str, Document]) -> Document:
+    """:return: ``yaml_input`` if it is a :class:`Document`, or one of it"""
+    if isinstance(yaml_input, Document):
+        return yaml_input
+    return Document(yaml_input)
+
+
+def render_yaml(
+    yaml_input: Union[str, Document], cancel: Optional[Cancellation] = None
+):
+    """
+    Parse the YAML text and render it through wireviz and graphviz.
+
+    The render is split into two cached stages, YAML to DOT source
+    (:func:`build_source`) and DOT source to PNG (:func:`render_source`).
+
+    This function does not touch tkinter and may be called from any thread.
+
+    :param yaml_input: the YAML text of the harness, or its :class:`Document`,
+        which keeps what is built for saving and exporting
+    :param cancel: abandons the render, killing graphviz if it is running
+    :return: a tuple of ``(png_data, source)``
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    """
+    source = as_document(yaml_input).source()
+
+    if cancel is not None:
+        cancel.check()
+
+    return render_source(source, "png", cancel=cancel), source
+
+
+def render_dpi(request, cancel: Optional[Cancellation] = None):
+    """
+    Render an already built source at another resolution, for use as the
+    ``render_func`` of a :class:`RenderWorker`.
+
+    :param request: a tuple of ``(source, dpi)``
+    :param cancel: abandons the render, killing graphviz if it is running
+    :return: a tuple of ``(png_data, source)``
+    """
+    source, dpi = request
+    return render_source(source, "png", cancel=cancel, dpi=dpi), source
+
+
+def zoom_dpi(
+    scale: float, size: Sequence[int], max_pixels: float = ZOOM_MAX_PIXELS
+) -> int:
+    """
+    Choose the resolution to render at for a zoom level.
+
+    :param scale: the zoom factor relative to the default resolution
+    :param size: the ``(width, height)`` of the render at the default resolution
+    :param max_pixels: the largest render allowed
+    :return: the smallest of :data:`ZOOM_DPI_STEPS` that is sharp at this zoom
+        and fits the budget
+    """
+    width, height = size
+    wanted = DEFAULT_DPI * scale
+
+    best = DEFAULT_DPI
+    for dpi in ZOOM_DPI_STEPS:
+        factor = dpi / DEFAULT_DPI
+        if width * height * factor * factor > max_pixels:
+            break
+        best = dpi
+        if dpi >= wanted:
+            break
+
+    return best
+
+
+def export_yaml(
+    yaml_input: str,
+    path: Path,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    cancel: Optional[Cancellation] = None,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+    force: bool = False,
+) -> bool:
+    """
+    Export YAML text; see :func:`export_document`.
+
+    :param yaml_input: the YAML text of the harness
+    """
+    return export_document(Document(yaml_input), path, formats, cancel, progress, force)
+
+
+def export_document(
+    document: Document,
+    path: Path,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    cancel: Optional[Cancellation] = None,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+    force: bool = False,
+) -> bool:
+    """
+    Write the harness to files, as ``Harness.output()`` would, but through the
+    render caches.
+
+    The diagram is laid out once for PNG and SVG together, on a thread of its
+    own, while the bill of materials is written from the harness model.
+
+    A manifest written next to the outputs records the input, the tool
+    versions and the outputs; when it shows that the outputs are already
+    those of this input, nothing is written again.
+
+    :param document: the harness; it is only built if it has not been already
+    :param path: the output path; the suffix is replaced for each format
+    :param formats: any of "png", "svg", "html" and "tsv"
+    :param cancel: abandons the export, killing graphviz if it is running
+    :param progress: called with the steps done, the number of steps and a
+        description of the next step; this may be called from any thread
+    :param force: export even if the manifest shows the outputs are current
+    :return: True if the outputs were written, False if they were current
+    :raises RenderCancelled: if ``cancel`` was cancelled
+    """
+    path = Path(path)
+    graph_formats = [
+        fmt
+        for fmt in ("png", "svg")
+        if fmt in formats or (fmt == "svg" and "html" in formats)
+    ]
+    # building the harness, laying out, and writing each format
+    steps = 1 + bool(graph_formats) + len(formats)
+    done = 0
+
+    def step(text: str):
+        nonlocal done
+        if cancel is not None:
+            cancel.check()
+        if progress is not None:
+            progress(done, steps, text)
+        done += 1
+
+    step("building the harness")
+    input_hash = document.input_hash
+    tools = current_tools()
+    if not force:
+        manifest = ExportManifest.read(path)
+        if manifest is not None and manifest.is_current(
+            path, formats, input_hash, tools
+        ):
+            _logger.debug(f"outputs of {path} are current; not exporting")
+            if progress is not None:
+                progress(steps, steps, "up to date")
+            return False
+
+    source = document.source()
+    harness = source.harness
+    filename = path.parent / path.stem
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="wireviz-export"
+    ) as executor:
+        layout = None
+        if graph_formats:
+            step("laying out")
+            layout = executor.submit(render_formats, source, graph_formats, cancel)
+
+        bomlist = bom_list(harness.bom())
+        if "tsv" in formats:
+            step("writing tsv")
+            file_write_text(f"{filename}.bom.tsv", tuplelist2tsv(bomlist))
+
+        outputs = layout.result() if layout is not None else {}
+
+    if "png" in formats:
+        step("writing png")
+        Path(f"{filename}.png").write_bytes(outputs["png"])
+
+    if "svg" in outputs:
+        svg_data = embed_svg_images(outputs["svg"].decode("utf-8"), path.parent)
+        if "svg" in formats:
+            step("writing svg")
+            file_write_text(f"{filename}.svg", svg_data)
+
+    if "html" in formats:
+        step("writing html")
+        metadata = Metadata(harness.metadata)
+        if not source.titled:
+            # wireviz names untitled harnesses after the output file
+            metadata["title"] = path.stem
+
+        # the HTML template embeds the diagram from this temporary file
+        tmp_svg = Path(f"{filename}.tmp.svg")
+        file_write_text(tmp_svg, svg_data)
+        try:
+            generate_html_output(filename, bomlist, metadata, harness.options)
+        finally:
+            tmp_svg.unlink()
+
+    ExportManifest.record(path, formats, input_hash, tools).write(path)
+
+    if progress is not None:
+        progress(steps, steps, "done")
+    return True
+
+
+class RenderResult:
+    def __init__(
+        self,
+        revision: int,
+        request=None,
+        png_data=None,
+        source: Optional[GraphSource] = None,
+        error=None,
+    ):
+        self.revision = revision
+        self.request = request
+        self.png_data = png_data
+        self.source = source
+        self.error = error
+
+    @property
+    def harness(self) -> Optional[Harness]:
+        return self.source.harness if self.source is not None else None
+
+
+class RenderWorker:
+    """
+    Renders snapshots of the YAML text, or other requests understood by
+    ``render_func``, on a background thread.
+
+    Every call to :meth:`submit` bumps the revision.  Only the newest pending
+    snapshot is ever rendered, and :meth:`poll` drops any result that is
+    older than the newest request, so that a slow render can never overwrite
+    a more recent one.  :meth:`poll` is meant to be drained from the Tk main
+    loop using ``after()``.
+
+    A render that is still running when a newer request arrives is cancelled,
+    which kills its graphviz process.  ``render_func`` is called with the
+    request and a :class:`Cancellation` and returns ``(png_data, source)``.
+    """
+
+    def __init__(self, render_func: Callable = render_yaml, loglevel=logging.INFO):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._logger.setLevel(loglevel)
+
+        self._render_func = render_func
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._results: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = None
+        self._active: Optional[Cancellation] = None
+        self._revision = 0
+        self._delivered = 0
+        self._stopped = False
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def busy(self) -> bool:
+        """True while the newest request has not been delivered by :meth:`poll`"""
+        return self._delivered < self._revision
+
+    def submit(self, request) -> int:
+        """
+        Queue a snapshot of the YAML text for rendering.
+
+        :param request: the YAML text to render, or whatever else
+            ``render_func`` accepts
+        :return: the revision assigned to the request
+        """
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("render worker has been stopped")
+
+            self._revision += 1
+            self._pending = (self._revision, request)
+
+            if self._active is not None:
+                self._active.cancel()
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="wireviz-render", daemon=True
+                )
+                self._thread.start()
+
+            revision = self._revision
+
+        self._wakeup.set()
+        return revision
+
+    def poll(self) -> Optional[RenderResult]:
+        """
+        Collect finished renders without blocking.
+
+        :return: the result for the newest request, or None if it is not ready
+        """
+        newest = None
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if result.revision == self._revision:
+                newest = result
+                self._delivered = result.revision
+            else:
+                self._logger.debug(
+                    f"dropping stale render {result.revision} "
+                    f"(newest is {self._revision})"
+                )
+
+        return newest
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._pending = None
+            if self._active is not None:
+                self._active.cancel()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                self._wakeup.clear()
+                if self._stopped:
+                    return
+                pending, self._pending = self._pending, None
+                cancel = self._active = Cancellation() if pending else None
+
+            if pending is None:
+                continue
+
+            revision, request = pending
+            try:
+                png_data, source = self._render_func(request, cancel)
+                result = RenderResult(
+                    revision, request=request, png_data=png_data, source=source
+                )
+            except RenderCancelled:
+                self._logger.debug(f"render {revision} was cancelled")
+                continue
+            except Exception as e:
+                result = RenderResult(revision, request=request, error=e)
+            finally:
+                with self._lock:
+                    self._active = None
+
+            if revision == self._revision:
+                self._results.put(result)
+            else:
+                self._logger.debug(f"discarding superseded render {revision}")
@@ -0,0 +1,352 @@
+# watches harness files for changes, for the command line and the GUI tabs;
+# nothing here may import tkinter
+import concurrent.futures
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Set, Tuple, Union
+
+from wireviz_gui.batch import (
+    YAML_SUFFIXES,
+    FileResult,
+    output_collisions,
+    output_key,
+    render_file,
+)
+from wireviz_gui.render import EXPORT_FORMATS, process_pool
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+_logger = logging.getLogger(__name__)
+
+
+def _is_harness(path: Path) -> bool:
+    return path.suffix.lower() in YAML_SUFFIXES
+
+
+def find_harnesses(root: Path) -> Set[Path]:
+    return {p for p in Path(root).rglob("*") if _is_harness(p) and p.is_file()}
+
+
+def content_hash(data: Union[bytes, str]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchedFile:
+    """
+    One file as it was last read or written, to tell cheaply whether it has
+    changed since: first by its size and modification time, and only when
+    those differ by the hash of its text.
+
+    The first check always compares the text, in case the file changed
+    between being read and being watched.
+    """
+
+    def __init__(self, path: Union[Path, str], text: str):
+        """
+        :param path: the file
+        :param text: what the file is known to contain
+        """
+        self.path = Path(path)
+        self.digest = content_hash(text)
+        # matches no file, not even a missing one
+        self._stat = ()
+
+    def stat_changed(self) -> bool:
+        return _stat_key(self.path) != self._stat
+
+    def read_changes(self) -> Optional[str]:
+        """
+        Read the file, e.g. once :meth:`stat_changed`; this may run on any
+        thread.
+
+        :return: the new text, or None if it is what was known
+        :raises OSError: if the file cannot be read
+        :raises UnicodeDecodeError: if the file is not UTF-8
+        """
+        self._stat = _stat_key(self.path)
+        text = self.path.read_text(encoding="utf-8")
+        if content_hash(text) == self.digest:
+            return None
+        return text
+
+    def accept(self, text: str):
+        """Take ``text`` as what the file now contains"""
+        self.digest = content_hash(text)
+
+
+class ContentIndex:
+    """
+    The hash of the contents of each file, so that a file that was touched or
+    saved without changes is not rendered again.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[Path, str] = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def update(self, path: Path) -> bool:
+        """
+        :param path: a file that may have changed
+        :return: True if its contents differ from when it was last seen
+        """
+        try:
+            digest = content_hash(Path(path).read_bytes())
+        except OSError:
+            return self.forget(path)
+
+        if self._hashes.get(path) == digest:
+            return False
+
+        self._hashes[path] = digest
+        return True
+
+    def forget(self, path: Path) -> bool:
+        """:return: False, as a deleted file needs no render"""
+        self._hashes.pop(path, None)
+        return False
+
+
+class PollingWatcher:
+    """Finds changed files by comparing their size and modification time"""
+
+    name = "polling"
+
+    def __init__(self, root: Path, interval: float = 1.0):
+        self._root = Path(root)
+        self._interval = interval
+        self._stats: Dict[Path, Tuple[int, int]] = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        stats = {}
+        for path in find_harnesses(self._root):
+            stat = _stat_key(path)
+            if stat is not None:
+                stats[path] = stat
+        return stats
+
+    def wait(self, stop: threading.Event) -> Set[Path]:
+        """
+        :param stop: ends the wait early when set
+        :return: the files that were created, modified or deleted
+        """
+        stop.wait(self._interval)
+
+        stats = self._scan()
+        changed = {
+            path for path, stat in stats.items() if self._stats.get(path) != stat
+        }
+        changed.update(set(self._stats) - set(stats))
+        self._stats = stats
+        return changed
+
+    def close(self):
+        pass
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, events: queue.Queue):
+        super().__init__()
+        self._events = events
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and _is_harness(Path(path)):
+                self._events.put(Path(path))
+
+
+class WatchdogWatcher:
+    """
+    Finds changed files through the notifications of the operating system
+    (inotify on Linux) using watchdog, when it is installed.
+    """
+
+    name = "watchdog"
+
+    # editors save in several steps; wait until none has come for this long
+    settle = 0.2
+
+    # but not for longer than this, in case files never stop changing
+    max_settle = 2.0
+
+    def __init__(self, root: Path, interval: float = 1.0):
+        if Observer is None:
+            raise RuntimeError("watchdog is not installed")
+
+        self._interval = interval
+        self._events: queue.Queue = queue.Queue()
+        self._observer = Observer()
+        self._observer.schedule(_Handler(self._events), str(root), recursive=True)
+        self._observer.start()
+
+    def wait(self, stop: threading.Event) -> Set[Path]:
+        changed = set()
+        try:
+            changed.add(self._events.get(timeout=self._interval))
+        except queue.Empty:
+            return changed
+
+        deadline = time.monotonic() + self.max_settle
+        while not stop.is_set() and time.monotonic() < deadline:
+            try:
+                changed.add(self._events.get(timeout=self.settle))
+            except queue.Empty:
+                break
+
+        return changed
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
+
+
+def get_watcher(root: Path, interval: float = 1.0, polling: bool = False):
+    """
+    :param polling: use stat polling even if watchdog is installed
+    :return: a :class:`WatchdogWatcher` where possible, otherwise a
+        :class:`PollingWatcher`
+    """
+    if not polling:
+        try:
+            return WatchdogWatcher(root, interval)
+        except (RuntimeError, OSError) as e:
+            _logger.debug(f"{e}; polling for changes instead")
+
+    return PollingWatcher(root, interval)
+
+
+def watch(
+    root: Path,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    output_dir: Optional[Path] = None,
+    jobs: int = 1,
+    interval: float = 1.0,
+    polling: bool = False,
+    initial: bool = True,
+    on_result: Optional[Callable[[FileResult], None]] = None,
+    stop: Optional[threading.Event] = None,
+    force: bool = False,
+):
+    """
+    Render the harness files under a directory whenever their contents change,
+    until ``stop`` is set.
+
+    :param root: the directory to watch, recursively
+    :param formats: any of "png", "svg", "html" and "tsv"
+    :param output_dir: where the outputs go, mirroring the layout of ``root``;
+        next to each harness file if None
+    :param jobs: the number of render processes
+    :param interval: how often to look for changes, in seconds
+    :param polling: use stat polling even if watchdog is installed
+    :param initial: render every file once when starting
+    :param on_result: called with each :class:`FileResult`
+    :param stop: ends the watch when set
+    :param force: render even if the export manifest shows the outputs are
+        current
+    :raises ValueError: if the outputs of two files would overwrite each
+        other's; files that would do so once the watch has started fail
+        instead
+    """
+    root = Path(root)
+    stop = stop or threading.Event()
+    index = ContentIndex()
+
+    # resolved, as events may name files in another form than the root
+    resolved_root = root.resolve()
+
+    def output_for(path: Path) -> Optional[Path]:
+        if output_dir is None:
+            return None
+        return Path(output_dir) / path.resolve().parent.relative_to(resolved_root)
+
+    harnesses = sorted(find_harnesses(root))
+    collisions = output_collisions(harnesses, {p: output_for(p) for p in harnesses})
+    if collisions:
+        raise ValueError(
+            "outputs would overwrite each other: "
+            + ", ".join(f"{path} and {owner}" for path, owner in collisions.items())
+        )
+
+    # the file whose outputs each output path belongs to
+    owners: Dict[str, Path] = {output_key(p, output_for(p)): p for p in harnesses}
+
+    def claim(path: Path) -> Optional[Path]:
+        """:return: the other file whose outputs ``path`` would overwrite"""
+        key = output_key(path, output_for(path))
+        owner = owners.get(key)
+        if owner is not None and owner.resolve() != path.resolve() and owner.exists():
+            return owner
+        owners[key] = path
+        return None
+
+    executor = None
+    if jobs > 1:
+        executor = process_pool(jobs)
+
+    def render(paths: Iterable[Path]):
+        kept = []
+        for path in sorted(paths):
+            owner = claim(path)
+            if owner is not None:
+                error = f"its outputs would overwrite those of {owner}"
+                if on_result is not None:
+                    on_result(FileResult(path, 0.0, error))
+                continue
+
+            kept.append(path)
+            out = output_for(path)
+            if out is not None:
+                os.makedirs(out, exist_ok=True)
+        paths = kept
+
+        if executor is None:
+            results = (render_file(p, formats, output_for(p), force) for p in paths)
+        else:
+            futures = [
+                executor.submit(render_file, p, formats, output_for(p), force)
+                for p in paths
+            ]
+            results = (f.result() for f in concurrent.futures.as_completed(futures))
+
+        for result in results:
+            if on_result is not None:
+                on_result(result)
+
+    watcher = get_watcher(root, interval, polling)
+    _logger.debug(f"watching {root} using {watcher.name}")
+    try:
+        changed = [p for p in harnesses if index.update(p)]
+        if initial and changed:
+            render(changed)
+
+        while not stop.is_set():
+            changed = [p for p in watcher.wait(stop) if index.update(p)]
+            if changed:
+                render(changed)
+    finally:
+        watcher.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)